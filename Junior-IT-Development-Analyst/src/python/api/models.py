@@ -22,6 +22,20 @@ class MLPredictionResponse(BaseModel):
     probability: Optional[float] = None
     model_used: str
     feature_importance: Optional[dict[str, float]] = None
+    model_version: Optional[str] = None
+
+
+class MLBatchPredictionRequest(BaseModel):
+    features: list[list[float]] = Field(..., min_length=1, description="Matriz de features, uma linha por predição")
+    model_type: str = Field(..., pattern="^(classifier|regressor|cluster)$")
+
+
+class MLBatchPredictionResponse(BaseModel):
+    predictions: list[Any]
+    probabilities: Optional[list[float]] = None
+    model_used: str
+    feature_importance: Optional[dict[str, float]] = None
+    model_version: Optional[str] = None
 
 
 class LLMRequest(BaseModel):
@@ -1,44 +1,65 @@
 from fastapi import APIRouter, HTTPException
-from ..models import MLPredictionRequest, MLPredictionResponse
+from ..models import (
+    MLPredictionRequest, MLPredictionResponse, MLBatchPredictionRequest, MLBatchPredictionResponse,
+)
 
 router = APIRouter()
 
+MODEL_NAMES = {
+    "classifier": "RandomForestClassifier",
+    "regressor": "RandomForestRegressor",
+    "cluster": "KMeans",
+}
 
-@router.post("/predict", response_model=MLPredictionResponse)
-def predict(request: MLPredictionRequest):
-    features = request.features
-    model_type = request.model_type
 
+def _predict(model_type: str, features):
+    # Passa pelo micro-batcher do modelo: requisições concorrentes viram uma chamada só
+    if model_type not in MODEL_NAMES:
+        raise HTTPException(400, f"Modelo inválido: {model_type}")
     try:
-        if model_type == "classifier":
-            from ...ml.classifier import predict_classification
-            pred, prob, importance = predict_classification(features)
-            return MLPredictionResponse(
-                prediction=pred, probability=prob,
-                model_used="RandomForestClassifier", feature_importance=importance
-            )
-        elif model_type == "regressor":
-            from ...ml.regressor import predict_regression
-            pred, importance = predict_regression(features)
-            return MLPredictionResponse(
-                prediction=pred, model_used="RandomForestRegressor",
-                feature_importance=importance
-            )
-        elif model_type == "cluster":
-            from ...ml.clustering import predict_cluster
-            cluster_id, similarity = predict_cluster(features)
-            return MLPredictionResponse(
-                prediction=int(cluster_id), probability=similarity,
-                model_used="KMeans"
-            )
-        else:
-            raise HTTPException(400, f"Modelo inválido: {model_type}")
+        from ...ml.batching import get_batcher
+        return get_batcher(model_type).predict(features)
     except ImportError:
         raise HTTPException(503, "Modelos ML não carregados. Execute o treinamento primeiro.")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Erro na predição: {str(e)}")
 
 
+def _importance(model_type: str, model):
+    if model_type == "cluster":
+        return None
+    from ...ml import classifier, regressor
+    return (classifier if model_type == "classifier" else regressor).feature_importance(model)
+
+
+@router.post("/predict", response_model=MLPredictionResponse)
+def predict(request: MLPredictionRequest):
+    result = _predict(request.model_type, request.features)
+    probability = result.outputs.get("probability")
+    return MLPredictionResponse(
+        prediction=result.outputs["prediction"][0].item(),
+        probability=None if probability is None else float(probability[0]),
+        model_used=MODEL_NAMES[request.model_type],
+        feature_importance=_importance(request.model_type, result.model),
+        model_version=result.version,
+    )
+
+
+@router.post("/predict/batch", response_model=MLBatchPredictionResponse)
+def predict_batch(request: MLBatchPredictionRequest):
+    result = _predict(request.model_type, request.features)
+    probability = result.outputs.get("probability")
+    return MLBatchPredictionResponse(
+        predictions=result.outputs["prediction"].tolist(),
+        probabilities=None if probability is None else probability.tolist(),
+        model_used=MODEL_NAMES[request.model_type],
+        feature_importance=_importance(request.model_type, result.model),
+        model_version=result.version,
+    )
+
+
 @router.post("/train")
 def train_models():
     try:
@@ -47,3 +68,14 @@ def train_models():
         return {"status": "ok", "results": results}
     except Exception as e:
         raise HTTPException(500, f"Erro no treinamento: {str(e)}")
+
+
+@router.get("/models")
+def list_models():
+    # Versão (hash dos artefatos) e tempo de carga de cada modelo em memória
+    try:
+        from ...ml import train_pipeline  # noqa: F401 - registra os modelos
+        from ...ml.registry import registry
+        return registry.info()
+    except ImportError:
+        raise HTTPException(503, "Modelos ML não carregados. Execute o treinamento primeiro.")
@@ -1,29 +1,171 @@
+import hashlib
+import json
+import os
+import time
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fnmatch import fnmatch
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Iterator, Literal, Optional
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _read_file(path: Path) -> tuple[pa.Table, float]:
+    # Roda no worker: devolve Arrow (serializa sem pickle de objetos Python no pool de processos)
+    start = time.perf_counter()
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df["_source_file"] = path.name
+    df["_extracted_at"] = datetime.now()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table, time.perf_counter() - start
+
+
+def _common_type(types: list[pa.DataType]) -> pa.DataType:
+    types = [t for t in types if not pa.types.is_null(t)]
+    if not types:
+        return pa.null()
+    if all(t == types[0] for t in types):
+        return types[0]
+    if all(pa.types.is_integer(t) for t in types):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    if all(pa.types.is_timestamp(t) for t in types):
+        return pa.timestamp("ns")
+    return pa.string()
+
+
+# Schema comum: colunas na ordem em que aparecem e o menor tipo que acomoda todos os arquivos
+def reconcile_schemas(schemas: list[pa.Schema]) -> pa.Schema:
+    names: list[str] = []
+    types: dict[str, list[pa.DataType]] = {}
+    for schema in schemas:
+        for field in schema:
+            if field.name not in types:
+                names.append(field.name)
+                types[field.name] = []
+            types[field.name].append(field.type)
+    return pa.schema([(name, _common_type(types[name])) for name in names])
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            columns.append(table[field.name].cast(field.type))
+        else:
+            columns.append(pa.nulls(len(table), field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    # Arquivos já processados: {nome: {size, mtime_ns, sha256, rows, output}}.
+    # Tamanho e mtime iguais bastam para pular; se mudaram, o hash decide
+    # (um arquivo só "tocado" não é reprocessado)
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def is_current(self, source: Path) -> bool:
+        entry = self.entries.get(source.name)
+        if entry is None:
+            return False
+        stat = source.stat()
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if stat.st_size != entry["size"] or file_hash(source) != entry["sha256"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record(self, source: Path, **extra) -> None:
+        stat = source.stat()
+        self.entries[source.name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash(source),
+            **extra,
+        }
+
+    def save(self) -> None:
+        # Grava em arquivo temporário e troca, para não deixar um manifesto pela metade
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
 
 
 class ETLPipeline:
-    def __init__(self, source_dir: Path, staging_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        source_dir: Path,
+        staging_dir: Optional[Path] = None,
+        max_workers: int = DEFAULT_WORKERS,
+        executor: Literal["thread", "process"] = "thread",
+    ):
         self.source_dir = Path(source_dir)
         self.staging_dir = Path(staging_dir) if staging_dir else source_dir / "staging"
         self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.executor = executor
+        self.file_report: list[dict] = []
 
-    def extract(self, file_pattern: str = "*.csv") -> pd.DataFrame:
-        files = list(self.source_dir.glob(file_pattern))
+    def _pool(self, n_files: int) -> Executor:
+        workers = max(1, min(self.max_workers, n_files))
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="etl-extract")
+
+    def _files(self, file_pattern: str) -> list[Path]:
+        files = sorted(self.source_dir.glob(file_pattern))
         if not files:
             raise FileNotFoundError(f"Nenhum arquivo {file_pattern} em {self.source_dir}")
+        return files
+
+    def iter_extract(
+        self, file_pattern: str = "*.csv", files: Optional[list[Path]] = None
+    ) -> Iterator[tuple[Path, pa.Table, float]]:
+        files = self._files(file_pattern) if files is None else files
+        if not files:
+            return
+
+        with self._pool(len(files)) as pool:
+            futures = {pool.submit(_read_file, f): f for f in files}
+            for future in as_completed(futures):
+                table, seconds = future.result()
+                yield futures[future], table, seconds
+
+    def extract_table(self, file_pattern: str = "*.csv") -> pa.Table:
+        # Arquivos lidos em paralelo; cada tabela entra como chunk, sem copiar os dados
+        results = {}
+        self.file_report = []
+        for path, table, seconds in self.iter_extract(file_pattern):
+            results[path] = table
+            self.file_report.append({"file": path.name, "rows": table.num_rows, "seconds": round(seconds, 4)})
 
-        dfs = []
-        for f in files:
-            df = pd.read_csv(f, encoding="utf-8-sig")
-            df["_source_file"] = f.name
-            df["_extracted_at"] = datetime.now()
-            dfs.append(df)
+        tables = [results[path] for path in sorted(results)]
+        schema = reconcile_schemas([t.schema for t in tables])
+        self.file_report.sort(key=lambda r: r["file"])
+        return pa.concat_tables([conform_table(t, schema) for t in tables])
 
-        return pd.concat(dfs, ignore_index=True)
+    def extract(self, file_pattern: str = "*.csv") -> pd.DataFrame:
+        table = self.extract_table(file_pattern)
+        # self_destruct libera cada coluna Arrow assim que convertida
+        return table.to_pandas(self_destruct=True, split_blocks=True)
 
     def transform(self, df: pd.DataFrame, operations: Optional[list[dict]] = None) -> pd.DataFrame:
         if operations is None:
@@ -65,7 +207,9 @@ class ETLPipeline:
             df.to_json(path, orient="records", indent=2, force_ascii=False)
         return path
 
-    def run(self, file_pattern: str = "*.csv", target: str = "gold_layer") -> dict:
+    def run(self, file_pattern: str = "*.csv", target: str = "gold_layer", incremental: bool = False) -> dict:
+        if incremental:
+            return self.run_incremental(file_pattern, target)
         start = datetime.now()
 
         df = self.extract(file_pattern)
@@ -83,8 +227,65 @@ class ETLPipeline:
             "transformed_rows": transformed_count,
             "output_path": str(path),
             "duration_seconds": round(duration, 2),
+            "workers": self.max_workers,
+            "files": self.file_report,
         }
 
+    def run_incremental(self, file_pattern: str = "*.csv", target: str = "gold_layer") -> dict:
+        # Saída particionada por arquivo de origem (staging/<target>/<arquivo>.parquet):
+        # só arquivos novos ou alterados são extraídos, transformados e regravados.
+        # O transform padrão roda por arquivo, então a mediana do fill_na é a do arquivo
+        start = datetime.now()
+        output_dir = self.staging_dir / target
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = FileManifest(self.staging_dir / f"{target}_manifest.json")
+
+        files = self._files(file_pattern)
+        pending = [f for f in files if not manifest.is_current(f)]
+        self.file_report = []
+        raw_count = transformed_count = 0
+        for path, table, seconds in self.iter_extract(files=pending):
+            rows = table.num_rows
+            # Depois do self_destruct a tabela Arrow não pode mais ser usada
+            df = self.transform(table.to_pandas(self_destruct=True, split_blocks=True))
+            part = output_dir / f"{path.stem}.parquet"
+            df.to_parquet(part, index=False)
+            manifest.record(path, rows=len(df), output=part.name)
+            raw_count += rows
+            transformed_count += len(df)
+            self.file_report.append({"file": path.name, "rows": rows, "seconds": round(seconds, 4)})
+
+        # Arquivo de origem removido: a partição correspondente sai da saída
+        names = {f.name for f in files}
+        removed = [name for name in manifest.entries if name not in names and fnmatch(name, file_pattern)]
+        for name in removed:
+            (output_dir / manifest.entries.pop(name)["output"]).unlink(missing_ok=True)
+        manifest.save()
+        self.file_report.sort(key=lambda r: r["file"])
+        duration = (datetime.now() - start).total_seconds()
+
+        return {
+            "status": "success",
+            "raw_rows": raw_count,
+            "transformed_rows": transformed_count,
+            "output_path": str(output_dir),
+            "duration_seconds": round(duration, 2),
+            "workers": self.max_workers,
+            "files": self.file_report,
+            "processed_files": len(pending),
+            "skipped_files": len(files) - len(pending),
+            "removed_files": len(removed),
+        }
+
+    def read_output(self, target: str = "gold_layer") -> pd.DataFrame:
+        # Junta as partições de run_incremental com o mesmo acerto de schema da extração
+        parts = sorted((self.staging_dir / target).glob("*.parquet"))
+        tables = [pq.read_table(p) for p in parts]
+        if not tables:
+            return pd.DataFrame()
+        schema = reconcile_schemas([t.schema for t in tables])
+        return pa.concat_tables([conform_table(t, schema) for t in tables]).to_pandas()
+
 
 def generate_sample_data(output_dir: Path):
     output_dir = Path(output_dir)
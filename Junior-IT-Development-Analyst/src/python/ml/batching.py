@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from .registry import registry
+
+# Limites de cada micro-lote: linhas por chamada ao modelo e espera máxima pelo lote encher
+MAX_BATCH_SIZE = int(os.getenv("ML_BATCH_MAX_SIZE", "256"))
+MAX_WAIT_MS = float(os.getenv("ML_BATCH_MAX_WAIT_MS", "5"))
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    outputs: dict[str, np.ndarray]
+    model: Any
+    version: str
+    batch_rows: int
+
+
+@dataclass
+class _Request:
+    X: np.ndarray
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    # Junta requisições concorrentes do mesmo modelo numa matriz, chama predict_batch
+    # uma vez e devolve a cada uma a sua fatia. Uma thread por modelo consome a fila:
+    # o lote fecha ao atingir max_batch_size linhas ou max_wait_ms após a primeira
+    # requisição. Uma matriz maior que o limite vai sozinha, sem ser partida
+    def __init__(self, name: str, predict: Callable[[Any, np.ndarray], dict[str, np.ndarray]], n_features: int,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.name = name
+        self.predict_batch = predict
+        self.n_features = n_features
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue[_Request] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, X) -> Future:
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # Valida antes de enfileirar: uma linha inválida não pode derrubar o lote dos outros
+        if X.ndim != 2 or X.shape[1] != self.n_features or not len(X):
+            raise ValueError(f"{self.name} espera {self.n_features} features por linha")
+        if not np.isfinite(X).all():
+            raise ValueError("Features devem ser números finitos")
+        self._ensure_worker()
+        request = _Request(X)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, X, timeout: Optional[float] = None) -> BatchResult:
+        return self.submit(X).result(timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _collect(self, carry: Optional[_Request]) -> tuple[list[_Request], Optional[_Request]]:
+        first = carry or self._queue.get()
+        batch, rows = [first], len(first.X)
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Passado o prazo ainda drena o que já está na fila, sem esperar mais
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if rows + len(request.X) > self.max_batch_size:
+                return batch, request  # abre o próximo lote
+            batch.append(request)
+            rows += len(request.X)
+        return batch, None
+
+    def _run(self) -> None:
+        carry = None
+        while True:
+            batch, carry = self._collect(carry)
+            self._execute(batch)
+
+    def _execute(self, batch: list[_Request]) -> None:
+        try:
+            loaded = registry.get(self.name)
+            X = batch[0].X if len(batch) == 1 else np.vstack([r.X for r in batch])
+            outputs = self.predict_batch(loaded.model, X)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        start = 0
+        for request in batch:
+            end = start + len(request.X)
+            sliced = {key: values[start:end] for key, values in outputs.items()}
+            request.future.set_result(BatchResult(sliced, loaded.model, loaded.version, len(X)))
+            start = end
+
+
+_BATCHERS: dict[str, MicroBatcher] = {}
+_BATCHERS_LOCK = threading.Lock()
+
+
+def get_batcher(model_type: str) -> MicroBatcher:
+    batcher = _BATCHERS.get(model_type)
+    if batcher is not None:
+        return batcher
+    from . import classifier, regressor, clustering
+
+    modules = {"classifier": classifier, "regressor": regressor, "cluster": clustering}
+    with _BATCHERS_LOCK:
+        if model_type not in _BATCHERS:
+            module = modules[model_type]
+            _BATCHERS[model_type] = MicroBatcher(model_type, module.predict_batch, len(module.FEATURE_NAMES))
+        return _BATCHERS[model_type]
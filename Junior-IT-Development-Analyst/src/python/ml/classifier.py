@@ -2,19 +2,20 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
-import joblib
 from pathlib import Path
 
+from .registry import registry, load_artifact, save_artifact
+
 MODEL_DIR = Path(__file__).parent.parent.parent / "ml" / "models"
 MODEL_PATH = MODEL_DIR / "classifier.pkl"
+FEATURE_NAMES = ["temperatura", "vibracao", "pressao", "horas_operacao", "carga"]
 
 
 def generate_sample_data(n_samples: int = 1000):
     rng = np.random.default_rng(42)
     X = rng.standard_normal((n_samples, 5))
     y = (X[:, 0] * 0.5 + X[:, 1] * 0.3 + X[:, 2] * -0.2 + rng.normal(0, 0.3, n_samples) > 0).astype(int)
-    feature_names = ["temperatura", "vibracao", "pressao", "horas_operacao", "carga"]
-    return X, y, feature_names
+    return X, y, list(FEATURE_NAMES)
 
 
 def train():
@@ -33,23 +34,31 @@ def train():
         "feature_importance": dict(zip(feature_names, model.feature_importances_.round(4))),
     }
 
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    save_artifact(model, MODEL_PATH)
+    registry.publish("classifier")
     return metrics
 
 
+def feature_importance(model) -> dict[str, float]:
+    return dict(zip(FEATURE_NAMES, model.feature_importances_.round(4)))
+
+
+def predict_batch(model, X: np.ndarray) -> dict[str, np.ndarray]:
+    # Um único predict_proba para a matriz inteira; a classe sai do argmax
+    proba = model.predict_proba(X)
+    return {
+        "prediction": model.classes_[proba.argmax(axis=1)].astype(int),
+        "probability": proba[:, 1],
+    }
+
+
 def predict_classification(features: list[float]):
-    if not MODEL_PATH.exists():
-        train()
-    model = joblib.load(MODEL_PATH)
-    X = np.array(features).reshape(1, -1)
-    pred = int(model.predict(X)[0])
-    prob = float(model.predict_proba(X)[0][1])
-    importance = dict(zip(
-        ["temperatura", "vibracao", "pressao", "horas_operacao", "carga"],
-        model.feature_importances_.round(4),
-    ))
-    return pred, prob, importance
+    model = registry.get("classifier").model
+    out = predict_batch(model, np.array(features).reshape(1, -1))
+    return int(out["prediction"][0]), float(out["probability"][0]), feature_importance(model)
+
+
+registry.register("classifier", (MODEL_PATH,), lambda: load_artifact(MODEL_PATH), train)
 
 
 if __name__ == "__main__":
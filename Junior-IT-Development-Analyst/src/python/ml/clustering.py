@@ -2,12 +2,14 @@ import numpy as np
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
-import joblib
 from pathlib import Path
 
+from .registry import registry, load_artifact, save_artifact
+
 MODEL_DIR = Path(__file__).parent.parent.parent / "ml" / "models"
 MODEL_PATH = MODEL_DIR / "cluster.pkl"
 SCALER_PATH = MODEL_DIR / "cluster_scaler.pkl"
+FEATURE_NAMES = ["consumo_energia", "horas_operacao", "temp_media"]
 
 
 def generate_sample_data(n_samples: int = 500):
@@ -18,8 +20,7 @@ def generate_sample_data(n_samples: int = 500):
     c3 = rng.normal(loc=[40, 15, 35], scale=2, size=(n_samples // 3, 3))
 
     X = np.vstack([c1, c2, c3])
-    feature_names = ["consumo_energia", "horas_operacao", "temp_media"]
-    return X, feature_names
+    return X, list(FEATURE_NAMES)
 
 
 def train(n_clusters: int = 3):
@@ -33,9 +34,9 @@ def train(n_clusters: int = 3):
 
     sil_score = silhouette_score(X_scaled, labels)
 
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(scaler, SCALER_PATH)
+    save_artifact(model, MODEL_PATH)
+    save_artifact(scaler, SCALER_PATH)
+    registry.publish("cluster")
 
     return {
         "silhouette_score": round(float(sil_score), 4),
@@ -45,18 +46,25 @@ def train(n_clusters: int = 3):
     }
 
 
+def predict_batch(model, X: np.ndarray) -> dict[str, np.ndarray]:
+    kmeans, scaler = model
+    # transform devolve a distância a cada centro; o cluster é o mais próximo
+    dist = kmeans.transform(scaler.transform(X))
+    cluster_ids = dist.argmin(axis=1)
+    similarity = 1 / (1 + dist[np.arange(len(X)), cluster_ids])
+    return {"prediction": cluster_ids, "probability": similarity.round(4)}
+
+
 def predict_cluster(features: list[float]):
-    if not MODEL_PATH.exists():
-        train()
-    model = joblib.load(MODEL_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    X = np.array(features).reshape(1, -1)
-    X_scaled = scaler.transform(X)
-    cluster_id = int(model.predict(X_scaled)[0])
-
-    dist = model.transform(X_scaled)[0]
-    similarity = round(float(1 / (1 + dist[cluster_id])), 4)
-    return cluster_id, similarity
+    out = predict_batch(registry.get("cluster").model, np.array(features).reshape(1, -1))
+    return int(out["prediction"][0]), float(out["probability"][0])
+
+
+def _load():
+    return load_artifact(MODEL_PATH), load_artifact(SCALER_PATH)
+
+
+registry.register("cluster", (MODEL_PATH, SCALER_PATH), _load, train)
 
 
 if __name__ == "__main__":
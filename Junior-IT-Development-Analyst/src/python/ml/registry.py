@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import joblib
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    name: str
+    model: Any
+    version: str
+    loaded_at: datetime
+    load_seconds: float
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+def save_artifact(obj: Any, path: Path) -> None:
+    # Grava ao lado e troca com os.replace: quem lê nunca vê um arquivo pela metade.
+    # Sem compressão, para que load_artifact consiga mapear os arrays em memória
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def load_artifact(path: Path) -> Any:
+    # mmap_mode="r": arrays numpy grandes ficam no page cache do SO em vez de copiados
+    return joblib.load(path, mmap_mode="r")
+
+
+def _version(paths: tuple[Path, ...]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class _Spec:
+    paths: tuple[Path, ...]
+    load: Callable[[], Any]
+    train: Callable[[], Any]
+
+
+class ModelRegistry:
+    # Modelos carregados uma vez e mantidos em memória. get() devolve a versão atual;
+    # publish() carrega a nova versão por completo e só então troca a referência, então
+    # predições em andamento terminam com o modelo que já tinham em mãos
+    def __init__(self):
+        self._specs: dict[str, _Spec] = {}
+        self._models: dict[str, LoadedModel] = {}
+        # RLock: get() pode treinar, e train() publica dentro do mesmo lock
+        self._lock = threading.RLock()
+
+    def register(self, name: str, paths: tuple[Path, ...], load: Callable[[], Any], train: Callable[[], Any]) -> None:
+        self._specs[name] = _Spec(tuple(paths), load, train)
+
+    def _load(self, name: str) -> LoadedModel:
+        spec = self._specs[name]
+        start = time.perf_counter()
+        model = spec.load()
+        elapsed = time.perf_counter() - start
+        return LoadedModel(name, model, _version(spec.paths), datetime.now(), elapsed)
+
+    def get(self, name: str) -> LoadedModel:
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                spec = self._specs[name]
+                if not all(p.exists() for p in spec.paths):
+                    spec.train()  # train() publica a versão recém-gravada
+                    loaded = self._models.get(name)
+                if loaded is None:
+                    loaded = self._load(name)
+                    self._models[name] = loaded
+            return loaded
+
+    def publish(self, name: str) -> LoadedModel:
+        loaded = self._load(name)
+        with self._lock:
+            self._models[name] = loaded
+        return loaded
+
+    def evict(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._models.clear()
+            else:
+                self._models.pop(name, None)
+
+    def info(self) -> dict:
+        return {
+            name: (self._models[name].info() if name in self._models else None)
+            for name in self._specs
+        }
+
+
+registry = ModelRegistry()
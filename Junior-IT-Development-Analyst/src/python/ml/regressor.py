@@ -2,19 +2,20 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-import joblib
 from pathlib import Path
 
+from .registry import registry, load_artifact, save_artifact
+
 MODEL_DIR = Path(__file__).parent.parent.parent / "ml" / "models"
 MODEL_PATH = MODEL_DIR / "regressor.pkl"
+FEATURE_NAMES = ["temp_ambiente", "umidade", "velocidade_producao", "qualidade_insumo"]
 
 
 def generate_sample_data(n_samples: int = 1000):
     rng = np.random.default_rng(42)
     X = rng.standard_normal((n_samples, 4))
     y = 100 + X[:, 0] * 15 + X[:, 1] * 8 + X[:, 2] * -5 + X[:, 3] * 3 + rng.normal(0, 5, n_samples)
-    feature_names = ["temp_ambiente", "umidade", "velocidade_producao", "qualidade_insumo"]
-    return X, y, feature_names
+    return X, y, list(FEATURE_NAMES)
 
 
 def train():
@@ -32,22 +33,26 @@ def train():
         "feature_importance": dict(zip(feature_names, model.feature_importances_.round(4))),
     }
 
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    save_artifact(model, MODEL_PATH)
+    registry.publish("regressor")
     return metrics
 
 
+def feature_importance(model) -> dict[str, float]:
+    return dict(zip(FEATURE_NAMES, model.feature_importances_.round(4)))
+
+
+def predict_batch(model, X: np.ndarray) -> dict[str, np.ndarray]:
+    return {"prediction": model.predict(X).round(2)}
+
+
 def predict_regression(features: list[float]):
-    if not MODEL_PATH.exists():
-        train()
-    model = joblib.load(MODEL_PATH)
-    X = np.array(features).reshape(1, -1)
-    pred = round(float(model.predict(X)[0]), 2)
-    importance = dict(zip(
-        ["temp_ambiente", "umidade", "velocidade_producao", "qualidade_insumo"],
-        model.feature_importances_.round(4),
-    ))
-    return pred, importance
+    model = registry.get("regressor").model
+    out = predict_batch(model, np.array(features).reshape(1, -1))
+    return float(out["prediction"][0]), feature_importance(model)
+
+
+registry.register("regressor", (MODEL_PATH,), lambda: load_artifact(MODEL_PATH), train)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 import sys
 from pathlib import Path
@@ -65,3 +66,28 @@ class TestMLAPI:
             "model_type": "invalid",
         })
         assert response.status_code == 400
+
+    def test_predict_reports_model_version(self):
+        response = client.post("/api/ml/predict", json={
+            "features": [15.0, 20.0, 25.0],
+            "model_type": "cluster",
+        })
+        assert response.status_code == 200
+        version = response.json()["model_version"]
+        models = client.get("/api/ml/models").json()
+        assert models["cluster"]["version"] == version
+        assert set(models) == {"classifier", "regressor", "cluster"}
+
+    def test_predict_batch_matrix(self):
+        rows = [[1.0, -0.5, 0.3, 2.0, -1.0], [0.0, 0.0, 0.0, 0.0, 0.0], [-1.0, 1.0, 0.5, 0.2, 0.1]]
+        response = client.post("/api/ml/predict/batch", json={"features": rows, "model_type": "classifier"})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["predictions"]) == len(data["probabilities"]) == 3
+        single = client.post("/api/ml/predict", json={"features": rows[2], "model_type": "classifier"}).json()
+        assert data["predictions"][2] == single["prediction"]
+        assert data["probabilities"][2] == pytest.approx(single["probability"])
+
+    def test_predict_wrong_feature_count(self):
+        response = client.post("/api/ml/predict", json={"features": [1.0, 2.0], "model_type": "regressor"})
+        assert response.status_code == 400
@@ -0,0 +1,100 @@
+from pathlib import Path
+import pytest
+import tempfile
+import shutil
+
+
+@pytest.fixture
+def temp_dir():
+    path = Path(tempfile.mkdtemp())
+    yield path
+    shutil.rmtree(path)
+
+
+class TestETLPipeline:
+    def test_parallel_extract_matches_sequential(self, temp_dir):
+        import pandas as pd
+        from src.python.data.etl_pipeline import ETLPipeline, generate_sample_data
+
+        generate_sample_data(temp_dir)
+        files = sorted(temp_dir.glob("*.csv"))
+        expected = pd.concat([pd.read_csv(f, encoding="utf-8-sig") for f in files], ignore_index=True)
+
+        pipeline = ETLPipeline(temp_dir, max_workers=3)
+        df = pipeline.extract()
+        assert len(df) == len(expected)
+        pd.testing.assert_frame_equal(df[expected.columns], expected)
+        assert df["_source_file"].unique().tolist() == [f.name for f in files]
+        assert [r["file"] for r in pipeline.file_report] == [f.name for f in files]
+
+    def test_process_pool(self, temp_dir):
+        from src.python.data.etl_pipeline import ETLPipeline
+
+        for i in range(3):
+            (temp_dir / f"b{i}.csv").write_text(f"id,val\n{i},{i * 10}\n", encoding="utf-8")
+        df = ETLPipeline(temp_dir, max_workers=2, executor="process").extract()
+        assert sorted(df["id"]) == [0, 1, 2]
+
+    def test_schema_reconciliation(self, temp_dir):
+        from src.python.data.etl_pipeline import ETLPipeline
+
+        (temp_dir / "a.csv").write_text("id,valor,codigo\n1,10,100\n", encoding="utf-8")
+        (temp_dir / "b.csv").write_text("id,valor,codigo,extra\n2,1.5,X7,y\n", encoding="utf-8")
+        (temp_dir / "c.csv").write_text("id,valor\n3,\n", encoding="utf-8")
+
+        df = ETLPipeline(temp_dir).extract().sort_values("id")
+        assert str(df["valor"].dtype) == "float64"
+        assert df["valor"].tolist()[:2] == [10.0, 1.5]
+        assert df["codigo"].tolist()[:2] == ["100", "X7"]
+        assert df["extra"].isna().tolist() == [True, False, True]
+
+    def test_run_reports_file_timings(self, temp_dir):
+        from src.python.data.etl_pipeline import ETLPipeline
+
+        for i in range(2):
+            (temp_dir / f"b{i}.csv").write_text(f"id,val\n{i},{i * 10}\n", encoding="utf-8")
+        result = ETLPipeline(temp_dir).run()
+        assert result["raw_rows"] == 2
+        assert [f["file"] for f in result["files"]] == ["b0.csv", "b1.csv"]
+        assert all(f["seconds"] >= 0 and f["rows"] == 1 for f in result["files"])
+
+
+class TestIncrementalRun:
+    def _write(self, directory, name, ids):
+        rows = "\n".join(f"{i},{i * 10}" for i in ids)
+        (directory / name).write_text(f"id,val\n{rows}\n", encoding="utf-8")
+
+    def test_skips_unchanged_files(self, temp_dir):
+        from src.python.data.etl_pipeline import ETLPipeline
+
+        self._write(temp_dir, "b1.csv", [1, 2])
+        self._write(temp_dir, "b2.csv", [3])
+        pipeline = ETLPipeline(temp_dir)
+
+        first = pipeline.run(incremental=True)
+        assert (first["processed_files"], first["skipped_files"]) == (2, 0)
+
+        self._write(temp_dir, "b3.csv", [4, 5])
+        second = pipeline.run(incremental=True)
+        assert (second["processed_files"], second["skipped_files"]) == (1, 2)
+        assert [f["file"] for f in second["files"]] == ["b3.csv"]
+        assert sorted(pipeline.read_output()["id"]) == [1, 2, 3, 4, 5]
+
+    def test_changed_and_removed_files(self, temp_dir):
+        import os
+        from src.python.data.etl_pipeline import ETLPipeline
+
+        self._write(temp_dir, "b1.csv", [1, 2])
+        self._write(temp_dir, "b2.csv", [3])
+        pipeline = ETLPipeline(temp_dir)
+        pipeline.run(incremental=True)
+
+        # Só o mtime muda: o hash confirma que o conteúdo é o mesmo
+        os.utime(temp_dir / "b2.csv", ns=(1, 1))
+        assert pipeline.run(incremental=True)["processed_files"] == 0
+
+        self._write(temp_dir, "b1.csv", [1, 2, 9])
+        (temp_dir / "b2.csv").unlink()
+        result = pipeline.run(incremental=True)
+        assert (result["processed_files"], result["removed_files"]) == (1, 1)
+        assert sorted(pipeline.read_output()["id"]) == [1, 2, 9]
@@ -49,6 +49,95 @@ class TestClustering:
         assert 0 <= similarity <= 1
 
 
+class TestRegistry:
+    def test_model_loaded_once(self, monkeypatch):
+        from src.python.ml import registry as reg
+        from src.python.ml.classifier import predict_classification
+
+        predict_classification([0.0] * 5)
+        calls = []
+        monkeypatch.setattr(reg.joblib, "load", lambda *a, **k: calls.append(a))
+        for _ in range(3):
+            predict_classification([0.1, 0.2, 0.3, 0.4, 0.5])
+        assert calls == []
+
+    def test_train_swaps_entry(self):
+        from src.python.ml.registry import registry
+        from src.python.ml.regressor import train, predict_regression
+
+        predict_regression([0.0] * 4)
+        before = registry.get("regressor")
+        train()
+        after = registry.get("regressor")
+        assert after is not before
+        assert after.loaded_at >= before.loaded_at
+        # Quem já segurava a versão anterior continua conseguindo prever
+        assert before.model.predict(np.zeros((1, 4))).shape == (1,)
+
+    def test_info_and_failed_load_keeps_current(self, tmp_path):
+        from src.python.ml.registry import ModelRegistry, save_artifact, load_artifact
+
+        path = tmp_path / "m.pkl"
+        save_artifact(np.arange(10.0), path)
+        reg = ModelRegistry()
+        reg.register("m", (path,), lambda: load_artifact(path), lambda: None)
+        entry = reg.get("m")
+        assert isinstance(entry.model, np.memmap)
+        info = reg.info()["m"]
+        assert info["version"] == entry.version and info["load_seconds"] >= 0
+
+        save_artifact(np.arange(5.0), path)
+        assert reg.publish("m").version != entry.version
+        path.write_bytes(b"corrompido")
+        with pytest.raises(Exception):
+            reg.publish("m")
+        assert len(reg.get("m").model) == 5
+
+
+class TestMicroBatcher:
+    def test_concurrent_requests_share_batches(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.python.ml import classifier
+        from src.python.ml.batching import MicroBatcher
+        from src.python.ml.registry import registry
+
+        X = np.random.default_rng(0).standard_normal((64, 5))
+        expected = classifier.predict_batch(registry.get("classifier").model, X)
+        batcher = MicroBatcher("classifier", classifier.predict_batch, 5, max_batch_size=16, max_wait_ms=50)
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(batcher.predict, X))
+
+        assert [int(r.outputs["prediction"][0]) for r in results] == expected["prediction"].tolist()
+        np.testing.assert_allclose([r.outputs["probability"][0] for r in results], expected["probability"])
+        sizes = [r.batch_rows for r in results]
+        assert max(sizes) > 1 and max(sizes) <= 16
+
+    def test_matrix_input_and_validation(self):
+        from src.python.ml import regressor
+        from src.python.ml.batching import MicroBatcher
+
+        batcher = MicroBatcher("regressor", regressor.predict_batch, 4, max_batch_size=8, max_wait_ms=1)
+        big = np.zeros((20, 4))
+        result = batcher.predict(big)
+        assert result.outputs["prediction"].shape == (20,)  # maior que o lote: vai sozinha
+        with pytest.raises(ValueError):
+            batcher.submit([1.0, 2.0, 3.0])
+        with pytest.raises(ValueError):
+            batcher.submit([1.0, float("nan"), 3.0, 4.0])
+
+    def test_model_error_reaches_every_caller(self):
+        from src.python.ml.batching import MicroBatcher
+
+        def broken(model, X):
+            raise RuntimeError("falhou")
+
+        batcher = MicroBatcher("cluster", broken, 3, max_wait_ms=20)
+        futures = [batcher.submit([1.0, 2.0, 3.0]) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+
+
 class TestFeatureEngineering:
     def test_pipeline(self):
         from src.python.ml.feature_engineering import example_pipeline
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import os
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 # Usa DATABASE_URL como padrão (Render, Heroku, etc)
@@ -14,6 +15,30 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_url(url: str) -> str | None:
+    """
+    URL equivalente com o driver asyncpg (None se o banco não for Postgres).
+
+    Os parâmetros da query vão para asyncpg.connect, que não conhece o ``sslmode`` do
+    libpq: ele vira ``ssl``, que aceita os mesmos modos (disable, prefer, require, ...).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() not in ("postgresql", "postgres"):
+        return None
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode is not None:
+        query.setdefault("ssl", sslmode)
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+# Engine assíncrona para os handlers async (opcional: requer o pacote asyncpg)
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    _ASYNC_URL = _async_url(DATABASE_URL)
+    async_engine = create_async_engine(_ASYNC_URL, pool_pre_ping=True) if _ASYNC_URL else None
+except ImportError:
+    async_engine = None
+
 def ping() -> bool:
     try:
         with engine.connect() as conn:
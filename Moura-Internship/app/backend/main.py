@@ -9,7 +9,8 @@ from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from app.backend.routers import health, metrics, stats, ml, etl, gold, extras
-from app.services.data import load_sales_df, compute_summary
+from app.services.data import load_sales_df, summarize_sales, period_bounds
+from app.services import async_data
 from app.core.utils import init_db_if_needed
 import logging
 import pandas as pd
@@ -46,8 +47,7 @@ class SalesItem(BaseModel):
     unit_price: float
     total: float
 
-@app.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request):
+def _dashboard_data() -> Dict[str, Any]:
     # Carrega os dados de vendas
     df = load_sales_df()
     
@@ -62,22 +62,31 @@ async def dashboard(request: Request):
     # Obtém a lista de produtos únicos para o filtro
     products = df['product'].unique().tolist() if not df.empty else []
     
-    # Calcula o resumo
-    summary = compute_summary(df)
+    # Calcula o resumo (a partir do cubo pré-agregado)
+    summary = summarize_sales()
     
     # Prepara dados para o preview da API
     sales_preview = sales_data[:20]  # Apenas as primeiras 20 entradas para o preview
 
+    return {
+        "summary": summary,
+        "sales": sales_data,
+        "products": products,
+        "sales_preview": sales_preview,
+    }
+
+@app.get("/", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    # Leitura e preparação dos dados rodam no executor de dados, fora do event loop
+    context = await async_data.run_sync(_dashboard_data)
+
     power_bi_url = os.getenv("POWER_BI_EMBED_URL", "")
     
     return templates.TemplateResponse(
         "dashboard.html",
         {
             "request": request,
-            "summary": summary,
-            "sales": sales_data,
-            "products": products,
-            "sales_preview": sales_preview,
+            **context,
             "power_bi_url": power_bi_url,
             "year": datetime.utcnow().year,
         },
@@ -91,41 +100,29 @@ async def get_sales(
     page: int = 1, 
     page_size: int = 10,
     sort_by: str = "date",
-    sort_order: str = "desc"
+    sort_order: str = "desc",
+    cursor: str = None
 ):
     try:
-        # Carrega os dados
-        df = load_sales_df()
-        
-        # Filtra por data, se fornecido
-        if start_date:
-            start_date = pd.to_datetime(start_date)
-            df = df[df['date'] >= start_date]
-        if end_date:
-            end_date = pd.to_datetime(end_date)
-            # Adiciona um dia para incluir o dia final
-            end_date = end_date + timedelta(days=1)
-            df = df[df['date'] <= end_date]
-            
-        # Filtra por produto, se fornecido
-        if product:
-            df = df[df['product'] == product]
-        
-        # Ordena os dados
-        df = df.sort_values(
-            by=sort_by, 
-            ascending=(sort_order.lower() == 'asc')
+        # Filtros, ordenação e paginação ficam a cargo da camada de dados (no Postgres,
+        # ORDER BY/LIMIT vão para o SQL; com cursor, paginação por chave). O limite
+        # final avança um dia para incluir o dia final.
+        start, end = period_bounds(start_date, end_date)
+        offset = (page - 1) * page_size
+        paginated_data, total_items, next_cursor = await async_data.fetch_sales_page(
+            start_date=start,
+            end_date=end,
+            product=product,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=page_size,
+            offset=offset,
+            cursor=cursor,
         )
         
         # Calcula a paginação
-        total_items = len(df)
         total_pages = (total_items + page_size - 1) // page_size
         
-        # Aplica a paginação
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_data = df.iloc[start_idx:end_idx]
-        
         # Converte para o formato de dicionário
         result = {
             "data": paginated_data.to_dict('records'),
@@ -133,35 +130,30 @@ async def get_sales(
                 "total_items": total_items,
                 "total_pages": total_pages,
                 "current_page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             }
         }
         
         return result
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/summary")
 async def get_summary(start_date: str = None, end_date: str = None, product: str = None):
     try:
-        df = load_sales_df()
-        
-        # Aplica filtros
-        if start_date:
-            start_date = pd.to_datetime(start_date)
-            df = df[df['date'] >= start_date]
-        if end_date:
-            end_date = pd.to_datetime(end_date)
-            end_date = end_date + timedelta(days=1)  # Inclui o dia final
-            df = df[df['date'] <= end_date]
-        if product:
-            df = df[df['product'] == product]
+        # Aplica filtros sobre as células do cubo pré-agregado
+        start, end = period_bounds(start_date, end_date)  # Inclui o dia final
+        cells = (await async_data.get_sales_cube()).slice(start, end, product or None)
         
         # Calcula as métricas
-        total_revenue = df['total'].sum()
-        total_quantity = df['quantity'].sum()
-        avg_ticket = total_revenue / len(df) if len(df) > 0 else 0
+        total_revenue = cells['total'].sum()
+        total_quantity = cells['quantity'].sum()
+        sales_count = cells['count'].sum()
+        avg_ticket = total_revenue / sales_count if sales_count > 0 else 0
         
         # Calcula a variação em relação ao período anterior
         # (simulação - em um cenário real, você compararia com o período anterior)
@@ -172,7 +164,7 @@ async def get_summary(start_date: str = None, end_date: str = None, product: str
         }
         
         # Top produtos por receita
-        top_products = df.groupby('product')['total'].sum().nlargest(5).to_dict()
+        top_products = cells.groupby('product')['total'].sum().nlargest(5).to_dict()
         
         return {
             'total_revenue': round(total_revenue, 2),
@@ -186,69 +178,32 @@ async def get_summary(start_date: str = None, end_date: str = None, product: str
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/charts/revenue")
-async def get_revenue_chart(period: str = 'month', product: str = None):
+async def get_revenue_chart(
+    period: str = 'month',
+    product: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    bucket: str = 'day'
+):
     try:
-        df = load_sales_df()
-        
-        # Filtra por produto, se fornecido
-        if product:
-            df = df[df['product'] == product]
-        
-        # Agrupa por período
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        
-        now = datetime.now()
-        labels = []
-        data = []
-        
-        if period == 'week':
-            # Últimos 7 dias
-            for i in range(6, -1, -1):
-                date = now - timedelta(days=i)
-                day_data = df[df['date'].dt.date == date.date()]
-                labels.append(date.strftime('%a'))
-                data.append(day_data['total'].sum())
-        elif period == 'month':
-            # Últimos 30 dias
-            for i in range(29, -1, -1):
-                date = now - timedelta(days=i)
-                day_data = df[df['date'].dt.date == date.date()]
-                labels.append(date.strftime('%d/%m') if i % 5 == 0 else '')
-                data.append(day_data['total'].sum())
-        else:  # year
-            # Últimos 12 meses
-            for i in range(11, -1, -1):
-                date = now - pd.DateOffset(months=i)
-                month_data = df[(df['date'].dt.year == date.year) & 
-                               (df['date'].dt.month == date.month)]
-                labels.append(date.strftime('%b %Y'))
-                data.append(month_data['total'].sum())
-        
-        return {
-            'labels': labels,
-            'data': data
-        }
-        
+        # Buckets calculados numa única passada sobre os totais diários do cubo
+        return await async_data.get_revenue_series(
+            period, product, start_date=start_date, end_date=end_date, bucket=bucket
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/charts/categories")
 async def get_categories_chart(start_date: str = None, end_date: str = None):
     try:
-        df = load_sales_df()
-        
-        # Filtra por data, se fornecido
-        if start_date:
-            start_date = pd.to_datetime(start_date)
-            df = df[df['date'] >= start_date]
-        if end_date:
-            end_date = pd.to_datetime(end_date)
-            end_date = end_date + timedelta(days=1)  # Inclui o dia final
-            df = df[df['date'] <= end_date]
+        # Filtra por data, se fornecido (sobre as células do cubo pré-agregado)
+        start, end = period_bounds(start_date, end_date)  # Inclui o dia final
+        cells = (await async_data.get_sales_cube()).slice(start, end)
         
         # Agrupa por categoria (no exemplo, usamos 'product' como categoria)
-        category_data = df.groupby('product')['total'].sum().sort_values(ascending=False).head(5)
+        category_data = cells.groupby('product')['total'].sum().sort_values(ascending=False).head(5)
         
         return {
             'labels': category_data.index.tolist(),
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
-from typing import List, Dict
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Optional
 
 class SalesRecord(BaseModel):
     order_id: int = Field(..., ge=1)
@@ -22,6 +23,7 @@ class SalesRecord(BaseModel):
 class SalesResponse(BaseModel):
     rows: int
     preview: List[SalesRecord]
+    next_cursor: str | None = None
 
 class MetricSummary(BaseModel):
     total_revenue: float
@@ -30,18 +32,49 @@ class MetricSummary(BaseModel):
     top_products: List[str]
     regions: List[str]
 
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    hit_ratio: float
+    snapshot_rows: int
+    snapshot_age_seconds: float | None = None
+    snapshot_staleness_seconds: float | None = None
+    refresh_in_progress: bool = False
+    refreshes: int = 0
+    refresh_errors: int = 0
+    last_refresh_seconds: float | None = None
+    last_refresh_at: datetime | None = None
+    last_refresh_incremental: bool | None = None
+
 class HealthCheck(BaseModel):
     status: str
     version: str
     db_ok: bool
 
+class PearsonGroup(BaseModel):
+    group: str
+    n: int
+    pearson_r: Optional[float] = None
+    p_value: Optional[float] = None
+
 class PearsonResponse(BaseModel):
     pearson_r: float
     p_value: float
+    by: Optional[str] = None
+    groups: Optional[List[PearsonGroup]] = None
 
 class OLSResponse(BaseModel):
     params: Dict[str, float]
     r2: float
+    bse: Optional[Dict[str, float]] = None
+    n: Optional[int] = None
 
 class PredictRequest(BaseModel):
     quantity: int = Field(..., ge=0)
@@ -49,3 +82,29 @@ class PredictRequest(BaseModel):
 
 class PredictResponse(BaseModel):
     y_pred: float
+
+# Limite de cenários por requisição em /ml/predict/batch
+MAX_BATCH_ROWS = 1_000_000
+
+class BatchPredictRequest(BaseModel):
+    """Cenários em linhas ([[quantity, unit_price], ...]) ou em colunas (quantity, unit_price)."""
+    rows: Optional[List[List[float]]] = None
+    quantity: Optional[List[float]] = None
+    unit_price: Optional[List[float]] = None
+
+    @model_validator(mode="after")
+    def _check_shape(self) -> "BatchPredictRequest":
+        columnar = self.quantity is not None or self.unit_price is not None
+        if (self.rows is not None) == columnar:
+            raise ValueError("Informe 'rows' ou as colunas 'quantity' e 'unit_price'")
+        if columnar:
+            if self.quantity is None or self.unit_price is None or len(self.quantity) != len(self.unit_price):
+                raise ValueError("'quantity' e 'unit_price' precisam ter o mesmo tamanho")
+            size = len(self.quantity)
+        else:
+            if any(len(row) != 2 for row in self.rows):
+                raise ValueError("Cada linha deve ser [quantity, unit_price]")
+            size = len(self.rows)
+        if size > MAX_BATCH_ROWS:
+            raise ValueError(f"No máximo {MAX_BATCH_ROWS} cenários por requisição")
+        return self
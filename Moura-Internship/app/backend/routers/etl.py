@@ -1,10 +1,12 @@
 from __future__ import annotations
+from typing import Optional
 from fastapi import APIRouter
 from app.backend.routers.flow_etl import etl_sales
 
 router = APIRouter(prefix="/etl", tags=["etl"])
 
 @router.post("/run")
-def run_etl():
-    res = etl_sales()
+def run_etl(streaming: Optional[bool] = None, batch_size: Optional[int] = None):
+    # streaming=true lê e grava a fonte em lotes (ETL_STREAMING/ETL_BATCH_ROWS por padrão)
+    res = etl_sales(streaming=streaming, batch_size=batch_size)
     return {"status": "ok", "result": res}
@@ -1,24 +1,26 @@
 from __future__ import annotations
-from fastapi import APIRouter, Response
+from typing import Optional
+from fastapi import APIRouter, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.responses import StreamingResponse
-import io, base64
+import base64
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
-from app.services.data import load_sales_df
+from app.services.data import get_regression_stats, get_sales_snapshot, load_sales_df
+from app.services.regression import RegressionStats
+from app.services.snapshot import SalesSnapshot
+from app.services.export import iter_sales_batches, iter_xlsx
+from app.services.charts import prepare_chart, render_chart, RenderQueueFull
 from app.backend.routers.spark_job import run_spark_job
+from app.services.aggregation import sum_by
 
 router = APIRouter(prefix="", tags=["extras"])
 
 @router.get("/export/excel", response_class=StreamingResponse)
 def export_excel():  # type: ignore[override]
-    df = load_sales_df()
-    output = io.BytesIO()
-    df.to_excel(output, index=False, engine="openpyxl")
-    output.seek(0)
+    # Lotes do cursor/snapshot gravados pelo writer write-only do openpyxl
+    output = iter_xlsx(iter_sales_batches())
     headers = {"Content-Disposition": "attachment; filename=sales.xlsx"}
     return StreamingResponse(output, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers=headers)
 
@@ -33,68 +35,74 @@ def plotly_sales():
     fig = px.bar(df, x="product", y="total", color="region", title="Receita por Produto (Plotly)")
     return fig.to_json()
 
-def get_sales_df():
-    df = load_sales_df()
-    # Garante coluna 'total' para todos os endpoints
+def get_sales_df(snapshot: Optional[SalesSnapshot] = None):
+    df = snapshot.view() if snapshot is not None else load_sales_df()
+    # Garante coluna 'total' para todos os endpoints; a visão aceita colunas novas sem
+    # copiar nem alterar o snapshot compartilhado
     if 'total' not in df.columns and 'quantity' in df.columns and 'unit_price' in df.columns:
         df['total'] = df['quantity'] * df['unit_price']
     return df
 
+def _chart_response(request: Request, name: str, df: pd.DataFrame, snapshot: SalesSnapshot) -> Response:
+    """
+    Resposta de um gráfico PNG com ETag derivado dos dados agregados: se o cliente já
+    tem a versão atual (If-None-Match), devolve 304 sem renderizar nem reenviar a imagem.
+    A chave é memorizada por snapshot, então o polling de ETag não reagrega as vendas.
+    """
+    key, data = prepare_chart(name, df, snapshot=snapshot)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    img_b64 = base64.b64encode(render_chart(name, key, data)).decode()
+    return JSONResponse({"image": f"data:image/png;base64,{img_b64}"}, headers=headers)
+
 @router.get("/matplotlib-sales")
-def matplotlib_sales():
+def matplotlib_sales(request: Request):
     try:
-        df = get_sales_df()
+        snapshot = get_sales_snapshot()
+        df = get_sales_df(snapshot)
         if df.empty or 'product' not in df or 'total' not in df:
             return {"image": None, "error": "No data available for Matplotlib chart."}
-        fig, ax = plt.subplots(figsize=(7,4))
-        df.groupby("product")['total'].sum().plot(kind='bar', ax=ax, color='skyblue')
-        ax.set_title("Receita por Produto (Matplotlib)")
-        buf = io.BytesIO()
-        plt.tight_layout()
-        fig.savefig(buf, format='png')
-        plt.close(fig)
-        img_b64 = base64.b64encode(buf.getvalue()).decode()
-        return {"image": f"data:image/png;base64,{img_b64}"}
+        return _chart_response(request, "matplotlib-sales", df, snapshot)
+    except RenderQueueFull as e:
+        return JSONResponse({"image": None, "error": str(e)}, status_code=503, headers={"Retry-After": "1"})
     except Exception as e:
         return {"image": None, "error": f"Matplotlib error: {str(e)}"}
 
 @router.get("/seaborn-sales")
-def seaborn_sales():
+def seaborn_sales(request: Request):
     try:
-        df = get_sales_df()
+        snapshot = get_sales_snapshot()
+        df = get_sales_df(snapshot)
         if df.empty or 'product' not in df or 'total' not in df or 'region' not in df:
             return {"image": None, "error": "No data available for Seaborn chart."}
-        plt.figure(figsize=(7,4))
-        sns.barplot(data=df, x="product", y="total", hue="region")
-        plt.title("Receita por Produto (Seaborn)")
-        buf = io.BytesIO()
-        plt.tight_layout()
-        plt.savefig(buf, format='png')
-        plt.close()
-        img_b64 = base64.b64encode(buf.getvalue()).decode()
-        return {"image": f"data:image/png;base64,{img_b64}"}
+        return _chart_response(request, "seaborn-sales", df, snapshot)
+    except RenderQueueFull as e:
+        return JSONResponse({"image": None, "error": str(e)}, status_code=503, headers={"Retry-After": "1"})
     except Exception as e:
         return {"image": None, "error": f"Seaborn error: {str(e)}"}
 
 @router.get("/ml/linear-regression")
 def linear_regression():
     try:
-        df = get_sales_df()
+        snapshot = get_sales_snapshot()
+        df = get_sales_df(snapshot)
         if df.empty or 'quantity' not in df or 'total' not in df:
             return {"error": "No data available for regression."}
-        X = df[["quantity"]]
-        y = df["total"]
-        from sklearn.linear_model import LinearRegression
-        model = LinearRegression().fit(X, y)
-        score = model.score(X, y)
-        coef = model.coef_[0]
-        intercept = model.intercept_
-        mean_qty = float(np.mean(df["quantity"]))
-        pred = float(model.predict([[mean_qty]])[0])
+        # Estatísticas suficientes em cache por snapshot: sem refazer o ajuste a cada chamada
+        # ('total' derivado em get_sales_df não está no snapshot e é ajustado na hora)
+        if 'total' in snapshot.frame.columns:
+            stats = get_regression_stats(("quantity",), "total")
+        else:
+            stats = RegressionStats.from_frame(df, ["quantity"], "total")
+        fit = stats.fit()
+        mean_qty = float(stats.mean[0])
+        pred = float(fit.predict([[mean_qty]])[0])
         return {
-            "coef": coef,
-            "intercept": intercept,
-            "score": score,
+            "coef": float(fit.coef[0]),
+            "intercept": fit.intercept,
+            "score": fit.r2,
             "mean_quantity": mean_qty,
             "predicted_total": pred
         }
@@ -102,17 +110,14 @@ def linear_regression():
         return {"error": f"Regression error: {str(e)}"}
 
 @router.get("/bigdata/spark-aggregates")
-def spark_aggregates():
+def spark_aggregates(backend: Optional[str] = None):
     try:
         df = get_sales_df()
         if df.empty or 'product' not in df or 'total' not in df:
             return []
-        from pyspark.sql import SparkSession
-        spark = SparkSession.builder.master("local[*]").appName("SalesAgg").getOrCreate()
-        sdf = spark.createDataFrame(df)
-        agg = sdf.groupBy("product").sum("total").toPandas()
-        spark.stop()
-        agg = agg.rename(columns={"sum(total)": "total_revenue"})
+        # O planejador escolhe pandas, um motor colunar ou Spark pelo tamanho dos dados;
+        # ?backend= força um motor específico
+        agg = sum_by(df, "product", "total", backend=backend)
         return agg.to_dict(orient="records")
     except Exception as e:
-        return [{"product": None, "total_revenue": None, "error": f"PySpark error: {str(e)}"}]
+        return [{"product": None, "total_revenue": None, "error": f"Aggregation error: {str(e)}"}]
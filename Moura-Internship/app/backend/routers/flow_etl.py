@@ -1,10 +1,18 @@
 from __future__ import annotations
-from prefect import flow, task
+from prefect import flow, get_run_logger, task
 import pandas as pd
-from pathlib import Path
 import os
+from typing import Iterator
 from sqlalchemy import text
 from app.backend.db import engine
+from app.services.gold import write_gold, write_gold_batches
+
+_SALES_QUERY = "SELECT order_id, region, product, quantity, unit_price, date FROM sales ORDER BY order_id"
+
+# Modo streaming: a fonte é lida em lotes de ETL_BATCH_ROWS linhas e cada lote é
+# transformado e gravado antes do próximo, então a memória não cresce com a fonte
+ETL_STREAMING = os.getenv("ETL_STREAMING", "false").lower() in ("1", "true", "yes")
+ETL_BATCH_ROWS = int(os.getenv("ETL_BATCH_ROWS", "100000"))
 
 @task
 def extract_csv(path: str) -> pd.DataFrame:
@@ -13,26 +21,57 @@ def extract_csv(path: str) -> pd.DataFrame:
 @task
 def extract_postgres() -> pd.DataFrame:
     with engine.connect() as conn:
-        return pd.read_sql(text("SELECT order_id, region, product, quantity, unit_price FROM sales ORDER BY order_id"), conn)
+        return pd.read_sql(text(_SALES_QUERY), conn)
 
-@task
-def transform(df: pd.DataFrame) -> pd.DataFrame:
+def _transform(df: pd.DataFrame) -> pd.DataFrame:
     df["total"] = df["quantity"] * df["unit_price"]
     return df
 
+@task
+def transform(df: pd.DataFrame) -> pd.DataFrame:
+    return _transform(df)
+
 @task
 def load_parquet(df: pd.DataFrame, out_path: str) -> None:
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_path, index=False)
+    # Dataset particionado por ano/mês (ver app/services/gold.py)
+    write_gold(df, out_path)
+
+def iter_csv_batches(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, chunksize=batch_size)
+
+def iter_postgres_batches(batch_size: int) -> Iterator[pd.DataFrame]:
+    # Cursor no servidor: o driver só traz batch_size linhas por vez
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=batch_size) as conn:
+        yield from pd.read_sql(text(_SALES_QUERY), conn, chunksize=batch_size)
+
+@task
+def stream_to_parquet(source: str, csv_path: str, out_path: str, batch_size: int) -> dict:
+    logger = get_run_logger()
+    if source == "postgres":
+        batches = iter_postgres_batches(batch_size)
+    else:
+        batches = iter_csv_batches(csv_path, batch_size)
+
+    def report(stats: dict) -> None:
+        logger.info(
+            f"[etl] lote {stats['batches']}: {stats['rows']} linhas, "
+            f"{stats['rows_per_second']:.0f} linhas/s, pico RSS {stats['peak_rss_mb'] or 0:.0f} MB"
+        )
+
+    return write_gold_batches((_transform(batch) for batch in batches), out_path, progress=report)
 
 @flow(name="moura-etl")
 def etl_sales(
     src: str | None = None,
     dest: str | None = None,
+    streaming: bool | None = None,
+    batch_size: int | None = None,
 ):
     source = os.getenv("ETL_SOURCE", "csv")
     csv_path = src or os.getenv("ETL_CSV_PATH", "data/sample_sales.csv")
     out_path = dest or os.getenv("ETL_GOLD_PARQUET", "data/processed/sales.parquet")
+    if ETL_STREAMING if streaming is None else streaming:
+        return stream_to_parquet(source, csv_path, out_path, batch_size or ETL_BATCH_ROWS)
     if source == "postgres":
         df = extract_postgres()
     else:
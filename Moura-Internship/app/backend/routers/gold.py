@@ -1,14 +1,18 @@
 from __future__ import annotations
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 import os
-import pandas as pd
 from pathlib import Path
+from app.services.export import iter_csv, iter_parquet_batches, write_csv
 
 router = APIRouter(prefix="/gold", tags=["gold"])
 
+def _gold_parquet() -> str:
+    return os.getenv("ETL_GOLD_PARQUET", "data/processed/sales.parquet")
+
 @router.post("/export")
 def export_gold():
-    parquet_path = os.getenv("ETL_GOLD_PARQUET", "data/processed/sales.parquet")
+    parquet_path = _gold_parquet()
     csv_path = os.getenv("ETL_GOLD_CSV", "data/processed/sales_gold.csv")
     p = Path(parquet_path)
 
@@ -16,7 +20,16 @@ def export_gold():
         # se ainda não existe, não falha: apenas informa
         return {"status": "no_parquet", "message": f"{parquet_path} não encontrado. Rode /etl/run primeiro."}
 
-    df = pd.read_parquet(parquet_path)
+    # Converte row group a row group: só um lote do parquet fica em memória
     Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(csv_path, index=False)
-    return {"status": "ok", "rows": len(df), "parquet": parquet_path, "csv": csv_path}
+    rows = write_csv(iter_parquet_batches(parquet_path), csv_path)
+    return {"status": "ok", "rows": rows, "parquet": parquet_path, "csv": csv_path}
+
+@router.get("/export.csv")
+def download_gold():
+    """Baixa a camada gold como CSV, enviado lote a lote enquanto o parquet é lido."""
+    parquet_path = _gold_parquet()
+    if not Path(parquet_path).exists():
+        return {"status": "no_parquet", "message": f"{parquet_path} não encontrado. Rode /etl/run primeiro."}
+    headers = {"Content-Disposition": "attachment; filename=sales_gold.csv"}
+    return StreamingResponse(iter_csv(iter_parquet_batches(parquet_path)), media_type="text/csv", headers=headers)
@@ -1,10 +1,10 @@
 from __future__ import annotations
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 import logging
-from typing import List
-import pandas as pd
-from app.backend.models import SalesRecord, SalesResponse, MetricSummary
-from app.services.data import load_sales_df, compute_summary
+from app.backend.models import SalesResponse, MetricSummary, CacheStats
+from app.backend.serializers import sales_response_bytes
+from app.services.spark import get_spark_stats
+from app.services.data import fetch_sales_page, summarize_sales, get_cache_stats, get_memory_report, get_sales_snapshot
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -14,27 +14,20 @@ def sales(
     offset: int = Query(0, ge=0),
     start_date: str = Query(None, description="Data inicial (YYYY-MM-DD)"),
     end_date: str = Query(None, description="Data final (YYYY-MM-DD)"),
-    product: str = Query(None, description="Produto")
-) -> SalesResponse:  # type: ignore[override]
-    df: pd.DataFrame = load_sales_df(start_date=start_date, end_date=end_date, product=product)
+    product: str = Query(None, description="Produto"),
+    cursor: str = Query(None, description="next_cursor da página anterior (paginação por chave)")
+) -> Response:  # type: ignore[override]
+    try:
+        page, rows, next_cursor = fetch_sales_page(
+            start_date=start_date, end_date=end_date, product=product,
+            sort_by="order_id", sort_order="asc", limit=limit, offset=offset, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     logging.info(f"[DEBUG] Parâmetro recebido: product={product}")  # TODO(copilot, 2025-09-22, debug filtro): Remover após validação
-    logging.info(f"[DEBUG] Linhas retornadas após filtro: {len(df)}")  # TODO(copilot, 2025-09-22, debug filtro): Remover após validação
-    if "order_id" in df.columns:
-        df = df.sort_values("order_id")
-    prev = df.iloc[offset:offset+limit].to_dict(orient="records")
-    # Conversão robusta de campos de data/hora para string
-    for r in prev:
-        for field in ["date", "created_at", "updated_at"]:
-            val = r.get(field)
-            if val is None or (hasattr(val, 'isnull') and val.isnull()):
-                r[field] = None
-            elif hasattr(val, 'isoformat'):
-                r[field] = val.isoformat()
-            else:
-                r[field] = str(val) if val else None
-    # garantir tipos coerentes com SalesRecord
-    preview: List[SalesRecord] = [SalesRecord(**r) for r in prev]  # type: ignore[arg-type]
-    return SalesResponse(rows=len(df), preview=preview)
+    logging.info(f"[DEBUG] Linhas retornadas após filtro: {rows}")  # TODO(copilot, 2025-09-22, debug filtro): Remover após validação
+    # Serialização colunar direto para bytes (mesmo schema de SalesResponse)
+    return Response(content=sales_response_bytes(page, rows, next_cursor), media_type="application/json")
 
 @router.get("/summary", response_model=MetricSummary)
 def summary(
@@ -42,6 +35,20 @@ def summary(
     end_date: str = Query(None, description="Data final (YYYY-MM-DD)"),
     product: str = Query(None, description="Produto")
 ) -> MetricSummary:  # type: ignore[override]
-    df = load_sales_df(start_date=start_date, end_date=end_date, product=product)
-    sm = compute_summary(df)
+    sm = summarize_sales(start_date=start_date, end_date=end_date, product=product)
     return MetricSummary(**sm)
+
+@router.get("/cache", response_model=CacheStats)
+def cache() -> CacheStats:  # type: ignore[override]
+    return CacheStats(**get_cache_stats())
+
+@router.get("/memory")
+def memory() -> dict:
+    """Memória do snapshot de vendas antes/depois do schema declarado (categorias, int32)."""
+    get_sales_snapshot()
+    return get_memory_report() or {}
+
+@router.get("/spark")
+def spark() -> dict:
+    """Estado da SparkSession compartilhada (inicializações, uso, ociosidade)."""
+    return get_spark_stats()
@@ -1,17 +1,44 @@
 from __future__ import annotations
-from fastapi import APIRouter
-from app.backend.models import PredictRequest, PredictResponse
-from app.services.data import load_sales_df, train_model, predict as predict_value
+from typing import Iterator
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.backend.models import BatchPredictRequest, PredictRequest, PredictResponse
+from app.backend.serializers import dumps
+from app.services.data import train_model, predict as predict_value, predict_batch
 
 router = APIRouter(prefix="/ml", tags=["ml"])
 
+# Previsões por bloco do corpo da resposta em /ml/predict/batch
+PREDICT_STREAM_CHUNK = 8192
+
 @router.post("/train")
 def train():  # type: ignore[override]
-    df = load_sales_df()
-    metrics = train_model(df)
+    # Ajuste em forma fechada sobre as estatísticas suficientes do snapshot
+    metrics = train_model()
     return metrics
 
 @router.post("/predict", response_model=PredictResponse)
 def predict(req: PredictRequest) -> PredictResponse:  # type: ignore[override]
     y_pred = predict_value(req.quantity, req.unit_price)
     return PredictResponse(y_pred=y_pred)
+
+def _iter_predictions(y_pred: np.ndarray, chunk: int = PREDICT_STREAM_CHUNK) -> Iterator[bytes]:
+    """JSON {"count": n, "y_pred": [...]} enviado em blocos de ``chunk`` valores."""
+    yield b'{"count":' + str(len(y_pred)).encode() + b',"y_pred":['
+    for start in range(0, len(y_pred), chunk):
+        if start:
+            yield b","
+        yield dumps(y_pred[start:start + chunk].tolist())[1:-1]
+    yield b"]}"
+
+@router.post("/predict/batch")
+def predict_many(req: BatchPredictRequest) -> StreamingResponse:  # type: ignore[override]
+    # Uma chamada vetorizada para todos os cenários; a ordem da resposta é a da entrada
+    if req.rows is not None:
+        X = np.asarray(req.rows, dtype="float64").reshape(-1, 2)
+    else:
+        X = np.column_stack([np.asarray(req.quantity, dtype="float64"), np.asarray(req.unit_price, dtype="float64")])
+    if not np.isfinite(X).all() or (X < 0).any():
+        raise HTTPException(status_code=400, detail="quantity e unit_price devem ser finitos e não negativos")
+    return StreamingResponse(_iter_predictions(predict_batch(X)), media_type="application/json")
@@ -1,18 +1,23 @@
 from __future__ import annotations
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException
 from app.backend.models import PearsonResponse, OLSResponse
-from app.services.data import load_sales_df, compute_pearson, compute_ols
+from app.services.data import compute_pearson, compute_pearson_by, compute_ols
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 @router.get("/pearson", response_model=PearsonResponse)
-def pearson() -> PearsonResponse:  # type: ignore[override]
-    df = load_sales_df()
-    res = compute_pearson(df)
+def pearson(by: Optional[str] = None) -> PearsonResponse:  # type: ignore[override]
+    res = compute_pearson()
+    if by is not None:
+        # Modo agrupado: r e valor-p por produto, região ou categoria numa passada só
+        try:
+            res.update(by=by, groups=compute_pearson_by(by))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     return PearsonResponse(**res)
 
 @router.get("/ols", response_model=OLSResponse)
 def ols() -> OLSResponse:  # type: ignore[override]
-    df = load_sales_df()
-    res = compute_ols(df)
+    res = compute_ols()
     return OLSResponse(**res)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from app.backend.models import SalesRecord
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da stdlib
+    orjson = None
+
+# Campos do SalesRecord agrupados pelo tipo de conversão (ordem das chaves = ordem do modelo)
+_FIELDS = list(SalesRecord.model_fields)
+_DATETIME_FIELDS = {"date", "created_at", "updated_at"}
+_INT_FIELDS = {"order_id": 1, "quantity": 0}  # campo -> valor mínimo (ge)
+_FLOAT_FIELDS = {"unit_price": 0, "total": 0}
+_OPTIONAL_INT_FIELDS = {"customer_id", "user_id"}
+_OPTIONAL_TEXT_FIELDS = {"status", "notes", "category", "payment_method"}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON compacto em bytes, aceitando escalares numpy/pandas."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        payload, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _iso_strings(col: pd.Series) -> List[Optional[str]]:
+    """Datas em ISO 8601 (como ``isoformat()``), com nulos como None."""
+    if pd.api.types.is_datetime64_any_dtype(col):
+        has_fraction = ((col.dt.microsecond != 0) | (col.dt.nanosecond != 0)).any()
+        if col.dt.tz is None and not has_fraction:
+            out = col.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        else:
+            out = col.map(lambda v: v.isoformat(), na_action="ignore")
+        return out.astype(object).where(col.notna(), None).tolist()
+    # Coluna de objetos (strings do CSV, date/datetime do banco)
+    return [
+        None if v is None or v is pd.NaT or (isinstance(v, float) and np.isnan(v))
+        else v.isoformat() if hasattr(v, "isoformat")
+        else (str(v) if v else None)
+        for v in col.tolist()
+    ]
+
+
+def _column(page: pd.DataFrame, field: str) -> Optional[List[Any]]:
+    """Converte uma coluna inteira; None se algum valor violar o SalesRecord."""
+    if field not in page.columns:
+        return [None] * len(page) if not SalesRecord.model_fields[field].is_required() else None
+    col = page[field]
+    if field in _DATETIME_FIELDS:
+        values = _iso_strings(col)
+        if field == "date" and any(v is None for v in values):
+            return None
+        return values
+    if field in _INT_FIELDS or field in _FLOAT_FIELDS:
+        if not pd.api.types.is_numeric_dtype(col) or col.isna().any():
+            return None
+        minimum = _INT_FIELDS.get(field, _FLOAT_FIELDS.get(field))
+        if (col < minimum).any():
+            return None
+        if field in _INT_FIELDS:
+            if (col % 1 != 0).any():
+                return None
+            return col.astype("int64").tolist()
+        return col.astype("float64").tolist()
+    if field in _OPTIONAL_INT_FIELDS:
+        if not pd.api.types.is_numeric_dtype(col):
+            return None
+        present = col.notna()
+        if (col[present] % 1 != 0).any():
+            return None
+        return col.astype("Int64").astype(object).where(present, None).tolist()
+    # Campos de texto: o tipo é inferido uma vez por coluna
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype(object)
+    inferred = pd.api.types.infer_dtype(col, skipna=field in _OPTIONAL_TEXT_FIELDS)
+    if inferred not in ("string", "empty"):
+        return None
+    return col.astype(object).where(col.notna(), None).tolist()
+
+
+def _records_fast(page: pd.DataFrame) -> Optional[List[Dict[str, Any]]]:
+    columns = []
+    for field in _FIELDS:
+        values = _column(page, field)
+        if values is None:
+            return None
+        columns.append(values)
+    return [dict(zip(_FIELDS, row)) for row in zip(*columns)]
+
+
+def _records_validated(page: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Caminho linha a linha via pydantic (erros de validação aparecem como antes)."""
+    prev = page.to_dict(orient="records")
+    for r in prev:
+        for field in _DATETIME_FIELDS:
+            val = r.get(field)
+            if val is None or (hasattr(val, 'isnull') and val.isnull()):
+                r[field] = None
+            elif hasattr(val, 'isoformat'):
+                r[field] = val.isoformat()
+            else:
+                r[field] = str(val) if val else None
+    return [SalesRecord(**r).model_dump() for r in prev]  # type: ignore[arg-type]
+
+
+def sales_response_bytes(page: pd.DataFrame, rows: int, next_cursor: Optional[str] = None) -> bytes:
+    """
+    Serializa uma página de vendas no formato de SalesResponse direto para bytes JSON.
+
+    Os campos de data são convertidos de forma vetorizada e os tipos/limites do
+    SalesRecord são verificados uma vez por coluna. Se a página violar o schema, cai no
+    caminho linha a linha do pydantic, que produz os mesmos erros de validação.
+    """
+    records = _records_fast(page)
+    if records is None:
+        records = _records_validated(page)
+    return dumps({"rows": int(rows), "preview": records, "next_cursor": next_cursor})
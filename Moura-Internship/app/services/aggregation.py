@@ -0,0 +1,170 @@
+from __future__ import annotations
+import abc
+import logging
+import os
+from typing import Dict, List, Optional
+import pandas as pd
+
+# Limites do planejador, medidos com scripts/benchmarks/aggregation_benchmark.py. Numa
+# vCPU o groupby do pandas sobre colunas categóricas venceu o Arrow em todos os tamanhos
+# até 5M linhas (100ms contra 108ms): converter para outro motor custa mais que agregar,
+# e o ganho dos motores colunares vem do paralelismo. Acima de PANDAS_MAX_ROWS um motor
+# colunar em processo (DuckDB/Arrow) agrega sem copiar para a JVM; acima de
+# COLUMNAR_MAX_BYTES o trabalho vai para o Spark, se disponível.
+PANDAS_MAX_ROWS = int(os.getenv("AGG_PANDAS_MAX_ROWS", "5000000"))
+COLUMNAR_MAX_BYTES = int(os.getenv("AGG_COLUMNAR_MAX_MB", "4096")) * 1024 * 1024
+
+
+class AggregationBackend(abc.ABC):
+    """
+    Motor de agregação ``soma de value por key``.
+
+    Todas as implementações devolvem o mesmo formato: colunas [key, "total_revenue"],
+    chaves como texto, totais float64 e linhas ordenadas pela chave.
+    """
+
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def _sum_by(self, df: pd.DataFrame, key: str, value: str) -> pd.DataFrame:
+        """Soma de ``value`` por ``key`` com duas colunas (chave, soma), em qualquer ordem."""
+
+    def sum_by(self, df: pd.DataFrame, key: str = "product", value: str = "total") -> pd.DataFrame:
+        result = self._sum_by(df, key, value)
+        result.columns = [key, "total_revenue"]
+        result = result.astype({key: object, "total_revenue": "float64"})
+        return result.sort_values(key, kind="stable", ignore_index=True)
+
+
+class PandasBackend(AggregationBackend):
+    name = "pandas"
+
+    def _sum_by(self, df, key, value):
+        return df.groupby(key, observed=True)[value].sum().reset_index()
+
+
+class ArrowBackend(AggregationBackend):
+    """Agregação colunar em processo com o motor de group_by do pyarrow (Acero)."""
+
+    name = "arrow"
+
+    def available(self) -> bool:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _sum_by(self, df, key, value):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df[[key, value]], preserve_index=False)
+        table = table.filter(pa.compute.is_valid(table[key]))
+        return table.group_by(key).aggregate([(value, "sum")]).to_pandas()[[key, f"{value}_sum"]]
+
+
+class DuckDBBackend(AggregationBackend):
+    """Agregação colunar em processo com DuckDB (lê o DataFrame sem copiar)."""
+
+    name = "duckdb"
+
+    def available(self) -> bool:
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _sum_by(self, df, key, value):
+        import duckdb
+
+        frame = df[[key, value]]
+        with duckdb.connect() as conn:
+            conn.register("sales", frame)
+            return conn.execute(
+                f'SELECT "{key}", SUM("{value}") FROM sales WHERE "{key}" IS NOT NULL GROUP BY "{key}"'
+            ).df()
+
+
+class SparkBackend(AggregationBackend):
+    """Agregação distribuída na SparkSession compartilhada."""
+
+    name = "spark"
+
+    def available(self) -> bool:
+        try:
+            import pyspark  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _sum_by(self, df, key, value):
+        from app.services.schema import plain_dtypes
+        from app.services.spark import spark_manager
+
+        with spark_manager.use() as spark:
+            sdf = spark.createDataFrame(plain_dtypes(df[[key, value]]))
+            result = sdf.where(sdf[key].isNotNull()).groupBy(key).sum(value).toPandas()
+        return result
+
+
+BACKENDS: Dict[str, AggregationBackend] = {
+    backend.name: backend
+    for backend in (PandasBackend(), DuckDBBackend(), ArrowBackend(), SparkBackend())
+}
+_COLUMNAR = ["duckdb", "arrow"]
+
+
+def available_backends() -> List[str]:
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def plan_backend(rows: int, nbytes: int) -> str:
+    """
+    Escolhe o motor pelo número de linhas e pela memória estimada da entrada.
+
+    Args:
+        rows: Linhas a agregar
+        nbytes: Tamanho estimado em memória (memory_usage(deep=True))
+
+    Returns:
+        Nome do motor em BACKENDS
+    """
+    if rows < PANDAS_MAX_ROWS:
+        return "pandas"
+    if nbytes < COLUMNAR_MAX_BYTES or not BACKENDS["spark"].available():
+        for name in _COLUMNAR:
+            if BACKENDS[name].available():
+                return name
+        return "pandas"
+    return "spark"
+
+
+def sum_by(
+    df: pd.DataFrame, key: str = "product", value: str = "total", backend: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Soma ``value`` por ``key`` no motor indicado ou escolhido pelo planejador.
+
+    Args:
+        df: Linhas de venda
+        key: Coluna de agrupamento
+        value: Coluna somada
+        backend: Nome do motor ('pandas', 'duckdb', 'arrow', 'spark') ou None para planejar
+
+    Returns:
+        DataFrame [key, total_revenue] ordenado pela chave
+    """
+    if backend is None:
+        nbytes = int(df[[key, value]].memory_usage(index=False, deep=True).sum())
+        backend = plan_backend(len(df), nbytes)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inválido: {backend}")
+    engine = BACKENDS[backend]
+    if not engine.available():
+        raise ValueError(f"Backend indisponível: {backend}")
+    logging.info(f"[aggregation] {len(df)} linhas agregadas com {backend}")
+    return engine.sum_by(df, key, value)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+import pandas as pd
+from sqlalchemy import text
+from app.backend.db import async_engine
+from app.services import data
+
+T = TypeVar("T")
+
+# Executor limitado para o trabalho síncrono (pandas, leituras da fonte) dos handlers
+# async; o event loop nunca executa essas chamadas diretamente
+DATA_EXECUTOR_WORKERS = int(os.getenv("DATA_EXECUTOR_WORKERS", "4"))
+_EXECUTOR = ThreadPoolExecutor(max_workers=DATA_EXECUTOR_WORKERS, thread_name_prefix="sales-data")
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa ``func`` no executor de dados e aguarda o resultado sem bloquear o loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, partial(func, *args, **kwargs))
+
+
+# Depois de uma falha da engine assíncrona (driver, SSL, conexão), as consultas seguem
+# pelo caminho síncrono no executor por ASYNC_RETRY_SECONDS antes de tentar de novo
+ASYNC_RETRY_SECONDS = 60
+_ASYNC_FAILED_AT: Optional[float] = None
+
+
+def _use_async_engine() -> bool:
+    if async_engine is None or os.getenv("ETL_SOURCE", "csv") != "postgres":
+        return False
+    return _ASYNC_FAILED_AT is None or time.monotonic() - _ASYNC_FAILED_AT >= ASYNC_RETRY_SECONDS
+
+
+async def _read_sql(query: str, params: Dict[str, Any]) -> pd.DataFrame:
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(query), params)
+        rows = result.all()
+    return pd.DataFrame(rows, columns=list(result.keys()))
+
+
+async def _count(start, end, product: Optional[str]) -> int:
+    total = data.cached_count(start, end, product)
+    if total is not None:
+        return total
+    query, params = data._count_query(start, end, product)
+    async with async_engine.connect() as conn:
+        total = int((await conn.execute(text(query), params)).scalar())
+    data.remember_count(start, end, product, total)
+    return total
+
+
+async def fetch_sales_page(
+    start_date: Optional[Union[str, datetime]] = None,
+    end_date: Optional[Union[str, datetime]] = None,
+    product: Optional[str] = None,
+    sort_by: str = "order_id",
+    sort_order: str = "asc",
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[pd.DataFrame, int, Optional[str]]:
+    """
+    Versão assíncrona de data.fetch_sales_page.
+
+    Com ETL_SOURCE=postgres e asyncpg disponível, a página e o COUNT(*) são consultados
+    em paralelo pela engine assíncrona; caso contrário a versão síncrona roda no
+    executor de dados. Se a engine assíncrona falhar, a mesma página é servida pelo
+    caminho síncrono.
+    """
+    global _ASYNC_FAILED_AT
+    sync_page = partial(
+        run_sync, data.fetch_sales_page, start_date, end_date, product, sort_by, sort_order, limit, offset, cursor
+    )
+    if not _use_async_engine():
+        return await sync_page()
+    if sort_by not in data._KEYSET_COLUMNS:
+        raise ValueError(f"sort_by inválido: {sort_by}")
+    start = data._as_timestamp(start_date)
+    end = data._as_timestamp(end_date)
+    product = data._normalize_product(product)
+    ascending = sort_order.lower() == "asc"
+    query, params = data._sales_page_query(start, end, product, sort_by, ascending, limit, offset, cursor)
+    try:
+        page, total = await asyncio.gather(_read_sql(query, params), _count(start, end, product))
+    except Exception as e:
+        _ASYNC_FAILED_AT = time.monotonic()
+        logging.warning(f"[async_data] Engine assíncrona falhou, usando o caminho síncrono: {e}")
+        return await sync_page()
+    _ASYNC_FAILED_AT = None
+    page = data._typed_page(page)
+    return page, total, data._next_cursor(page, sort_by, limit)
+
+
+async def load_sales_df(**kwargs: Any) -> pd.DataFrame:
+    return await run_sync(data.load_sales_df, **kwargs)
+
+
+async def summarize_sales(**kwargs: Any) -> Dict[str, Any]:
+    return await run_sync(data.summarize_sales, **kwargs)
+
+
+async def get_sales_cube() -> data.SalesCube:
+    return await run_sync(data.get_sales_cube)
+
+
+async def get_revenue_series(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    return await run_sync(data.get_revenue_series, *args, **kwargs)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """
+    Cache LRU de resultados filtrados, limitado por número de entradas, bytes e TTL.
+
+    Cada entrada guarda normalmente um SalesSnapshot imutável, cujo custo em memória é
+    medido uma única vez, na criação do snapshot; outros valores (ex.: contagens) informam
+    o tamanho em ``put``. O TTL conta a partir da inserção. Ao exceder os limites, as
+    entradas menos usadas são descartadas primeiro.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024, ttl_minutes: float = 5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, datetime]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, stored_at = entry
+            if datetime.now() - stored_at >= self.ttl:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = value.nbytes
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            # Um resultado maior que o orçamento inteiro não é cacheado
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, datetime.now())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl.total_seconds(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class RenderCache:
+    """
+    Cache de conteúdo renderizado (ex.: PNG de gráficos) endereçado pelo hash da entrada.
+
+    As entradas mais recentes ficam num LRU em memória (até ``max_entries``) e todas são
+    gravadas em ``directory``, limitado a ``max_disk_bytes`` (os arquivos mais antigos
+    são removidos primeiro). Como a chave deriva do conteúdo, não há TTL: dados novos
+    geram chaves novas.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        suffix: str = ".png",
+    ):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.directory = Path(directory) if directory else None
+        self.suffix = suffix
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.renders = 0
+        self._disk_bytes = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.directory.glob(f"*{suffix}"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+        content = self._read_disk(key)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, content)
+            return content
+
+    def put(self, key: str, content: bytes) -> None:
+        with self._lock:
+            self._remember(key, content)
+        self._write_disk(key, content)
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        content = self.get(key)
+        if content is None:
+            content = render()
+            with self._lock:
+                self.renders += 1
+            self.put(key, content)
+        return content
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.directory is not None:
+                for path in self.directory.glob(f"*{self.suffix}"):
+                    path.unlink(missing_ok=True)
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "renders": self.renders,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, content: bytes) -> None:
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        os.utime(path)  # marca como usado recentemente para a limpeza por idade
+        return content
+
+    def _write_disk(self, key: str, content: bytes) -> None:
+        if self.directory is None or len(content) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        if path.exists():
+            return
+        # Grava num temporário e renomeia: leitores nunca veem um arquivo pela metade
+        tmp = path.with_suffix(f".{os.getpid()}.{get_ident()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += len(content)
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            files = sorted(self.directory.glob(f"*{self.suffix}"), key=lambda p: p.stat().st_mtime)
+            for old in files:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                if old == path:
+                    continue
+                size = old.stat().st_size
+                old.unlink(missing_ok=True)
+                self._disk_bytes -= size
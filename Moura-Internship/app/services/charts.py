@@ -0,0 +1,241 @@
+from __future__ import annotations
+import atexit
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.services.cache import RenderCache
+from app.services.snapshot import SalesSnapshot
+
+# Incrementar quando o código de renderização mudar, para invalidar imagens antigas
+CHART_VERSION = 2
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", "data/cache/charts")
+CHART_CACHE_MAX_ENTRIES = 32
+CHART_CACHE_MAX_MB = 64
+
+_RENDER_CACHE = RenderCache(
+    max_entries=CHART_CACHE_MAX_ENTRIES,
+    directory=CHART_CACHE_DIR,
+    max_disk_bytes=CHART_CACHE_MAX_MB * 1024 * 1024,
+)
+
+# Pool de processos renderizadores (0 = renderiza na própria thread da requisição).
+# Cada worker recebe só a entrada agregada do gráfico; no máximo
+# CHART_RENDER_WORKERS + CHART_QUEUE_DEPTH renderizações ficam pendentes
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+CHART_QUEUE_DEPTH = int(os.getenv("CHART_QUEUE_DEPTH", "16"))
+CHART_RENDER_TIMEOUT = 30  # segundos
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_SLOTS = threading.BoundedSemaphore(max(1, CHART_RENDER_WORKERS) + CHART_QUEUE_DEPTH)
+_POOL_STATS = {"pool_renders": 0, "rejected": 0, "pool_failures": 0}
+
+
+# Última (chave, entrada agregada) de cada gráfico e o snapshot que a originou (por
+# referência fraca, para não segurar um snapshot já substituído)
+_PREPARED: Dict[str, Tuple["weakref.ref[SalesSnapshot]", str, Any]] = {}
+_PREPARED_LOCK = threading.Lock()
+
+
+class RenderQueueFull(RuntimeError):
+    """Fila de renderização cheia; o cliente deve tentar de novo mais tarde."""
+
+
+def matplotlib_input(df: pd.DataFrame) -> pd.Series:
+    """Receita por produto: a única entrada usada pelo gráfico do Matplotlib."""
+    return df.groupby("product", observed=True)["total"].sum()
+
+
+def seaborn_input(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Média e intervalo de confiança de 95% do total por (produto, região).
+
+    Calculados aqui, no processo da API, para que só a tabela agregada (uma linha por
+    par) chegue ao worker. O intervalo usa a distribuição t; grupos com um pedido ficam
+    sem barra de erro.
+    """
+    from scipy.special import stdtrit
+
+    stats = (
+        df.groupby(["product", "region"], observed=True)["total"]
+        .agg(["mean", "std", "count"])
+        .reset_index()
+        .astype({"product": object, "region": object})
+    )
+    n = stats.pop("count").to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half = stdtrit(n - 1, 0.975) * stats.pop("std").to_numpy() / np.sqrt(n)
+    stats["ci"] = np.nan_to_num(half, nan=0.0)
+    return stats
+
+
+def _figure():
+    # API orientada a objetos com o canvas Agg: nenhum estado global do pyplot
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 4))
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
+
+def _png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def render_matplotlib(revenue: pd.Series) -> bytes:
+    fig, ax = _figure()
+    revenue.plot(kind="bar", ax=ax, color="skyblue")
+    ax.set_title("Receita por Produto (Matplotlib)")
+    return _png(fig)
+
+
+def render_seaborn(stats: pd.DataFrame) -> bytes:
+    import seaborn as sns
+
+    # Barras agrupadas por região, como o barplot do seaborn, com as barras de erro
+    # desenhadas a partir dos intervalos já calculados em seaborn_input
+    fig, ax = _figure()
+    products = list(dict.fromkeys(stats["product"]))
+    regions = list(dict.fromkeys(stats["region"]))
+    width = 0.8 / max(1, len(regions))
+    positions = np.arange(len(products))
+    for i, (region, color) in enumerate(zip(regions, sns.color_palette(n_colors=len(regions)))):
+        bars = stats[stats["region"] == region].set_index("product").reindex(products)
+        ax.bar(
+            positions - 0.4 + width * (i + 0.5), bars["mean"], width,
+            yerr=bars["ci"], color=color, label=region, error_kw={"ecolor": "#424242"},
+        )
+    ax.set_xticks(positions, products)
+    ax.set_xlabel("product")
+    ax.set_ylabel("total")
+    ax.legend(title="region")
+    ax.set_title("Receita por Produto (Seaborn)")
+    return _png(fig)
+
+
+_CHARTS: Dict[str, Tuple[Callable[[pd.DataFrame], Any], Callable[[Any], bytes]]] = {
+    "matplotlib-sales": (matplotlib_input, render_matplotlib),
+    "seaborn-sales": (seaborn_input, render_seaborn),
+}
+
+
+def chart_key(name: str, data: Any, **params: Any) -> str:
+    """
+    Hash SHA-256 do nome do gráfico, dos parâmetros e dos dados de entrada agregados.
+
+    Os dados entram pelo hash vetorizado do pandas (valores e rótulos do índice), então
+    a mesma agregação produz a mesma chave em qualquer processo.
+    """
+    digest = hashlib.sha256(f"{name}|v{CHART_VERSION}|{sorted(params.items())}".encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    if isinstance(data, pd.DataFrame):
+        digest.update("|".join(map(str, data.columns)).encode())
+    return digest.hexdigest()
+
+
+def prepare_chart(name: str, df: pd.DataFrame, snapshot: Optional[SalesSnapshot] = None) -> Tuple[str, Any]:
+    """
+    Agrega a entrada do gráfico ``name`` e devolve (chave/ETag, entrada agregada).
+
+    Com ``snapshot`` (o snapshot de onde ``df`` veio), o resultado fica memorizado para
+    ele: novas requisições (inclusive as que terminam em 304) não reagregam nem
+    recalculam o hash até o snapshot ser trocado.
+    """
+    if snapshot is not None:
+        with _PREPARED_LOCK:
+            entry = _PREPARED.get(name)
+        if entry is not None and entry[0]() is snapshot:
+            return entry[1], entry[2]
+    build_input, _ = _CHARTS[name]
+    data = build_input(df)
+    key = chart_key(name, data)
+    if snapshot is not None:
+        with _PREPARED_LOCK:
+            _PREPARED[name] = (weakref.ref(snapshot), key, data)
+    return key, data
+
+
+def _warm_worker() -> None:
+    """Inicializador dos workers: backend Agg e bibliotecas de gráfico já importadas."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import seaborn  # noqa: F401
+
+
+def _noop() -> None:
+    return None
+
+
+def _render_worker(name: str, data: Any) -> bytes:
+    return _CHARTS[name][1](data)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: o servidor tem threads ativas, e fork copiaria locks em estado arbitrário
+            _POOL = ProcessPoolExecutor(
+                max_workers=CHART_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+            for _ in range(CHART_RENDER_WORKERS):
+                _POOL.submit(_noop)  # sobe todos os workers já aquecidos
+        return _POOL
+
+
+def shutdown_render_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+atexit.register(shutdown_render_pool)
+
+
+def _render(name: str, data: Any) -> bytes:
+    """Renderiza no pool de processos, respeitando o limite da fila."""
+    if CHART_RENDER_WORKERS <= 0:
+        return _render_worker(name, data)
+    if not _SLOTS.acquire(blocking=False):
+        _POOL_STATS["rejected"] += 1
+        raise RenderQueueFull(f"Fila de renderização cheia ({CHART_QUEUE_DEPTH} pendentes)")
+    try:
+        png = _get_pool().submit(_render_worker, name, data).result(timeout=CHART_RENDER_TIMEOUT)
+        _POOL_STATS["pool_renders"] += 1
+        return png
+    except BrokenProcessPool as e:
+        # Um worker morreu: recria o pool na próxima chamada e renderiza aqui mesmo
+        logging.error(f"[charts] Pool de renderização quebrado: {e}")
+        _POOL_STATS["pool_failures"] += 1
+        shutdown_render_pool()
+        return _render_worker(name, data)
+    finally:
+        _SLOTS.release()
+
+
+def render_chart(name: str, key: str, data: Any) -> bytes:
+    """PNG do gráfico, lido do cache de renderização ou renderizado uma única vez."""
+    return _RENDER_CACHE.get_or_render(key, lambda: _render(name, data))
+
+
+def get_render_stats() -> Dict[str, Any]:
+    stats = _RENDER_CACHE.stats()
+    stats.update(_POOL_STATS, workers=CHART_RENDER_WORKERS, queue_depth=CHART_QUEUE_DEPTH)
+    return stats
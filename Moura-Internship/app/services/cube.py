@@ -0,0 +1,167 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.services.snapshot import day_numbers, day_slice, MISSING_DAY
+
+DIMENSIONS = ["day", "product", "region"]
+MEASURES = [
+    "total", "quantity", "count", "total_count",
+    "price_sum", "price_count", "price_min", "price_max",
+]
+
+
+_EMPTY_CELLS = {
+    "day": "datetime64[ns]", "product": "object", "region": "object",
+    "total": "float64", "quantity": "int64", "count": "int64", "total_count": "int64",
+    "price_sum": "float64", "price_count": "int64", "price_min": "float64", "price_max": "float64",
+}
+
+
+def _aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega linhas de venda no grão dia × produto × região."""
+    if df.empty:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in _EMPTY_CELLS.items()})
+    keys = pd.DataFrame({
+        "day": pd.to_datetime(df["date"]).dt.normalize(),
+        "product": df["product"],
+        "region": df["region"],
+        "total": df["total"],
+        "quantity": df["quantity"],
+        "unit_price": df["unit_price"],
+    })
+    cells = keys.groupby(DIMENSIONS, dropna=False, sort=True, observed=True).agg(
+        total=("total", "sum"),
+        quantity=("quantity", "sum"),
+        count=("total", "size"),
+        total_count=("total", "count"),
+        price_sum=("unit_price", "sum"),
+        price_count=("unit_price", "count"),
+        price_min=("unit_price", "min"),
+        price_max=("unit_price", "max"),
+    )
+    cells = cells.reset_index()
+    # As células são poucas: dimensões categóricas voltam a ser texto para que cubos de
+    # cargas diferentes se combinem sem conflito de categorias
+    return cells.astype({"product": object, "region": object})
+
+
+def _merge(cells: pd.DataFrame) -> pd.DataFrame:
+    """Recombina células repetidas (somas somam, mínimos/máximos se combinam)."""
+    merged = cells.groupby(DIMENSIONS, dropna=False, sort=True).agg(
+        total=("total", "sum"),
+        quantity=("quantity", "sum"),
+        count=("count", "sum"),
+        total_count=("total_count", "sum"),
+        price_sum=("price_sum", "sum"),
+        price_count=("price_count", "sum"),
+        price_min=("price_min", "min"),
+        price_max=("price_max", "max"),
+    )
+    return merged.reset_index()
+
+
+class SalesCube:
+    """
+    Cubo pré-agregado de vendas no grão dia × produto × região.
+
+    Guarda sum(total), sum(quantity), contagem de pedidos e soma/mínimo/máximo do preço
+    unitário por célula. ``total_count`` e ``price_count`` contam só os valores não nulos
+    e são os denominadores das médias, como ``mean()`` no pandas. As consultas leem apenas as células, então o custo depende do
+    número de grupos e não do número de pedidos. A instância é imutável: ``add`` devolve
+    um novo cubo.
+    """
+
+    def __init__(self, cells: pd.DataFrame):
+        # As células vêm do groupby ordenadas por dia (NaT por último), o que permite
+        # recortar períodos por busca binária
+        self.cells = cells
+        self.days = day_numbers(cells["day"])
+        self._daily: Dict[Optional[str], Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "SalesCube":
+        return cls(_aggregate(df))
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def add(self, rows: pd.DataFrame) -> "SalesCube":
+        """Incorpora novas linhas de venda sem reagregar o histórico."""
+        if rows.empty:
+            return self
+        if self.cells.empty:
+            return SalesCube(_aggregate(rows))
+        return SalesCube(_merge(pd.concat([self.cells, _aggregate(rows)], ignore_index=True)))
+
+    def slice(
+        self,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        product: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Células dentro do intervalo de dias [start, end] (inclusivo) e do produto.
+
+        Args:
+            start: Limite inferior aplicado ao dia da venda
+            end: Limite superior aplicado ao dia da venda
+            product: Produto exato (None para todos)
+
+        Returns:
+            DataFrame de células do cubo
+        """
+        cells = self.cells
+        if start is not None or end is not None:
+            cells = cells.iloc[day_slice(self.days, start, end)]
+        if product is not None:
+            cells = cells[cells["product"] == product]
+        return cells
+
+    def daily_totals(self, product: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Receita por dia (números de dia ordenados, totais), calculada uma vez por
+        produto e reaproveitada enquanto este cubo estiver em uso.
+        """
+        cached = self._daily.get(product)
+        if cached is not None:
+            return cached
+        days = self.days
+        totals = self.cells["total"].to_numpy()
+        if product is not None:
+            mask = (self.cells["product"] == product).to_numpy()
+            days = days[mask]
+            totals = totals[mask]
+        valid = days != MISSING_DAY
+        unique_days, index = np.unique(days[valid], return_inverse=True)
+        daily = np.bincount(index, weights=totals[valid].astype("float64"), minlength=len(unique_days))
+        if np.issubdtype(totals.dtype, np.integer):
+            daily = np.rint(daily).astype(totals.dtype)
+        self._daily[product] = (unique_days, daily)
+        return unique_days, daily
+
+
+def by_product(cells: pd.DataFrame) -> pd.DataFrame:
+    """Totais por produto (produtos nulos são ignorados, como no groupby do pandas)."""
+    grouped = cells.groupby("product").agg(
+        revenue=("total", "sum"),
+        quantity=("quantity", "sum"),
+        order_count=("count", "sum"),
+        price_sum=("price_sum", "sum"),
+        price_count=("price_count", "sum"),
+    )
+    grouped["avg_price"] = grouped["price_sum"] / grouped["price_count"]
+    return grouped.drop(columns=["price_sum", "price_count"])
+
+
+def by_period(cells: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Totais por período (freq do pandas: 'D', 'W', 'M', 'Y')."""
+    grouped = cells.groupby(cells["day"].dt.to_period(freq)).agg(
+        total_sales=("quantity", "sum"),
+        total_revenue=("total", "sum"),
+        order_count=("count", "sum"),
+        total_count=("total_count", "sum"),
+    )
+    grouped["avg_ticket"] = grouped["total_revenue"] / grouped["total_count"]
+    grouped.index.name = "period"
+    return grouped[["total_sales", "total_revenue", "avg_ticket", "order_count"]]
@@ -1,79 +1,156 @@
 from __future__ import annotations
 import os
+import json
+import base64
+import threading
+import time
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 from sqlalchemy import text
 from app.backend.db import engine
-from sklearn.linear_model import LinearRegression
-from scipy.stats import pearsonr
-import statsmodels.api as sm
 import logging
+from app.services.snapshot import SalesSnapshot
+from app.services.cache import QueryCache
+from app.services import gold
+from app.services.schema import apply_sales_schema, memory_report
+from app.services.cube import SalesCube, by_period, by_product
+from app.services.regression import RegressionFit, RegressionStats, grouped_pearson
+from app.services.timeseries import bucketize, labels_for, window_between, window_for_period
 
-_MODEL: LinearRegression | None = None
+_MODEL: RegressionFit | None = None
 
-# Cache para armazenar dados em memória
-_CACHED_DATA: Optional[pd.DataFrame] = None
-_LAST_UPDATE: Optional[datetime] = None
+# Snapshot imutável dos dados de vendas (sem filtros) mantido em memória
+_SNAPSHOT: Optional[SalesSnapshot] = None
 CACHE_TTL_MINUTES = 5  # Tempo em minutos para o cache expirar
 
+# Stale-while-revalidate: a partir de REFRESH_AHEAD_RATIO do TTL o snapshot é recarregado
+# em segundo plano e os leitores seguem com o anterior; só um snapshot mais velho que
+# TTL + CACHE_MAX_STALE_MINUTES faz a requisição esperar pela recarga
+REFRESH_AHEAD_RATIO = 0.8
+CACHE_MAX_STALE_MINUTES = 10
+# Depois de uma recarga que falhou, novas recargas em segundo plano esperam
+# REFRESH_RETRY_SECONDS; até lá os leitores seguem com o snapshot anterior
+REFRESH_RETRY_SECONDS = 60
+_REFRESH_FAILED_AT: Optional[float] = None
+# Single-flight: uma recarga por vez; quem chega durante a recarga espera e reaproveita
+_REFRESH_LOCK = threading.RLock()
+_REFRESH_THREAD: Optional[threading.Thread] = None
+_THREAD_LOCK = threading.Lock()
+_REFRESH_STATS: Dict[str, Any] = {
+    "refreshes": 0,
+    "refresh_errors": 0,
+    "last_refresh_seconds": None,
+    "last_refresh_at": None,
+    "last_refresh_incremental": None,
+}
+
+# Cache de consultas filtradas (chave = filtros normalizados)
+QUERY_CACHE_MAX_ENTRIES = 64
+QUERY_CACHE_MAX_MB = 256
+_QUERY_CACHE = QueryCache(
+    max_entries=QUERY_CACHE_MAX_ENTRIES,
+    max_bytes=QUERY_CACHE_MAX_MB * 1024 * 1024,
+    ttl_minutes=CACHE_TTL_MINUTES,
+)
+
+# Atualização incremental (ETL_SOURCE=postgres): ao expirar o TTL busca apenas as linhas
+# com updated_at/order_id acima da marca d'água do snapshot e as mescla em memória
+INCREMENTAL_REFRESH = os.getenv("SALES_INCREMENTAL_REFRESH", "1") != "0"
+RECONCILE_EVERY = 6  # a cada N atualizações incrementais confere COUNT/SUM(order_id) para achar exclusões
+_WATERMARK: Optional[Tuple[Optional[pd.Timestamp], int]] = None  # (maior updated_at, maior order_id)
+_REFRESHES_SINCE_RECONCILE = 0
+
+# Comparação de memória antes/depois do schema declarado, medida na última carga completa
+_MEMORY_REPORT: Optional[Dict[str, Any]] = None
+
+# Cubo pré-agregado (dia × produto × região) associado ao snapshot que o originou
+_CUBE: Optional[Tuple[SalesSnapshot, SalesCube]] = None
+_CUBE_COLUMNS = {'date', 'product', 'region', 'quantity', 'unit_price', 'total'}
+
+# Estatísticas suficientes das regressões, por (features, alvo), associadas ao snapshot
+# que as originou; atualizadas junto com o cubo quando só há inserções
+_REGRESSION: Optional[Tuple[SalesSnapshot, Dict[Tuple[Tuple[str, ...], str], RegressionStats]]] = None
+OLS_FEATURES = ("quantity", "unit_price")
+
+# Paginação por chave (keyset) no Postgres: colunas NOT NULL aceitas em sort_by, com
+# order_id como desempate. Índices: PK (order_id) e idx_sales_date_order_id (date, order_id)
+_KEYSET_COLUMNS = {
+    'order_id': 'order_id',
+    'date': 'date',
+    'region': 'region',
+    'product': 'product',
+    'quantity': 'quantity',
+    'unit_price': 'unit_price',
+    'total': 'COALESCE(total, quantity*unit_price)',
+}
+# COUNT(*) por combinação de filtros; as chaves vêm dos parâmetros do cliente, então o
+# cache é limitado (LRU) e as contagens expiram com o TTL do snapshot
+COUNT_CACHE_MAX_ENTRIES = 1024
+_COUNT_CACHE = QueryCache(max_entries=COUNT_CACHE_MAX_ENTRIES, ttl_minutes=CACHE_TTL_MINUTES)
+
+_ALL_PRODUCTS = ['todos os produtos', 'todos', 'all', 'all products', '']
+
 # TODO(refactor, 2025-09-18, consolidar validações de schema se dado crescer)
 
-def load_sales_df(use_cache: bool = True, start_date: str = None, end_date: str = None, product: str = None) -> pd.DataFrame:
-    """
-    Carrega os dados de vendas do banco de dados ou CSV, aplicando filtros opcionais.
+def _normalize_product(product: Optional[str]) -> Optional[str]:
+    """Converte os rótulos de "todos os produtos" em None e remove espaços do nome."""
+    if product is None:
+        return None
+    if str(product).strip().lower() in _ALL_PRODUCTS:
+        return None
+    return str(product).strip()
 
-    Args:
-        use_cache: Se True, usa os dados em cache se disponíveis e não expirados
-        start_date: Data inicial (YYYY-MM-DD)
-        end_date: Data final (YYYY-MM-DD)
-        product: Nome do produto para filtrar
+_SALES_SELECT = """
+    SELECT order_id, region, product, quantity, unit_price, COALESCE(total, quantity*unit_price) AS total, date,
+           customer_id, status, created_at, updated_at, notes, user_id, category, payment_method
+    FROM sales
+"""
 
-    Returns:
-        DataFrame com os dados de vendas filtrados
-    """
-    global _CACHED_DATA, _LAST_UPDATE
-    
-    # Sanitiza o parâmetro 'product' logo no início
+def _sql_param(value: Any) -> Any:
+    """Converte tipos do pandas/numpy para tipos nativos aceitos pelo driver."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _sales_where(start_date=None, end_date=None, product: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Cláusula WHERE parametrizada com os filtros de data (inclusivos) e produto."""
+    query = " WHERE 1=1"
+    params: Dict[str, Any] = {}
+    if start_date:
+        query += " AND date >= :start_date"
+        params['start_date'] = _sql_param(start_date)
+    if end_date:
+        query += " AND date <= :end_date"
+        params['end_date'] = _sql_param(end_date)
     if product:
-        product_sanitized = str(product).strip().lower()
-        if product_sanitized in ['todos os produtos', 'todos', 'all', 'all products', '']:
-            product = None
-        else:
-            product = product.strip()
-    logging.info(f"[DEBUG] Valor final do filtro de produto: {product}")  # TODO(copilot, 2025-09-22, debug filtro): Remover após validação
+        query += " AND product = :product"
+        params['product'] = product
+    return query, params
 
-    # Verifica se pode usar o cache
-    cache_applicable = not start_date and not end_date and (not product or str(product).strip().lower() in ['todos os produtos', 'todos', 'all', 'all products', ''])
-    if use_cache and _CACHED_DATA is not None and _LAST_UPDATE is not None:
-        cache_age = datetime.now() - _LAST_UPDATE
-        if cache_applicable and cache_age < timedelta(minutes=CACHE_TTL_MINUTES):
-            logging.info('[DEBUG] Usando cache de vendas (todos os produtos, sem datas)')
-            return _CACHED_DATA.copy()
+def _read_sales_source(
+    start_date: str = None, end_date: str = None, product: str = None, typed: bool = True
+) -> pd.DataFrame:
+    """
+    Lê os dados de vendas diretamente da fonte configurada (ETL_SOURCE: csv, postgres
+    ou gold), sem cache.
 
-    # Carrega os dados da fonte
+    Com typed=True aplica o schema declarado (categorias e inteiros reduzidos).
+    """
     source = os.getenv("ETL_SOURCE", "csv")
-    if source == "postgres":
-        query = """
-            SELECT order_id, region, product, quantity, unit_price, COALESCE(total, quantity*unit_price) AS total, date,
-                   customer_id, status, created_at, updated_at, notes, user_id, category, payment_method
-            FROM sales
-            WHERE 1=1
-        """
-        params = {}
-        if start_date:
-            query += " AND date >= :start_date"
-            params['start_date'] = start_date
-        if end_date:
-            query += " AND date <= :end_date"
-            params['end_date'] = end_date
-        if product and product.lower() != 'todos os produtos':
-            query += " AND product = :product"
-            params['product'] = product
-        query += " ORDER BY order_id"
+    if source == "gold":
+        df = read_gold_sales(start_date=start_date, end_date=end_date, product=product, typed=False)
+    elif source == "postgres":
+        where, params = _sales_where(start_date, end_date, product)
+        query = _SALES_SELECT + where + " ORDER BY order_id"
         with engine.connect() as conn:
             df = pd.read_sql(text(query), conn, params=params)
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
     else:
         csv_path = os.getenv("ETL_CSV_PATH", "data/sample_sales.csv")
         df = pd.read_csv(csv_path)
@@ -86,21 +163,621 @@ def load_sales_df(use_cache: bool = True, start_date: str = None, end_date: str
             df = df[df['date'] >= pd.to_datetime(start_date)]
         if end_date:
             df = df[df['date'] <= pd.to_datetime(end_date)]
-        if product and product.lower() != 'todos os produtos':
+        if product:
             df = df[df['product'] == product]
 
     # Garante que a coluna de data está no formato correto
     if 'date' not in df.columns:
         # Se não houver coluna de data, cria uma com a data atual
         df['date'] = pd.to_datetime('today')
-    
-    # Atualiza o cache apenas se não houver filtros
-    if cache_applicable:
-        _CACHED_DATA = df.copy()
-        _LAST_UPDATE = datetime.now()
+    return apply_sales_schema(df) if typed else df
+
+def read_gold_sales(
+    start_date: str = None,
+    end_date: str = None,
+    product: str = None,
+    columns: Optional[List[str]] = None,
+    typed: bool = True,
+) -> pd.DataFrame:
+    """
+    Lê vendas da camada gold (ETL_GOLD_PARQUET) com os filtros empurrados para o Parquet.
+
+    Partições de ano/mês fora do período não são abertas e row groups cujo min/max de
+    'date' (ou de 'product') não cruza o filtro são pulados; só o que sobra é lido.
+
+    Args:
+        start_date: Data inicial (YYYY-MM-DD)
+        end_date: Data final (YYYY-MM-DD), inclusiva como em _read_sales_source
+        product: Nome do produto para filtrar
+        columns: Subconjunto de colunas a ler (padrão: todas)
+        typed: Se True, aplica o schema declarado
+
+    Returns:
+        DataFrame com as vendas filtradas
+    """
+    df = gold.read_gold(
+        start=pd.to_datetime(start_date) if start_date else None,
+        end=pd.to_datetime(end_date) if end_date else None,
+        product=product,
+        columns=columns,
+    )
+    return apply_sales_schema(df) if typed else df
+
+def _watermark_of(frame: pd.DataFrame) -> Tuple[Optional[pd.Timestamp], int]:
+    """Maior updated_at e maior order_id presentes no DataFrame."""
+    updated = pd.to_datetime(frame['updated_at']).max() if 'updated_at' in frame.columns else None
+    last_id = int(frame['order_id'].max()) if len(frame) else 0
+    return (updated if pd.notnull(updated) else None), last_id
+
+def _fetch_changed_sales(since: Optional[pd.Timestamp], last_id: int) -> pd.DataFrame:
+    """
+    Linhas inseridas (order_id > last_id) ou alteradas (updated_at >= since) na fonte.
+
+    A comparação ``>=`` relê as linhas do último instante conhecido; como a mesclagem é
+    por order_id, reler é inofensivo e evita perder linhas gravadas no mesmo timestamp.
+    """
+    query = _SALES_SELECT + " WHERE order_id > :last_id"
+    params: Dict[str, Any] = {'last_id': int(last_id)}
+    if since is not None:
+        query += " OR updated_at >= :since"
+        params['since'] = _sql_param(since)
+    with engine.connect() as conn:
+        df = pd.read_sql(text(query + " ORDER BY order_id"), conn, params=params)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _source_checksum() -> Tuple[int, int]:
+    """COUNT(*) e SUM(order_id) da tabela, usados para detectar exclusões."""
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT COUNT(*), COALESCE(SUM(order_id), 0) FROM sales")).one()
+    return int(row[0]), int(row[1])
+
+def _refresh_incremental(snapshot: SalesSnapshot) -> SalesSnapshot:
+    """
+    Atualiza o snapshot com as mudanças desde a marca d'água, sem reler a tabela inteira.
+
+    Inserções puras atualizam o cubo incrementalmente; alterações de linhas existentes
+    fazem o cubo ser reconstruído sob demanda. A cada RECONCILE_EVERY atualizações a
+    contagem e a soma dos order_id são comparadas com a fonte e, se divergirem, apenas a
+    coluna order_id é relida para remover as linhas excluídas.
+    """
+    global _WATERMARK, _REFRESHES_SINCE_RECONCILE, _CUBE
+    since, last_id = _WATERMARK if _WATERMARK is not None else _watermark_of(snapshot.frame)
+    changed = _fetch_changed_sales(since, last_id)
+    frame = snapshot.frame
+    if since is not None and len(changed):
+        # Descarta as linhas relidas do último instante que não mudaram
+        current = pd.Series(pd.to_datetime(frame['updated_at']).to_numpy(), index=frame['order_id'])
+        previous = changed['order_id'].map(current)
+        changed = changed[~(pd.to_datetime(changed['updated_at']) == previous).to_numpy()]
+    known = frame['order_id'].isin(changed['order_id']).to_numpy()
+    cube = _CUBE[1] if _CUBE is not None and _CUBE[0] is snapshot else None
+
+    _REFRESHES_SINCE_RECONCILE += 1
+    deleted = np.zeros(len(frame), dtype=bool)
+    if _REFRESHES_SINCE_RECONCILE >= RECONCILE_EVERY:
+        _REFRESHES_SINCE_RECONCILE = 0
+        ids = frame['order_id'][~known]
+        expected = (len(ids) + len(changed), int(ids.sum()) + int(changed['order_id'].sum()))
+        if _source_checksum() != expected:
+            with engine.connect() as conn:
+                live = pd.read_sql(text("SELECT order_id FROM sales"), conn)['order_id']
+            deleted = ~frame['order_id'].isin(live).to_numpy()
+
+    if changed.empty and not deleted.any():
+        refreshed = SalesSnapshot(
+            frame=frame, loaded_at=datetime.now(), nbytes=snapshot.nbytes, days=snapshot.days
+        )
+        if cube is not None:
+            _CUBE = (refreshed, cube)
+        _carry_regression(snapshot, refreshed)
+        return refreshed
+
+    kept = frame[~(known | deleted)]
+    parts = [part for part in (kept, changed) if len(part)] or [kept]
+    refreshed = SalesSnapshot.from_frame(apply_sales_schema(pd.concat(parts, ignore_index=True)))
+    if not known.any() and not deleted.any():
+        if cube is not None:
+            _CUBE = (refreshed, cube.add(changed))
+        _carry_regression(snapshot, refreshed, changed)
+    new_since, new_id = _watermark_of(changed)
+    if since is not None and (new_since is None or new_since < since):
+        new_since = since
+    _WATERMARK = (new_since, max(last_id, new_id))
+    _QUERY_CACHE.clear()
+    return refreshed
+
+def _load_snapshot(previous: Optional[SalesSnapshot]) -> SalesSnapshot:
+    """
+    Lê um snapshot novo da fonte e o publica.
+
+    Com ETL_SOURCE=postgres e INCREMENTAL_REFRESH ativo, ``previous`` é atualizado apenas
+    com as linhas alteradas desde a última leitura; sem ele, relê a tabela inteira.
+    """
+    global _SNAPSHOT, _WATERMARK, _REFRESHES_SINCE_RECONCILE, _MEMORY_REPORT
+    if (
+        previous is not None and INCREMENTAL_REFRESH
+        and os.getenv("ETL_SOURCE", "csv") == "postgres"
+        and {'order_id', 'updated_at'}.issubset(previous.frame.columns)
+    ):
+        try:
+            _SNAPSHOT = _refresh_incremental(previous)
+            _REFRESH_STATS["last_refresh_incremental"] = True
+            return _SNAPSHOT
+        except Exception as e:
+            logging.warning(f"[get_sales_snapshot] Atualização incremental falhou, recarregando tudo: {e}")
+    raw = _read_sales_source(typed=False)
+    typed = apply_sales_schema(raw)
+    _MEMORY_REPORT = memory_report(raw, typed)
+    snapshot = SalesSnapshot.from_frame(typed)
+    _SNAPSHOT = snapshot
+    _WATERMARK = _watermark_of(snapshot.frame) if 'order_id' in snapshot.frame.columns else None
+    _REFRESHES_SINCE_RECONCILE = 0
+    _REFRESH_STATS["last_refresh_incremental"] = False
+    # Resultados filtrados derivados do snapshot anterior deixam de valer
+    _QUERY_CACHE.clear()
+    return snapshot
+
+def _refresh_snapshot(previous: Optional[SalesSnapshot], incremental: bool = True) -> SalesSnapshot:
+    """
+    Recarrega o snapshot com single-flight: se outra thread já o substituiu enquanto esta
+    esperava pelo lock, devolve o resultado dela sem consultar a fonte de novo.
+    """
+    global _REFRESH_FAILED_AT
+    with _REFRESH_LOCK:
+        current = _SNAPSHOT
+        if current is not None and current is not previous:
+            return current
+        started = time.perf_counter()
+        try:
+            snapshot = _load_snapshot(previous if incremental else None)
+        except Exception:
+            _REFRESH_FAILED_AT = time.monotonic()
+            _REFRESH_STATS["refresh_errors"] += 1
+            raise
+        _REFRESH_FAILED_AT = None
+        _REFRESH_STATS["refreshes"] += 1
+        _REFRESH_STATS["last_refresh_seconds"] = time.perf_counter() - started
+        _REFRESH_STATS["last_refresh_at"] = datetime.now()
+        return snapshot
+
+def _background_refresh(previous: SalesSnapshot) -> None:
+    try:
+        _refresh_snapshot(previous)
+    except Exception as e:
+        logging.error(f"[get_sales_snapshot] Recarga em segundo plano falhou: {e}")
+
+def _start_background_refresh(previous: SalesSnapshot) -> None:
+    """
+    Dispara a recarga em segundo plano, a menos que uma já esteja em andamento ou que a
+    última tenha falhado há menos de REFRESH_RETRY_SECONDS.
+    """
+    global _REFRESH_THREAD
+    failed_at = _REFRESH_FAILED_AT
+    if failed_at is not None and time.monotonic() - failed_at < REFRESH_RETRY_SECONDS:
+        return
+    with _THREAD_LOCK:
+        if _REFRESH_THREAD is not None and _REFRESH_THREAD.is_alive():
+            return
+        _REFRESH_THREAD = threading.Thread(
+            target=_background_refresh, args=(previous,), name="sales-snapshot-refresh", daemon=True
+        )
+        _REFRESH_THREAD.start()
+
+def wait_for_refresh(timeout: Optional[float] = None) -> None:
+    """Aguarda a recarga em segundo plano em andamento, se houver."""
+    thread = _REFRESH_THREAD
+    if thread is not None:
+        thread.join(timeout)
+
+def get_sales_snapshot(use_cache: bool = True) -> SalesSnapshot:
+    """
+    Retorna o snapshot imutável da tabela de vendas completa.
+
+    Segue stale-while-revalidate: a partir de REFRESH_AHEAD_RATIO × CACHE_TTL_MINUTES
+    dispara uma recarga em segundo plano e devolve o snapshot atual sem esperar. A
+    chamada só bloqueia quando não há snapshot, quando ele passou do TTL em mais de
+    CACHE_MAX_STALE_MINUTES ou com use_cache=False (recarga completa); nesses casos as
+    requisições concorrentes compartilham uma única leitura da fonte.
+    """
+    snapshot = _SNAPSHOT
+    if snapshot is None or not use_cache:
+        return _refresh_snapshot(snapshot, incremental=use_cache)
+    age = snapshot.age()
+    ttl = timedelta(minutes=CACHE_TTL_MINUTES)
+    if age >= ttl + timedelta(minutes=CACHE_MAX_STALE_MINUTES):
+        return _refresh_snapshot(snapshot)
+    if age >= ttl * REFRESH_AHEAD_RATIO:
+        _start_background_refresh(snapshot)
+    return snapshot
+
+def clear_sales_cache() -> None:
+    """Descarta o snapshot e as consultas em memória; a próxima leitura recarrega da fonte."""
+    global _SNAPSHOT, _WATERMARK, _REFRESH_FAILED_AT
+    wait_for_refresh()
+    _SNAPSHOT = None
+    _WATERMARK = None
+    _REFRESH_FAILED_AT = None
+    _QUERY_CACHE.clear()
+    _COUNT_CACHE.clear()
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Contadores do cache de consultas filtradas e idade do snapshot base."""
+    snapshot = _SNAPSHOT
+    stats = _QUERY_CACHE.stats()
+    stats["snapshot_rows"] = len(snapshot) if snapshot is not None else 0
+    stats["snapshot_age_seconds"] = snapshot.age().total_seconds() if snapshot is not None else None
+    # Quanto o snapshot servido já passou do TTL (0 enquanto estiver dentro do prazo)
+    stats["snapshot_staleness_seconds"] = (
+        max(0.0, snapshot.age().total_seconds() - CACHE_TTL_MINUTES * 60) if snapshot is not None else None
+    )
+    stats["refresh_in_progress"] = _REFRESH_THREAD is not None and _REFRESH_THREAD.is_alive()
+    stats.update(_REFRESH_STATS)
+    return stats
+
+def get_memory_report() -> Optional[Dict[str, Any]]:
+    """Memória do DataFrame de vendas antes e depois do schema declarado (None antes da 1ª carga)."""
+    return _MEMORY_REPORT
+
+def get_sales_cube(use_cache: bool = True) -> SalesCube:
+    """
+    Cubo dia × produto × região do snapshot atual, construído uma única vez por recarga.
+    """
+    global _CUBE
+    snapshot = get_sales_snapshot(use_cache=use_cache)
+    current = _CUBE
+    if current is not None and current[0] is snapshot:
+        return current[1]
+    cube = SalesCube.build(snapshot.frame)
+    _CUBE = (snapshot, cube)
+    return cube
+
+def _carry_regression(previous: SalesSnapshot, current: SalesSnapshot, rows: Optional[pd.DataFrame] = None) -> None:
+    """Leva as estatísticas de regressão de ``previous`` para ``current``, somando ``rows``."""
+    global _REGRESSION
+    entry = _REGRESSION
+    if entry is None or entry[0] is not previous:
+        return
+    stats = entry[1]
+    if rows is not None and len(rows):
+        stats = {key: value.add(rows) for key, value in stats.items()}
+    _REGRESSION = (current, stats)
+
+def get_regression_stats(features: Tuple[str, ...] = OLS_FEATURES, target: str = "total") -> RegressionStats:
+    """
+    Estatísticas suficientes de ``target ~ features`` no snapshot atual.
+
+    Calculadas uma vez por snapshot (uma passada pelos dados) e atualizadas
+    incrementalmente por append_sales e pelas atualizações incrementais só de inserção.
+    """
+    global _REGRESSION
+    features = tuple(features)
+    snapshot = get_sales_snapshot()
+    entry = _REGRESSION
+    if entry is None or entry[0] is not snapshot:
+        entry = (snapshot, {})
+    stats = entry[1].get((features, target))
+    if stats is None:
+        stats = RegressionStats.from_frame(snapshot.frame, features, target)
+        entry = (snapshot, {**entry[1], (features, target): stats})
+    _REGRESSION = entry
+    return stats
+
+def append_sales(rows: pd.DataFrame) -> int:
+    """
+    Acrescenta vendas novas ao snapshot em memória e atualiza o cubo incrementalmente,
+    sem recarregar a fonte.
+
+    Args:
+        rows: Novas linhas com o mesmo schema da tabela sales
+
+    Returns:
+        Número de linhas do snapshot após a inclusão
+    """
+    global _SNAPSHOT, _CUBE
+    # Mesmo lock das recargas: uma recarga concorrente não descarta as linhas novas
+    with _REFRESH_LOCK:
+        snapshot = get_sales_snapshot()
+        if rows.empty:
+            return len(snapshot)
+        cube = get_sales_cube()
+        rows = rows.copy()
+        rows['date'] = pd.to_datetime(rows['date'])
+        if 'total' not in rows.columns:
+            rows['total'] = rows['quantity'] * rows['unit_price']
+        merged = SalesSnapshot.from_frame(
+            apply_sales_schema(pd.concat([snapshot.frame, rows], ignore_index=True)),
+            loaded_at=snapshot.loaded_at
+        )
+        _SNAPSHOT = merged
+        _CUBE = (merged, cube.add(rows))
+        _carry_regression(snapshot, merged, rows)
+        _QUERY_CACHE.clear()
+        return len(merged)
+
+@lru_cache(maxsize=1024)
+def _parse_date(value: str) -> pd.Timestamp:
+    """Converte a string de data da query uma única vez (cache por valor)."""
+    return pd.to_datetime(value)
+
+def _as_timestamp(value: Optional[Union[str, datetime]]) -> Optional[pd.Timestamp]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return _parse_date(value)
+    return pd.Timestamp(value)
+
+def _filter_key(start_date: Optional[str], end_date: Optional[str], product: Optional[str]) -> Tuple:
+    """Chave normalizada dos filtros: datas equivalentes ('2025-8-1', '2025-08-01') coincidem."""
+    return (_as_timestamp(start_date), _as_timestamp(end_date), product)
+
+def _filter_snapshot(snapshot: SalesSnapshot, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp], product: Optional[str]) -> pd.DataFrame:
+    """Aplica em memória os mesmos filtros que _read_sales_source aplica na fonte."""
+    df = snapshot.between(start, end)
+    if product:
+        df = df[df['product'] == product]
+    return df
+
+def load_sales_df(
+    use_cache: bool = True,
+    start_date: str = None,
+    end_date: str = None,
+    product: str = None,
+    copy: bool = False,
+) -> pd.DataFrame:
+    """
+    Carrega os dados de vendas do banco de dados ou CSV, aplicando filtros opcionais.
+
+    Sem filtros, devolve uma visão zero-copy do snapshot em cache: colunas podem ser
+    adicionadas ou substituídas na visão, mas escritas in-place nos valores falham.
+    Consultas filtradas ficam num cache LRU próprio (ver get_cache_stats) e, quando o
+    snapshot completo já está em memória, são calculadas a partir dele.
+
+    Args:
+        use_cache: Se True, usa os dados em cache se disponíveis e não expirados
+        start_date: Data inicial (YYYY-MM-DD)
+        end_date: Data final (YYYY-MM-DD)
+        product: Nome do produto para filtrar
+        copy: Se True, devolve uma cópia gravável (copy-on-write explícito)
+
+    Returns:
+        DataFrame com os dados de vendas filtrados
+    """
+    # Sanitiza o parâmetro 'product' logo no início
+    product = _normalize_product(product)
+    logging.info(f"[DEBUG] Valor final do filtro de produto: {product}")  # TODO(copilot, 2025-09-22, debug filtro): Remover após validação
+
+    # Sem filtros, serve a partir do snapshot compartilhado
+    if not start_date and not end_date and not product:
+        snapshot = get_sales_snapshot(use_cache=use_cache)
+        return snapshot.mutable() if copy else snapshot.view()
+
+    # Com filtros, consulta o cache de resultados; na falta, filtra o snapshot em memória
+    # (se ainda válido) e só então recorre à fonte
+    key = _filter_key(start_date, end_date, product)
+    cached = _QUERY_CACHE.get(key) if use_cache else None
+    if cached is None:
+        base = _SNAPSHOT
+        if use_cache and base is not None and base.age() < timedelta(minutes=CACHE_TTL_MINUTES):
+            df = _filter_snapshot(base, *key)
+        else:
+            df = _read_sales_source(start_date=start_date, end_date=end_date, product=product)
+        cached = SalesSnapshot.from_frame(df)
+        _QUERY_CACHE.put(key, cached)
+    return cached.mutable() if copy else cached.view()
+
+def _encode_cursor(sort_by: str, value: Any, order_id: Any) -> str:
+    """Token opaco com a chave da última linha da página (coluna, valor, order_id)."""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        value = value.isoformat()
+    elif isinstance(value, np.generic):
+        value = value.item()
+    payload = json.dumps([sort_by, value, int(order_id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def _decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    try:
+        column, value, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("cursor inválido")
+    if column != sort_by:
+        raise ValueError(f"cursor gerado para sort_by={column}, não {sort_by}")
+    if sort_by == 'date':
+        value = pd.Timestamp(value)
+    return value, int(order_id)
+
+def cached_count(start, end, product: Optional[str]) -> Optional[int]:
+    """COUNT(*) guardado para os filtros, se ainda dentro de CACHE_TTL_MINUTES."""
+    return _COUNT_CACHE.get((start, end, product))
+
+def remember_count(start, end, product: Optional[str], total: int) -> None:
+    """Guarda o COUNT(*) dos filtros (usado pelos caminhos síncrono e assíncrono)."""
+    _COUNT_CACHE.put((start, end, product), total, size=0)
+
+def _count_query(start, end, product: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    where, params = _sales_where(start, end, product)
+    return "SELECT COUNT(*) FROM sales" + where, params
+
+def _count_sales_sql(start, end, product: Optional[str]) -> int:
+    """COUNT(*) dos filtros no Postgres, reaproveitado por CACHE_TTL_MINUTES."""
+    total = cached_count(start, end, product)
+    if total is not None:
+        return total
+    query, params = _count_query(start, end, product)
+    with engine.connect() as conn:
+        total = int(conn.execute(text(query), params).scalar())
+    remember_count(start, end, product, total)
+    return total
+
+def _sales_page_query(start, end, product, sort_by, ascending, limit, offset, cursor) -> Tuple[str, Dict[str, Any]]:
+    """SELECT parametrizado de uma página (keyset quando há cursor, OFFSET caso contrário)."""
+    expr = _KEYSET_COLUMNS[sort_by]
+    direction = "ASC" if ascending else "DESC"
+    op = ">" if ascending else "<"
+    where, params = _sales_where(start, end, product)
+    if cursor:
+        # Seek: continua a partir da última chave vista, sem OFFSET
+        value, last_id = _decode_cursor(cursor, sort_by)
+        if sort_by == 'order_id':
+            where += f" AND order_id {op} :cursor_id"
+        else:
+            where += f" AND ({expr}, order_id) {op} (:cursor_value, :cursor_id)"
+            params['cursor_value'] = _sql_param(value)
+        params['cursor_id'] = last_id
+        offset = 0
+    order = f"order_id {direction}" if sort_by == 'order_id' else f"{expr} {direction}, order_id {direction}"
+    query = _SALES_SELECT + where + f" ORDER BY {order} LIMIT :limit OFFSET :offset"
+    params.update(limit=limit, offset=offset)
+    return query, params
 
+def _typed_page(df: pd.DataFrame) -> pd.DataFrame:
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
     return df
 
+def _fetch_sales_page_sql(start, end, product, sort_by, ascending, limit, offset, cursor) -> pd.DataFrame:
+    query, params = _sales_page_query(start, end, product, sort_by, ascending, limit, offset, cursor)
+    with engine.connect() as conn:
+        df = pd.read_sql(text(query), conn, params=params)
+    return _typed_page(df)
+
+def _fetch_sales_page_memory(start, end, product, sort_by, ascending, limit, offset, cursor) -> Tuple[pd.DataFrame, int]:
+    df = load_sales_df(start_date=start, end_date=end, product=product)
+    if sort_by not in df.columns:
+        raise ValueError(f"sort_by inválido: {sort_by}")
+    total = len(df)
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_by)
+        col = df[sort_by]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = col.astype(object)  # categorias não aceitam < e > com valores avulsos
+        ids = df['order_id']
+        if ascending:
+            after = (col > value) | ((col == value) & (ids > last_id))
+        else:
+            after = (col < value) | ((col == value) & (ids < last_id))
+        df = df[after]
+        offset = 0
+    keys = ['order_id'] if sort_by == 'order_id' else [sort_by, 'order_id']
+    df = df.sort_values(keys, ascending=ascending, kind='stable')
+    return df.iloc[offset:offset + limit], total
+
+def fetch_sales_page(
+    start_date: Optional[Union[str, datetime]] = None,
+    end_date: Optional[Union[str, datetime]] = None,
+    product: Optional[str] = None,
+    sort_by: str = "order_id",
+    sort_order: str = "asc",
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[pd.DataFrame, int, Optional[str]]:
+    """
+    Uma página de vendas ordenada, com o total de registros dos filtros.
+
+    Com ETL_SOURCE=postgres, ORDER BY e LIMIT vão para o SQL e o total vem de um
+    COUNT(*) em cache. Passando o ``cursor`` devolvido pela página anterior, a consulta
+    usa paginação por chave (seek) em vez de OFFSET, então páginas profundas custam o
+    mesmo que a primeira. Sem Postgres, a página é recortada do cache em memória.
+
+    Args:
+        start_date: Data inicial (inclusiva)
+        end_date: Data final (inclusiva)
+        product: Nome do produto para filtrar
+        sort_by: Campo para ordenação (order_id é usado como desempate)
+        sort_order: Direção da ordenação ('asc' ou 'desc')
+        limit: Tamanho da página
+        offset: Registros a pular (ignorado quando há cursor)
+        cursor: Token next_cursor da página anterior
+
+    Returns:
+        Tupla com (página, total de registros, cursor da próxima página ou None)
+    """
+    start = _as_timestamp(start_date)
+    end = _as_timestamp(end_date)
+    product = _normalize_product(product)
+    ascending = sort_order.lower() == "asc"
+    if os.getenv("ETL_SOURCE", "csv") == "postgres":
+        if sort_by not in _KEYSET_COLUMNS:
+            raise ValueError(f"sort_by inválido: {sort_by}")
+        page = _fetch_sales_page_sql(start, end, product, sort_by, ascending, limit, offset, cursor)
+        total = _count_sales_sql(start, end, product)
+    else:
+        page, total = _fetch_sales_page_memory(start, end, product, sort_by, ascending, limit, offset, cursor)
+    return page, total, _next_cursor(page, sort_by, limit)
+
+def _next_cursor(page: pd.DataFrame, sort_by: str, limit: int) -> Optional[str]:
+    """Cursor da página seguinte (None quando a página veio incompleta)."""
+    if len(page) < limit or page.empty:
+        return None
+    last = page.iloc[-1]
+    return _encode_cursor(sort_by, last[sort_by], last['order_id'])
+
+def _empty_summary() -> Dict[str, Any]:
+    return {
+        "total_revenue": 0.0,
+        "total_quantity": 0,
+        "avg_ticket": 0.0,
+        "top_products": [],
+        "regions": [],
+        "sales_count": 0,
+        "avg_quantity": 0.0,
+        "unique_products": 0,
+        "start_date": None,
+        "end_date": None,
+    }
+
+def period_bounds(
+    start_date: Optional[Union[str, datetime]], end_date: Optional[Union[str, datetime]]
+) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """Converte os limites do período; o final avança um dia para incluir o dia inteiro."""
+    start = _as_timestamp(start_date)
+    end = _as_timestamp(end_date)
+    if end is not None:
+        end = end + timedelta(days=1)
+    return start, end
+
+def summarize_sales(start_date: str = None, end_date: str = None, product: str = None) -> Dict[str, Any]:
+    """
+    Mesmas métricas de compute_summary(load_sales_df(...)), respondidas pelo cubo
+    pré-agregado em vez de percorrer as linhas.
+
+    Args:
+        start_date: Data inicial (YYYY-MM-DD)
+        end_date: Data final (YYYY-MM-DD)
+        product: Nome do produto para filtrar
+
+    Returns:
+        Dicionário com as métricas calculadas
+    """
+    product = _normalize_product(product)
+    if not _CUBE_COLUMNS.issubset(get_sales_snapshot().frame.columns):
+        return compute_summary(load_sales_df(start_date=start_date, end_date=end_date, product=product))
+    start, end, _ = _filter_key(start_date, end_date, product)
+    cells = get_sales_cube().slice(start, end, product)
+    if cells.empty:
+        return _empty_summary()
+    total_revenue = float(cells["total"].sum())
+    total_quantity = int(cells["quantity"].sum())
+    sales_count = int(cells["count"].sum())
+    # Pedidos sem total ficam fora da média, como em df["total"].mean()
+    total_count = int(cells["total_count"].sum())
+    product_sales = cells.groupby("product")["total"].sum()
+    first_day = cells["day"].min()
+    last_day = cells["day"].max()
+    return {
+        "total_revenue": total_revenue,
+        "total_quantity": total_quantity,
+        "avg_ticket": total_revenue / total_count if total_count else float("nan"),
+        "top_products": product_sales.nlargest(5).index.tolist(),
+        "regions": sorted(cells["region"].dropna().unique().tolist()),
+        "sales_count": sales_count,
+        "avg_quantity": total_quantity / sales_count,
+        "unique_products": len(product_sales),
+        "start_date": first_day.strftime("%Y-%m-%d") if pd.notnull(first_day) else None,
+        "end_date": last_day.strftime("%Y-%m-%d") if pd.notnull(last_day) else None,
+    }
+
 def compute_summary(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Calcula métricas de resumo para os dados de vendas.
@@ -120,31 +797,9 @@ def compute_summary(df: pd.DataFrame) -> Dict[str, Any]:
     # Se faltar qualquer coluna crítica, retorna métricas zeradas
     if 'total' not in df.columns or missing_cols:
         logging.warning(f"[compute_summary] Missing columns: {['total'] if 'total' not in df.columns else []} + {missing_cols} — returning zeroed metrics.")
-        return {
-            "total_revenue": 0.0,
-            "total_quantity": 0,
-            "avg_ticket": 0.0,
-            "top_products": [],
-            "regions": [],
-            "sales_count": 0,
-            "avg_quantity": 0.0,
-            "unique_products": 0,
-            "start_date": None,
-            "end_date": None,
-        }
+        return _empty_summary()
     if df.empty:
-        return {
-            "total_revenue": 0.0,
-            "total_quantity": 0,
-            "avg_ticket": 0.0,
-            "top_products": [],
-            "regions": [],
-            "sales_count": 0,
-            "avg_quantity": 0.0,
-            "unique_products": 0,
-            "start_date": None,
-            "end_date": None,
-        }
+        return _empty_summary()
     # Métricas básicas
     total_revenue = float(df["total"].sum()) if "total" in df.columns else 0.0
     total_quantity = int(df["quantity"].sum()) if "quantity" in df.columns else 0
@@ -153,7 +808,7 @@ def compute_summary(df: pd.DataFrame) -> Dict[str, Any]:
     avg_quantity = float(df["quantity"].mean()) if "quantity" in df.columns else 0.0
     # Top produtos por receita
     if "product" in df.columns and "total" in df.columns:
-        product_sales = df.groupby("product")["total"].sum()
+        product_sales = df.groupby("product", observed=True)["total"].sum()
         top_products = product_sales.nlargest(5).index.tolist()
         unique_products = len(product_sales)
     else:
@@ -222,31 +877,13 @@ def get_sales_data(
     Returns:
         Tupla com (DataFrame com os dados filtrados, total de registros)
     """
-    # Carrega os dados
-    df = load_sales_df()
+    # Recorta o período por busca binária no snapshot ordenado por data
+    start, end = period_bounds(start_date, end_date)
+    df = get_sales_snapshot().between(start, end)
     
-    # Aplica filtros
-    if start_date is not None:
-        if isinstance(start_date, str):
-            start_date = pd.to_datetime(start_date)
-        df = df[df["date"] >= start_date]
-    
-    if end_date is not None:
-        if isinstance(end_date, str):
-            end_date = pd.to_datetime(end_date)
-        # Inclui todo o dia final
-        end_date = end_date + timedelta(days=1)
-        df = df[df["date"] <= end_date]
-    
-    # Sanitiza o parâmetro 'product'
-    if product:
-        product_sanitized = str(product).strip().lower()
-        if product_sanitized in ['todos os produtos', 'todos', 'all', 'all products', '']:
-            product = None
-        else:
-            product = product.strip()
     # Aplica filtro SOMENTE se product for válido
-    if product is not None and product != '':
+    product = _normalize_product(product)
+    if product is not None:
         df = df[df["product"] == product]
     
     if region is not None and "region" in df.columns:
@@ -298,51 +935,63 @@ def get_sales_by_period(
     Returns:
         DataFrame com as vendas agrupadas por período
     """
-    # Carrega os dados
-    df = load_sales_df()
-    
-    # Aplica filtros
-    if start_date is not None:
-        if isinstance(start_date, str):
-            start_date = pd.to_datetime(start_date)
-        df = df[df["date"] >= start_date]
-    
-    if end_date is not None:
-        if isinstance(end_date, str):
-            end_date = pd.to_datetime(end_date)
-        # Inclui todo o dia final
-        end_date = end_date + timedelta(days=1)
-        df = df[df["date"] <= end_date]
-    
-    # Sanitiza o parâmetro 'product'
-    if product:
-        product_sanitized = str(product).strip().lower()
-        if product_sanitized in ['todos os produtos', 'todos', 'all', 'all products', '']:
-            product = None
-    # Aplica filtro SOMENTE se product for válido
-    if product is not None and product != '':
-        df = df[df["product"] == product]
+    # Responde a partir do cubo pré-agregado (custo proporcional ao número de grupos)
+    start, end = period_bounds(start_date, end_date)
+    cells = get_sales_cube().slice(start, end, _normalize_product(product))
     
-    if df.empty:
+    if cells.empty:
         return pd.DataFrame(columns=['period', 'total_sales', 'total_revenue', 'avg_ticket'])
     
-    # Agrupa por período
-    df = df.copy()
-    df['period'] = df['date'].dt.to_period(period[0].upper())
-    
-    # Agrega os dados
-    result = df.groupby('period').agg(
-        total_sales=('quantity', 'sum'),
-        total_revenue=('total', 'sum'),
-        avg_ticket=('total', 'mean'),
-        order_count=('order_id', 'count')
-    ).reset_index()
+    # Agrega os dados por período
+    result = by_period(cells, period[0].upper()).reset_index()
     
     # Converte o período para string
     result['period'] = result['period'].astype(str)
     
     return result
 
+def get_revenue_series(
+    period: str = 'month',
+    product: Optional[str] = None,
+    start_date: Optional[Union[str, datetime]] = None,
+    end_date: Optional[Union[str, datetime]] = None,
+    bucket: str = 'day',
+    now: Optional[datetime] = None
+) -> Dict[str, List[Any]]:
+    """
+    Série de receita por bucket de tempo para o gráfico do dashboard.
+    
+    Os totais diários do cubo (cacheados por produto) são distribuídos nos buckets da
+    janela numa única passada, sem varrer os pedidos nem alterar o snapshot.
+    
+    Args:
+        period: 'week', 'month', 'year' ou período arbitrário ('90d', '8w', '24m')
+        product: Nome do produto para filtrar
+        start_date: Início de uma janela customizada (substitui ``period``)
+        end_date: Fim de uma janela customizada (padrão: hoje)
+        bucket: Tamanho do bucket da janela customizada ('day', 'week', 'month')
+        now: Data de referência (padrão: agora)
+        
+    Returns:
+        Dicionário com 'labels' e 'data'
+    """
+    now = pd.Timestamp(now or datetime.now())
+    if start_date or end_date:
+        end = _as_timestamp(end_date) or now
+        start = _as_timestamp(start_date) or end - timedelta(days=29)
+        window, label_fmt = window_between(start, end, bucket), None
+    else:
+        window, label_fmt = window_for_period(period, now)
+    
+    days, totals = get_sales_cube().daily_totals(product or None)
+    data = bucketize(days, totals, window)
+    labels = labels_for(window, label_fmt)
+    if period == 'month' and not (start_date or end_date):
+        # Rótulo a cada 5 dias, contando a partir de hoje
+        labels = [label if (len(labels) - 1 - i) % 5 == 0 else '' for i, label in enumerate(labels)]
+    
+    return {'labels': labels, 'data': data.tolist()}
+
 def get_top_products(
     n: int = 5,
     by: str = 'revenue',  # 'revenue' ou 'quantity'
@@ -363,35 +1012,29 @@ def get_top_products(
     Returns:
         DataFrame com os produtos mais vendidos
     """
-    # Carrega os dados
-    df = load_sales_df()
-    
-    # Aplica filtros
-    if start_date is not None:
-        if isinstance(start_date, str):
-            start_date = pd.to_datetime(start_date)
-        df = df[df["date"] >= start_date]
+    start, end = period_bounds(start_date, end_date)
     
-    if end_date is not None:
-        if isinstance(end_date, str):
-            end_date = pd.to_datetime(end_date)
-        # Inclui todo o dia final
-        end_date = end_date + timedelta(days=1)
-        df = df[df["date"] <= end_date]
-    
-    if min_quantity is not None:
+    if min_quantity is None:
+        # Sem filtro por linha, o cubo pré-agregado responde sem varrer os pedidos
+        cells = get_sales_cube().slice(start, end)
+        if cells.empty:
+            return pd.DataFrame(columns=['product', 'revenue', 'quantity', 'order_count'])
+        result = by_product(cells).reset_index()
+    else:
+        # Recorta o período no snapshot ordenado e filtra as linhas
+        df = get_sales_snapshot().between(start, end)
         df = df[df["quantity"] >= min_quantity]
-    
-    if df.empty:
-        return pd.DataFrame(columns=['product', 'revenue', 'quantity', 'order_count'])
-    
-    # Agrupa por produto
-    result = df.groupby('product').agg(
-        revenue=('total', 'sum'),
-        quantity=('quantity', 'sum'),
-        order_count=('order_id', 'count'),
-        avg_price=('unit_price', 'mean')
-    ).reset_index()
+        
+        if df.empty:
+            return pd.DataFrame(columns=['product', 'revenue', 'quantity', 'order_count'])
+        
+        # Agrupa por produto
+        result = df.groupby('product', observed=True).agg(
+            revenue=('total', 'sum'),
+            quantity=('quantity', 'sum'),
+            order_count=('order_id', 'count'),
+            avg_price=('unit_price', 'mean')
+        ).reset_index()
     
     # Ordena pelo critério especificado
     sort_by = 'revenue' if by == 'revenue' else 'quantity'
@@ -399,50 +1042,97 @@ def get_top_products(
     
     return result
 
-def compute_pearson(df: pd.DataFrame) -> Dict[str, float]:
+PEARSON_GROUPS = ("product", "region", "category")
+
+def compute_pearson(df: Optional[pd.DataFrame] = None) -> Dict[str, float]:
     """
     Calcula a correlação de Pearson entre quantidade e preço unitário.
-    
+
+    Sem ``df``, lê os co-momentos acumulados do snapshot atual (atualizados
+    incrementalmente junto com a regressão), sem percorrer as colunas de novo.
+
     Args:
-        df: DataFrame com as colunas 'quantity' e 'unit_price'
-        
+        df: DataFrame com as colunas 'quantity' e 'unit_price' (None = snapshot atual)
+
     Returns:
         Dicionário com o coeficiente de Pearson e o valor-p
     """
-    if len(df) < 2:
-        return {"pearson_r": 0.0, "p_value": 1.0}
-    
     try:
-        r, p = pearsonr(df["quantity"], df["unit_price"])
-        return {"pearson_r": float(r), "p_value": float(p)}
+        if df is None:
+            stats = get_regression_stats(("quantity",), "unit_price")
+        else:
+            stats = RegressionStats.from_frame(df, ["quantity"], "unit_price")
+        if stats.n < 2:
+            return {"pearson_r": 0.0, "p_value": 1.0}
+        r, p = stats.pearson()
+        if np.isnan(r):
+            return {"pearson_r": 0.0, "p_value": 1.0}
+        return {"pearson_r": r, "p_value": p}
     except Exception as e:
         logging.error(f"Erro ao calcular correlação de Pearson: {e}")
         return {"pearson_r": 0.0, "p_value": 1.0}
 
-def compute_ols(df: pd.DataFrame) -> Dict[str, Any]:
-    y = df["total"]
-    X = df[["quantity", "unit_price"]]
-    X = sm.add_constant(X, prepend=True)
-    model = sm.OLS(y, X).fit()
-    params = {k: float(v) for k, v in model.params.to_dict().items()}
-    return {"params": params, "r2": float(model.rsquared)}
+def compute_pearson_by(by: str, df: Optional[pd.DataFrame] = None) -> List[Dict[str, Any]]:
+    """
+    Pearson entre quantidade e preço unitário por produto, região ou categoria.
+
+    Args:
+        by: Coluna de agrupamento (uma de PEARSON_GROUPS)
+        df: DataFrame de vendas (None = snapshot atual)
 
-def train_model(df: pd.DataFrame) -> Dict[str, Any]:
+    Returns:
+        Uma entrada por grupo com n, pearson_r e p_value (None quando indefinidos:
+        menos de 2 linhas ou variância nula)
+    """
+    if by not in PEARSON_GROUPS:
+        raise ValueError(f"Agrupamento inválido: {by}")
+    if df is None:
+        df = get_sales_snapshot().frame
+    if by not in df.columns:
+        return []
+    result = grouped_pearson(df, "quantity", "unit_price", by)
+    result = result.rename(columns={by: "group"}).astype({"pearson_r": object, "p_value": object})
+    result = result.where(result.notna(), None)
+    return result.to_dict(orient="records")
+
+def _regression_stats(df: Optional[pd.DataFrame], features: Tuple[str, ...], target: str = "total") -> RegressionStats:
+    if df is None:
+        return get_regression_stats(features, target)
+    return RegressionStats.from_frame(df, features, target)
+
+def compute_ols(df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    OLS total ~ const + quantity + unit_price em forma fechada.
+
+    Sem ``df``, usa as estatísticas suficientes em cache do snapshot atual.
+    """
+    fit = _regression_stats(df, OLS_FEATURES).fit()
+    return {"params": fit.params, "r2": float(fit.r2), "bse": fit.std_errors, "n": fit.n}
+
+def train_model(df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     global _MODEL
-    X = df[["quantity", "unit_price"]]
-    y = df["total"]
-    m = LinearRegression().fit(X, y)
-    _MODEL = m
+    fit = _regression_stats(df, OLS_FEATURES).fit()
+    _MODEL = fit
     return {
-        "r2": float(m.score(X, y)),
-        "coef": [float(c) for c in m.coef_.tolist()],
-        "intercept": float(m.intercept_),
+        "r2": float(fit.r2),
+        "coef": [float(c) for c in fit.coef],
+        "intercept": float(fit.intercept),
     }
 
+def predict_batch(X: np.ndarray) -> np.ndarray:
+    """
+    Previsões para uma matriz (n, 2) de [quantity, unit_price] numa única chamada
+    vetorizada do modelo.
+    """
+    global _MODEL
+    if _MODEL is None:
+        train_model()
+    assert _MODEL is not None  # for type checker
+    return _MODEL.predict(np.asarray(X, dtype="float64").reshape(-1, len(OLS_FEATURES)))
+
 def predict(quantity: int, unit_price: float) -> float:
     global _MODEL
     if _MODEL is None:
-        df = load_sales_df()
-        train_model(df)
+        train_model()
     assert _MODEL is not None  # for type checker
-    return float(_MODEL.predict([[quantity, unit_price]])[0])  # type: ignore[arg-type]
\ No newline at end of file
+    return float(_MODEL.predict([[quantity, unit_price]])[0])
\ No newline at end of file
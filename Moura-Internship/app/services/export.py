@@ -0,0 +1,107 @@
+from __future__ import annotations
+import os
+import tempfile
+from typing import IO, Iterable, Iterator
+import pandas as pd
+from sqlalchemy import text
+from app.services import data
+from app.services.gold import iter_gold_batches
+
+# Linhas por lote nas exportações (cursor no servidor / row groups do parquet)
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "10000"))
+_STREAM_CHUNK_BYTES = 64 * 1024
+# Acima deste tamanho o XLSX temporário vai para o disco
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def iter_sales_batches(batch_size: int = EXPORT_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Tabela de vendas completa em lotes de ``batch_size`` linhas, na ordem do snapshot.
+
+    Com ETL_SOURCE=postgres usa um cursor no servidor (stream_results), de modo que só
+    um lote fica em memória; nas demais fontes fatia o snapshot já carregado, sem cópia.
+    """
+    if os.getenv("ETL_SOURCE", "csv") == "postgres":
+        query = data._SALES_SELECT + " ORDER BY date, order_id"
+        with data.engine.connect().execution_options(stream_results=True, max_row_buffer=batch_size) as conn:
+            for chunk in pd.read_sql(text(query), conn, chunksize=batch_size):
+                yield data._typed_page(chunk)
+        return
+    frame = data.get_sales_snapshot().frame
+    for start in range(0, len(frame), batch_size):
+        yield frame.iloc[start:start + batch_size]
+
+
+def iter_parquet_batches(path: str, batch_size: int = EXPORT_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Lê a camada gold lote a lote (dentro dos row groups), sem carregá-la inteira.
+
+    Aceita tanto o dataset particionado quanto um arquivo parquet único.
+    """
+    return iter_gold_batches(path, batch_size=batch_size)
+
+
+def iter_csv(batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """CSV incremental: cabeçalho no primeiro lote e um bloco de bytes por lote."""
+    header = True
+    for batch in batches:
+        if batch.empty and not header:
+            continue
+        yield batch.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def write_csv(batches: Iterable[pd.DataFrame], path: str) -> int:
+    """Grava os lotes num CSV em disco, um por vez. Retorna o número de linhas."""
+    rows = 0
+    header = True
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for batch in batches:
+            batch.to_csv(f, index=False, header=header)
+            header = False
+            rows += len(batch)
+    return rows
+
+
+def _cell_rows(batch: pd.DataFrame) -> Iterator[tuple]:
+    values = batch.astype(object).where(batch.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_xlsx(batches: Iterable[pd.DataFrame], target: IO[bytes], sheet: str = "Sheet1") -> int:
+    """
+    Grava os lotes num XLSX com o modo write-only do openpyxl (memória constante: as
+    linhas vão direto para o XML da planilha). Retorna o número de linhas.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet)
+    rows = 0
+    header_written = False
+    for batch in batches:
+        if not header_written:
+            worksheet.append([str(col) for col in batch.columns])
+            header_written = True
+        for row in _cell_rows(batch):
+            worksheet.append(row)
+        rows += len(batch)
+    workbook.save(target)
+    return rows
+
+
+def iter_xlsx(batches: Iterable[pd.DataFrame], chunk_size: int = _STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    XLSX em blocos de ``chunk_size`` bytes para StreamingResponse.
+
+    O arquivo é montado num SpooledTemporaryFile (memória até _SPOOL_MAX_BYTES, depois
+    disco), então o pico de memória não cresce com o tamanho da tabela.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES) as tmp:
+        write_xlsx(batches, tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
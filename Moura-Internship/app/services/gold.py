@@ -0,0 +1,339 @@
+from __future__ import annotations
+import itertools
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+
+# Camada gold: dataset Parquet particionado no estilo Hive (year=AAAA/month=MM[/product=X]).
+# Dentro de cada partição as linhas ficam ordenadas por data, então o min/max de 'date'
+# gravado em cada row group é estreito e filtros de período pulam row groups inteiros
+GOLD_PARTITION_BY_PRODUCT = os.getenv("GOLD_PARTITION_BY_PRODUCT", "false").lower() in ("1", "true", "yes")
+GOLD_ROW_GROUP_ROWS = int(os.getenv("GOLD_ROW_GROUP_ROWS", "131072"))
+GOLD_COMPRESSION = "snappy"
+
+# Colunas de partição derivadas da data; ano e mês com zeros à esquerda para que os
+# diretórios, em ordem alfabética, fiquem em ordem cronológica
+_DATE_PARTITIONS = ["year", "month"]
+_MONTHS = {month: f"{month:02d}" for month in range(1, 13)}
+_COLUMNS_KEY = b"gold_columns"
+
+# Tipos declarados da camada gold. O streaming fixa o schema antes do primeiro lote; sem
+# isso uma coluna de texto toda nula num lote (lida pelo pandas como float64) travaria o
+# tipo em double e o primeiro texto de um lote seguinte derrubaria a gravação
+GOLD_TEXT_COLUMNS = ["region", "product", "status", "notes", "category", "payment_method", "created_at", "updated_at"]
+GOLD_FLOAT_COLUMNS = ["unit_price", "total"]  # valores monetários (inclusive Decimal do NUMERIC)
+
+
+def gold_path() -> str:
+    return os.getenv("ETL_GOLD_PARQUET", "data/processed/sales.parquet")
+
+
+def _partitioning(by_product: bool):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    fields = [("year", pa.string()), ("month", pa.string())]
+    if by_product:
+        fields.append(("product", pa.string()))
+    return ds.partitioning(pa.schema(fields), flavor="hive")
+
+
+def _has_product_partition(path: str) -> bool:
+    return any(Path(path).glob("year=*/month=*/product=*"))
+
+
+def _staging_target(path: Optional[str]) -> Tuple[Path, Path]:
+    """
+    (destino, diretório temporário irmão) de uma nova gravação.
+
+    O dataset novo é gravado no diretório temporário e só entra no lugar do atual em
+    _publish; até lá os leitores seguem vendo o dataset anterior inteiro.
+    """
+    target = Path(path or gold_path())
+    if target.is_dir() and any(not child.name.startswith("year=") for child in target.iterdir()):
+        raise ValueError(f"{target} não é um dataset gold; recusando sobrescrever")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.with_name(f".{target.name}.tmp-{os.getpid()}")
+    _remove(staging)
+    return target, staging
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def _publish(staging: Path, target: Path) -> None:
+    """Troca o dataset atual (diretório ou arquivo único do layout antigo) pelo gravado em ``staging``."""
+    staging.mkdir(exist_ok=True)  # dataset vazio continua legível
+    previous = None
+    if target.exists():
+        previous = target.with_name(f".{target.name}.old-{os.getpid()}")
+        _remove(previous)
+        target.rename(previous)
+    # Dois renames no mesmo diretório: a janela sem dataset é a de uma chamada de sistema
+    staging.rename(target)
+    if previous is not None:
+        _remove(previous)
+
+
+def _with_partitions(frame: pd.DataFrame, by_product: bool) -> pd.DataFrame:
+    frame = frame.copy()
+    frame["date"] = pd.to_datetime(frame["date"])
+    # astype/map em vez de strftime, que formata linha a linha
+    frame["year"] = frame["date"].dt.year.astype(str)
+    frame["month"] = frame["date"].dt.month.map(_MONTHS)
+    if by_product:
+        frame["product"] = frame["product"].astype(object)
+    for col in GOLD_FLOAT_COLUMNS:
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").astype("float64")
+    return frame
+
+
+def _gold_schema(frame: pd.DataFrame, columns: Sequence[str]):
+    """
+    Schema Arrow de ``frame`` (já com as partições) com os tipos declarados aplicados.
+
+    Colunas de texto viram string e colunas sem nenhum valor (tipo null) também, para
+    que lotes seguintes com conteúdo continuem cabendo no schema.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for field in pa.Schema.from_pandas(frame, preserve_index=False):
+        if field.name in GOLD_TEXT_COLUMNS or pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif field.name in GOLD_FLOAT_COLUMNS:
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields, metadata={_COLUMNS_KEY: ",".join(map(str, columns)).encode()})
+
+
+def _write_dataset(data, target: Path, by_product: bool, row_group_rows: int, schema=None) -> None:
+    import pyarrow.dataset as ds
+
+    ds.write_dataset(
+        data,
+        str(target),
+        schema=schema,
+        format="parquet",
+        partitioning=_partitioning(by_product),
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=row_group_rows,
+        min_rows_per_group=min(row_group_rows, 1024),
+        max_rows_per_file=row_group_rows * 8,
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression=GOLD_COMPRESSION, write_statistics=True
+        ),
+    )
+
+
+def write_gold(
+    df: pd.DataFrame,
+    path: Optional[str] = None,
+    by_product: bool = GOLD_PARTITION_BY_PRODUCT,
+    row_group_rows: int = GOLD_ROW_GROUP_ROWS,
+) -> str:
+    """
+    Grava ``df`` como dataset gold particionado por ano/mês (e produto, se pedido).
+
+    O dataset é gravado num diretório temporário ao lado do destino e depois trocado
+    por rename com o anterior (inclusive um ``sales.parquet`` de arquivo único do
+    layout antigo), que fica legível durante toda a gravação. Um diretório com outros
+    arquivos além das partições não é apagado (ValueError).
+
+    Args:
+        df: Vendas transformadas; precisa da coluna 'date'
+        path: Diretório de destino (padrão: ETL_GOLD_PARQUET)
+        by_product: Se True, acrescenta product=X como último nível de partição
+        row_group_rows: Linhas por row group
+
+    Returns:
+        Caminho do dataset gravado
+    """
+    import pyarrow as pa
+
+    target, staging = _staging_target(path)
+    frame = df.sort_values(["date", "order_id"] if "order_id" in df else ["date"], kind="stable")
+    frame = _with_partitions(frame, by_product)
+    # Ordem original das colunas (metadado do schema): as de partição saem dos arquivos
+    # e voltam no fim
+    table = pa.Table.from_pandas(frame, schema=_gold_schema(frame, df.columns), preserve_index=False)
+    try:
+        _write_dataset(table, staging, by_product, row_group_rows)
+        _publish(staging, target)
+    finally:
+        _remove(staging)
+    logging.info(f"[gold] {len(frame)} linhas gravadas em {target}")
+    return str(target)
+
+
+def write_gold_batches(
+    batches: Iterable[pd.DataFrame],
+    path: Optional[str] = None,
+    by_product: bool = GOLD_PARTITION_BY_PRODUCT,
+    row_group_rows: int = GOLD_ROW_GROUP_ROWS,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Grava o dataset gold a partir de lotes, sem montar a tabela inteira em memória.
+
+    Cada lote é convertido e entregue ao writer assim que chega; em memória ficam só o
+    lote atual e os row groups ainda abertos de cada partição. Como em write_gold, o
+    dataset anterior só é trocado quando a gravação termina. O schema vem do primeiro
+    lote com os tipos declarados (GOLD_TEXT_COLUMNS, GOLD_FLOAT_COLUMNS) aplicados, e os
+    seguintes são convertidos para ele. Diferente de write_gold, as linhas não
+    são reordenadas por data: ficam na ordem da fonte dentro de cada partição.
+
+    Args:
+        batches: Lotes de vendas já transformados
+        path: Diretório de destino (padrão: ETL_GOLD_PARQUET)
+        by_product: Se True, acrescenta product=X como último nível de partição
+        row_group_rows: Linhas por row group
+        progress: Chamado após cada lote com as métricas parciais
+
+    Returns:
+        Métricas da gravação (rows, batches, seconds, rows_per_second, peak_rss_mb, dest)
+    """
+    import pyarrow as pa
+
+    target, staging = _staging_target(path)
+    stats: Dict[str, Any] = {"rows": 0, "batches": 0, "seconds": 0.0, "rows_per_second": 0.0}
+    started = time.perf_counter()
+    iterator = iter(batches)
+    first = next(iterator, None)
+    if first is None:
+        _publish(staging, target)
+        return dict(stats, peak_rss_mb=_peak_rss_mb(), dest=str(target))
+
+    schema = _gold_schema(_with_partitions(first, by_product), first.columns)
+
+    def record_batches() -> Iterator[Any]:
+        for batch in itertools.chain([first], iterator):
+            table = pa.Table.from_pandas(_with_partitions(batch, by_product), schema=schema, preserve_index=False)
+            yield from table.to_batches()
+            stats["rows"] += len(batch)
+            stats["batches"] += 1
+            stats["seconds"] = time.perf_counter() - started
+            stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+            if progress is not None:
+                progress(dict(stats, peak_rss_mb=_peak_rss_mb()))
+
+    try:
+        _write_dataset(record_batches(), staging, by_product, row_group_rows, schema=schema)
+        _publish(staging, target)
+    finally:
+        _remove(staging)
+    stats["seconds"] = time.perf_counter() - started
+    logging.info(f"[gold] {stats['rows']} linhas em {stats['batches']} lotes gravadas em {target}")
+    return dict(stats, peak_rss_mb=_peak_rss_mb(), dest=str(target))
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo (None fora de sistemas Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KiB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def open_gold(path: Optional[str] = None):
+    """Abre o dataset gold (diretório particionado ou arquivo parquet único)."""
+    import pyarrow.dataset as ds
+
+    path = path or gold_path()
+    if Path(path).is_file():
+        return ds.dataset(path, format="parquet")
+    return ds.dataset(path, format="parquet", partitioning=_partitioning(_has_product_partition(path)))
+
+
+def gold_columns(dataset) -> List[str]:
+    """Colunas na ordem original, sem as partições derivadas da data."""
+    metadata = dataset.schema.metadata or {}
+    if _COLUMNS_KEY in metadata:
+        return metadata[_COLUMNS_KEY].decode().split(",")
+    return [name for name in dataset.schema.names if name not in _DATE_PARTITIONS]
+
+
+def _month_key(ts: pd.Timestamp):
+    import pyarrow.dataset as ds
+
+    return ds.field("year"), ds.field("month"), ts.strftime("%Y"), ts.strftime("%m")
+
+
+def gold_filter(
+    dataset,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    product: Optional[str] = None,
+):
+    """
+    Expressão de filtro com poda em dois níveis.
+
+    Os limites de ano/mês podam diretórios inteiros antes de abrir qualquer arquivo; o
+    intervalo em 'date' e o produto usam as estatísticas dos row groups (e, se product
+    for partição, também a poda de diretórios).
+    """
+    import pyarrow.dataset as ds
+
+    names = dataset.schema.names
+    expr = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if start is not None:
+        if "year" in names:
+            year, month, y, m = _month_key(start)
+            expr = both(expr, (year > y) | ((year == y) & (month >= m)))
+        expr = both(expr, ds.field("date") >= start)
+    if end is not None:
+        if "year" in names:
+            year, month, y, m = _month_key(end)
+            expr = both(expr, (year < y) | ((year == y) & (month <= m)))
+        expr = both(expr, ds.field("date") <= end)
+    if product:
+        expr = both(expr, ds.field("product") == product)
+    return expr
+
+
+def _to_pandas(table, columns: Sequence[str]) -> pd.DataFrame:
+    df = table.to_pandas()
+    return df[[col for col in columns if col in df.columns]]
+
+
+def read_gold(
+    path: Optional[str] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    product: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Lê do dataset gold só as partições e row groups que podem conter o filtro."""
+    dataset = open_gold(path)
+    wanted = list(columns) if columns else gold_columns(dataset)
+    table = dataset.to_table(
+        columns=[col for col in wanted if col in dataset.schema.names],
+        filter=gold_filter(dataset, start, end, product),
+    )
+    return _to_pandas(table, wanted)
+
+
+def iter_gold_batches(path: Optional[str] = None, batch_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """Lê o dataset gold lote a lote, na ordem das partições, sem carregá-lo inteiro."""
+    dataset = open_gold(path)
+    columns = gold_columns(dataset)
+    present = [col for col in columns if col in dataset.schema.names]
+    for batch in dataset.to_batches(columns=present, batch_size=batch_size, use_threads=False):
+        yield _to_pandas(batch, columns)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+CONST = "const"
+
+
+@dataclass(frozen=True)
+class RegressionFit:
+    """Coeficientes de um OLS com intercepto, já resolvidos."""
+
+    features: Tuple[str, ...]
+    intercept: float
+    coef: np.ndarray
+    r2: float
+    n: int
+    # Erros-padrão na ordem (const, *features); NaN sem graus de liberdade
+    bse: np.ndarray
+
+    @property
+    def params(self) -> Dict[str, float]:
+        return {CONST: self.intercept, **dict(zip(self.features, map(float, self.coef)))}
+
+    @property
+    def std_errors(self) -> Dict[str, float]:
+        return dict(zip((CONST,) + self.features, map(float, self.bse)))
+
+    def predict(self, X) -> np.ndarray:
+        return self.intercept + np.asarray(X, dtype="float64") @ self.coef
+
+
+def pearson_from_moments(n, sxx, syy, sxy) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    r e valor-p bicaudal de Pearson a partir dos co-momentos centrados.
+
+    Vetorizado: aceita escalares ou arrays (um valor por grupo). O valor-p usa a
+    estatística t com n - 2 graus de liberdade, equivalente ao scipy.stats.pearsonr.
+    Menos de 2 pontos ou variância nula devolvem NaN; com 2 pontos p = 1, como no scipy.
+    """
+    n = np.asarray(n, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.clip(np.asarray(sxy, dtype="float64") / np.sqrt(np.asarray(sxx) * np.asarray(syy)), -1.0, 1.0)
+        dof = n - 2
+        t = np.abs(r) * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p = np.where(np.abs(r) == 1.0, 0.0, 2.0 * stdtr(dof, -t))
+    p = np.where(n == 2, 1.0, p)
+    r = np.where(n < 2, np.nan, r)
+    p = np.where(np.isnan(r), np.nan, p)
+    return r, p
+
+
+def grouped_pearson(df: pd.DataFrame, x: str, y: str, by: str) -> pd.DataFrame:
+    """
+    Pearson de ``x`` e ``y`` por grupo de ``by`` numa passada vetorizada.
+
+    Os grupos viram códigos inteiros e as somas por grupo saem de np.bincount, sem
+    laço em Python por grupo. Linhas com valores nulos são ignoradas.
+
+    Returns:
+        DataFrame [by, n, pearson_r, p_value] ordenado pelo grupo
+    """
+    frame = df[[by, x, y]].dropna()
+    codes, groups = pd.factorize(frame[by], sort=True)
+    k = len(groups)
+    xs = frame[x].to_numpy(dtype="float64")
+    ys = frame[y].to_numpy(dtype="float64")
+    n = np.bincount(codes, minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dx = xs - (np.bincount(codes, xs, k) / n)[codes]
+        dy = ys - (np.bincount(codes, ys, k) / n)[codes]
+    r, p = pearson_from_moments(
+        n, np.bincount(codes, dx * dx, k), np.bincount(codes, dy * dy, k), np.bincount(codes, dx * dy, k)
+    )
+    return pd.DataFrame({by: np.asarray(groups, dtype=object), "n": n, "pearson_r": r, "p_value": p})
+
+
+class RegressionStats:
+    """
+    Estatísticas suficientes de um OLS ``target ~ const + features``.
+
+    Guarda n, as médias de [features, target] e a matriz de co-momentos centrados
+    (o XᵀX/Xᵀy/yᵀy em torno da média). Centrar evita o cancelamento numérico de
+    somar quadrados brutos; blocos se combinam pela fórmula de Chan, então novas
+    linhas entram sem revisitar o histórico. A instância é imutável: ``add`` e
+    ``merge`` devolvem estatísticas novas, e ``fit`` resolve em forma fechada com
+    custo que depende só do número de variáveis.
+    """
+
+    def __init__(self, features: Sequence[str], target: str, n: int = 0,
+                 mean: Optional[np.ndarray] = None, comoment: Optional[np.ndarray] = None):
+        self.features = tuple(features)
+        self.target = target
+        k = len(self.features) + 1
+        self.n = int(n)
+        self.mean = np.zeros(k) if mean is None else mean
+        self.comoment = np.zeros((k, k)) if comoment is None else comoment
+        self._fit: Optional[RegressionFit] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, features: Sequence[str], target: str) -> "RegressionStats":
+        """Estatísticas de ``df``; linhas com valores nulos nas colunas usadas são ignoradas."""
+        columns = list(features) + [target]
+        values = df[columns].to_numpy(dtype="float64")
+        values = values[~np.isnan(values).any(axis=1)]
+        if not len(values):
+            return cls(features, target)
+        mean = values.mean(axis=0)
+        centered = values - mean
+        return cls(features, target, len(values), mean, centered.T @ centered)
+
+    def merge(self, other: "RegressionStats") -> "RegressionStats":
+        if (other.features, other.target) != (self.features, self.target):
+            raise ValueError("Estatísticas de modelos diferentes")
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (other.n / n)
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        return RegressionStats(self.features, self.target, n, mean, comoment)
+
+    def add(self, rows: pd.DataFrame) -> "RegressionStats":
+        """Incorpora novas linhas sem recalcular o histórico."""
+        return self.merge(RegressionStats.from_frame(rows, self.features, self.target))
+
+    def pearson(self) -> Tuple[float, float]:
+        """(r, valor-p) entre a primeira feature e o alvo, direto dos co-momentos."""
+        p = len(self.features)
+        r, pvalue = pearson_from_moments(self.n, self.comoment[0, 0], self.comoment[p, p], self.comoment[0, p])
+        return float(r), float(pvalue)
+
+    def fit(self) -> RegressionFit:
+        """Coeficientes, R² e erros-padrão (mesmas fórmulas do statsmodels OLS)."""
+        if self._fit is not None:
+            return self._fit
+        p = len(self.features)
+        if self.n == 0:
+            raise ValueError("Sem dados para a regressão")
+        sxx = self.comoment[:p, :p]
+        sxy = self.comoment[:p, p]
+        syy = self.comoment[p, p]
+        # Pseudo-inversa: features colineares recebem a solução de norma mínima, como no
+        # pinv do statsmodels
+        sxx_inv = np.linalg.pinv(sxx)
+        coef = sxx_inv @ sxy
+        x_mean = self.mean[:p]
+        intercept = float(self.mean[p] - x_mean @ coef)
+        sse = max(float(syy - coef @ sxy), 0.0)
+        r2 = 1.0 - sse / syy if syy > 0 else float("nan")
+
+        dof = self.n - np.linalg.matrix_rank(sxx) - 1
+        if dof > 0:
+            sigma2 = sse / dof
+            var_const = sigma2 * (1.0 / self.n + x_mean @ sxx_inv @ x_mean)
+            bse = np.sqrt(np.concatenate([[var_const], sigma2 * np.diag(sxx_inv)]))
+        else:
+            bse = np.full(p + 1, np.nan)
+        self._fit = RegressionFit(self.features, intercept, coef, r2, self.n, bse)
+        return self._fit
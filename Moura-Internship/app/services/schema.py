@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+
+# Tipos declarados das colunas da tabela sales em memória
+# (notes é texto livre: fica como objeto, pois cada nota distinta seria uma categoria)
+CATEGORY_COLUMNS = ["product", "region", "status", "category", "payment_method"]
+INT32_COLUMNS = ["order_id", "quantity", "customer_id", "user_id"]
+# Valores monetários não numéricos (Decimal do NUMERIC) viram float64; colunas já
+# numéricas mantêm o tipo da fonte (inteiros do CSV continuam inteiros no payload)
+FLOAT_COLUMNS = ["unit_price", "total"]
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _as_int32(col: pd.Series) -> pd.Series:
+    """int32 quando os valores cabem e não há nulos; senão mantém a coluna como está."""
+    values = pd.to_numeric(col, errors="coerce")
+    if values.isna().any() or (values % 1 != 0).any():
+        return col
+    if len(values) and (values.min() < _INT32.min or values.max() > _INT32.max):
+        return col
+    return values.astype("int32")
+
+
+def apply_sales_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica o schema declarado ao DataFrame de vendas lido da fonte (CSV ou Postgres).
+
+    Textos de baixa cardinalidade viram ``category`` (categorias em ordem alfabética, de
+    modo que ordenações e agrupamentos dão o mesmo resultado que com strings), inteiros
+    sem nulos são reduzidos para int32 e valores monetários (Decimal do NUMERIC) viram
+    float64; valores monetários já numéricos são mantidos. Colunas ausentes são ignoradas.
+
+    Args:
+        df: DataFrame de origem (não é modificado)
+
+    Returns:
+        Novo DataFrame com os tipos convertidos
+    """
+    df = df.copy(deep=False)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in INT32_COLUMNS:
+        if col in df.columns and df[col].dtype != "int32":
+            df[col] = _as_int32(df[col])
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def plain_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Volta colunas ``category`` para objetos (para bibliotecas que não aceitam o tipo)."""
+    columns = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    if not columns:
+        return df
+    return df.astype({col: object for col in columns})
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compara o uso de memória (profundo) por coluna antes e depois do schema.
+
+    Returns:
+        Dicionário com totais em bytes, redução percentual e detalhes por coluna
+    """
+    old = before.memory_usage(index=False, deep=True)
+    new = after.memory_usage(index=False, deep=True)
+    columns = {
+        col: {
+            "dtype_before": str(before[col].dtype),
+            "dtype_after": str(after[col].dtype),
+            "bytes_before": int(old[col]),
+            "bytes_after": int(new.get(col, 0)),
+        }
+        for col in before.columns
+    }
+    total_before = int(old.sum())
+    total_after = int(new.sum())
+    return {
+        "rows": len(before),
+        "bytes_before": total_before,
+        "bytes_after": total_after,
+        "reduction_pct": round(100 * (1 - total_after / total_before), 1) if total_before else 0.0,
+        "columns": columns,
+    }
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+# Dias sem data (NaT) recebem o maior valor possível e ficam no fim do índice ordenado
+MISSING_DAY = np.iinfo(np.int64).max
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def day_numbers(dates: pd.Series) -> np.ndarray:
+    """Número do dia (dias desde 1970-01-01) de cada data, como int64."""
+    values = pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]")
+    days = values.astype("datetime64[D]").astype(np.int64)
+    days[np.isnat(values)] = MISSING_DAY
+    return days
+
+
+def day_slice(days: np.ndarray, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> slice:
+    """
+    Intervalo contíguo de posições com start <= data <= end, via busca binária.
+
+    ``days`` deve estar em ordem crescente e conter datas sem hora (coluna DATE); um
+    limite com hora é arredondado para o dia inteiro que ele ainda inclui.
+
+    Args:
+        days: Números de dia ordenados (ver day_numbers)
+        start: Limite inferior inclusivo (None = sem limite)
+        end: Limite superior inclusivo (None = sem limite)
+
+    Returns:
+        slice posicional compatível com ``iloc``
+    """
+    lo = 0
+    hi = len(days)
+    if start is not None:
+        first_day = -(-pd.Timestamp(start).value // _NS_PER_DAY)  # teto
+        lo = int(np.searchsorted(days, first_day, side="left"))
+    if end is not None:
+        last_day = pd.Timestamp(end).value // _NS_PER_DAY  # piso
+        hi = int(np.searchsorted(days, last_day, side="right"))
+    elif start is not None:
+        # Linhas sem data nunca satisfazem um filtro de data
+        hi = int(np.searchsorted(days, MISSING_DAY, side="left"))
+    return slice(lo, max(lo, hi))
+
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    arr = np.array(values, copy=True)
+    arr.flags.writeable = False
+    return arr
+
+
+def _frozen_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Cópia somente leitura de ``df`` (um bloco por coluna) e o seu tamanho profundo em bytes.
+
+    Cada coluna é medida na cópia ainda gravável: memory_usage(deep=True) não aceita
+    arrays de objetos somente leitura, e ``df`` pode ser um recorte de outro snapshot.
+    """
+    columns = {}
+    nbytes = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Categorias: só o array de códigos é copiado (e protegido contra escrita)
+            column = pd.Categorical.from_codes(_readonly(values.cat.codes.to_numpy()), dtype=values.dtype)
+            nbytes += int(column.memory_usage(deep=True))
+        else:
+            column = np.array(values.to_numpy(), copy=True)
+            nbytes += int(pd.Series(column, copy=False).memory_usage(index=False, deep=True))
+            column.flags.writeable = False
+        columns[col] = column
+    return pd.DataFrame(columns, index=df.index.copy(), columns=df.columns, copy=False), nbytes
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia cada coluna uma única vez para um array numpy somente leitura.
+
+    O DataFrame resultante mantém um bloco por coluna (sem consolidação), de modo que
+    qualquer escrita in-place (``df.loc[...] = ...``) falha com ``ValueError``.
+
+    Args:
+        df: DataFrame de origem (não é modificado)
+
+    Returns:
+        DataFrame colunar e imutável com o mesmo índice e colunas
+    """
+    return _frozen_columns(df)[0]
+
+
+@dataclass(frozen=True)
+class SalesSnapshot:
+    """
+    Foto imutável da tabela de vendas compartilhada por todas as requisições.
+
+    As linhas ficam ordenadas por data (ordem estável, preservando a ordem da fonte em
+    empates) e ``days`` guarda o número do dia de cada linha, permitindo recortes por
+    período em O(log n + k) com ``between``.
+    """
+
+    frame: pd.DataFrame
+    loaded_at: datetime
+    nbytes: int = 0
+    days: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, loaded_at: Optional[datetime] = None) -> "SalesSnapshot":
+        days = np.empty(0, dtype=np.int64)
+        if "date" in df.columns:
+            days = day_numbers(df["date"])
+            if len(days) and not np.all(days[:-1] <= days[1:]):
+                order = np.argsort(days, kind="stable")
+                df = df.iloc[order]
+                days = days[order]
+            days.flags.writeable = False
+        frame, nbytes = _frozen_columns(df)
+        return cls(frame=frame, loaded_at=loaded_at or datetime.now(), nbytes=nbytes, days=days)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def age(self) -> timedelta:
+        return datetime.now() - self.loaded_at
+
+    def view(self) -> pd.DataFrame:
+        """
+        Visão rasa (zero-copy) do snapshot.
+
+        Adicionar ou substituir colunas afeta apenas a visão; escritas in-place nos
+        valores existentes falham, pois os arrays são somente leitura.
+        """
+        return self.frame.copy(deep=False)
+
+    def between(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Visão zero-copy das linhas com start <= date <= end (limites inclusivos).
+
+        Usa busca binária sobre o índice de dias em vez de uma máscara booleana.
+        """
+        if start is None and end is None:
+            return self.view()
+        return self.frame.iloc[day_slice(self.days, start, end)].copy(deep=False)
+
+    def mutable(self) -> pd.DataFrame:
+        """Cópia profunda e gravável do snapshot (caminho explícito de copy-on-write)."""
+        return self.frame.copy(deep=True)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Sessão Spark compartilhada entre requisições: criada no primeiro uso, verificada a cada
+# acesso e encerrada após SPARK_IDLE_TIMEOUT_SECONDS sem uso
+SPARK_MASTER = os.getenv("SPARK_MASTER", "local[*]")
+SPARK_IDLE_TIMEOUT_SECONDS = float(os.getenv("SPARK_IDLE_TIMEOUT_SECONDS", "600"))
+SPARK_CONF = {
+    # Conversões pandas <-> Spark (createDataFrame/toPandas) via Arrow, colunar e sem pickle
+    "spark.sql.execution.arrow.pyspark.enabled": "true",
+    "spark.sql.execution.arrow.pyspark.fallback.enabled": "true",
+    "spark.sql.parquet.compression.codec": "snappy",
+}
+
+
+class SparkSessionManager:
+    """
+    Mantém uma única SparkSession de longa duração.
+
+    ``use()`` entrega a sessão (criando-a ou recriando-a se a JVM tiver parado) e marca
+    o uso; uma thread de limpeza encerra a sessão quando fica ociosa por mais de
+    ``idle_timeout`` segundos e nenhuma requisição a está usando.
+    """
+
+    def __init__(
+        self,
+        app_name: str = "moura-spark",
+        master: str = SPARK_MASTER,
+        idle_timeout: float = SPARK_IDLE_TIMEOUT_SECONDS,
+        conf: Optional[Dict[str, str]] = None,
+    ):
+        self.app_name = app_name
+        self.master = master
+        self.idle_timeout = idle_timeout
+        self.conf = dict(SPARK_CONF if conf is None else conf)
+        self._spark = None
+        self._lock = threading.RLock()
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._reaper: Optional[threading.Thread] = None
+        self.starts = 0
+        self.stops = 0
+        self.requests = 0
+        self.health_failures = 0
+        self.last_start_seconds: Optional[float] = None
+        self.started_at: Optional[datetime] = None
+
+    def _healthy(self) -> bool:
+        try:
+            return not self._spark.sparkContext._jsc.sc().isStopped()
+        except Exception:
+            return False
+
+    def _start(self):
+        from pyspark.sql import SparkSession
+
+        started = time.perf_counter()
+        builder = SparkSession.builder.master(self.master).appName(self.app_name)
+        for key, value in self.conf.items():
+            builder = builder.config(key, value)
+        self._spark = builder.getOrCreate()
+        self.last_start_seconds = time.perf_counter() - started
+        self.started_at = datetime.now()
+        self.starts += 1
+        logging.info(f"[spark] Sessão iniciada em {self.last_start_seconds:.1f}s")
+        self._start_reaper()
+        return self._spark
+
+    def session(self):
+        """Sessão ativa, criada sob demanda ou recriada se não responder."""
+        with self._lock:
+            if self._spark is not None and not self._healthy():
+                self.health_failures += 1
+                logging.warning("[spark] Sessão parada inesperadamente; recriando")
+                self._spark = None
+            if self._spark is None:
+                self._start()
+            self._last_used = time.monotonic()
+            return self._spark
+
+    @contextmanager
+    def use(self) -> Iterator[Any]:
+        """Bloco ``with`` que impede o encerramento por ociosidade enquanto roda."""
+        with self._lock:
+            spark = self.session()
+            self._active += 1
+            self.requests += 1
+        try:
+            yield spark
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._spark is None:
+                return
+            try:
+                self._spark.stop()
+            finally:
+                self._spark = None
+                self.stops += 1
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self._last_used
+
+    def _start_reaper(self) -> None:
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap, name="spark-idle-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        interval = max(1.0, min(60.0, self.idle_timeout / 4))
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if self._spark is None:
+                    return
+                if self._active == 0 and self.idle_seconds() >= self.idle_timeout:
+                    logging.info("[spark] Sessão ociosa encerrada")
+                    self.stop()
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._spark is not None,
+                "master": self.master,
+                "active_requests": self._active,
+                "requests": self.requests,
+                "starts": self.starts,
+                "stops": self.stops,
+                "health_failures": self.health_failures,
+                "last_start_seconds": self.last_start_seconds,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "idle_seconds": self.idle_seconds(),
+                "idle_timeout_seconds": self.idle_timeout,
+                "arrow_enabled": self.conf.get("spark.sql.execution.arrow.pyspark.enabled") == "true",
+            }
+
+
+spark_manager = SparkSessionManager()
+
+
+def get_spark_stats() -> Dict[str, Any]:
+    return spark_manager.stats()
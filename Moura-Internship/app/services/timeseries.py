@@ -0,0 +1,103 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+_BUCKET_DAYS = {"day": 1, "week": 7}
+_LABEL_FORMATS = {"day": "%d/%m", "week": "%d/%m", "month": "%b %Y"}
+_PERIOD_PATTERN = re.compile(r"^(\d+)\s*([dwm])$")
+_PERIOD_UNITS = {"d": "day", "w": "week", "m": "month"}
+
+
+@dataclass(frozen=True)
+class Window:
+    """Janela de ``count`` buckets consecutivos começando no bucket de ``start``."""
+
+    start: pd.Timestamp
+    count: int
+    bucket: str  # 'day', 'week' ou 'month'
+
+    def bucket_starts(self) -> List[pd.Timestamp]:
+        if self.bucket == "month":
+            return list(pd.date_range(self.start, periods=self.count, freq="MS"))
+        return list(pd.date_range(self.start, periods=self.count, freq=f"{_BUCKET_DAYS[self.bucket]}D"))
+
+
+def _month_number(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def window_for_period(period: str, now: pd.Timestamp) -> Tuple[Window, Optional[str]]:
+    """
+    Janela que termina em ``now`` para um período do gráfico de receita.
+
+    Aceita os períodos do dashboard ('week' = 7 dias, 'month' = 30 dias, qualquer outro
+    valor = 12 meses) e períodos arbitrários no formato ``<N>d``, ``<N>w`` ou ``<N>m``
+    (ex.: '90d', '8w', '24m').
+
+    Returns:
+        Tupla (janela, formato strftime dos rótulos ou None para o padrão do bucket)
+    """
+    today = now.normalize()
+    if period == "week":
+        return Window(today - pd.Timedelta(days=6), 7, "day"), "%a"
+    if period == "month":
+        return Window(today - pd.Timedelta(days=29), 30, "day"), None
+    match = _PERIOD_PATTERN.match(str(period).strip().lower())
+    if match is None:
+        return Window(today.to_period("M").to_timestamp() - pd.DateOffset(months=11), 12, "month"), None
+    count, unit = int(match.group(1)), _PERIOD_UNITS[match.group(2)]
+    if count < 1:
+        raise ValueError(f"Período inválido: {period}")
+    if unit == "month":
+        start = today.to_period("M").to_timestamp() - pd.DateOffset(months=count - 1)
+    else:
+        start = today - pd.Timedelta(days=_BUCKET_DAYS[unit] * count - 1)
+    return Window(start, count, unit), None
+
+
+def window_between(start: pd.Timestamp, end: pd.Timestamp, bucket: str = "day") -> Window:
+    """Janela customizada cobrindo os dias [start, end] com buckets do tipo ``bucket``."""
+    if bucket not in _LABEL_FORMATS:
+        raise ValueError(f"Bucket inválido: {bucket}")
+    start = start.normalize()
+    end = end.normalize()
+    if end < start:
+        raise ValueError("end_date anterior a start_date")
+    if bucket == "month":
+        start = start.to_period("M").to_timestamp()
+        count = (end.year - start.year) * 12 + end.month - start.month + 1
+    else:
+        count = (end - start).days // _BUCKET_DAYS[bucket] + 1
+    return Window(start, count, bucket)
+
+
+def bucketize(days: np.ndarray, values: np.ndarray, window: Window) -> np.ndarray:
+    """
+    Soma ``values`` por bucket da janela numa única passada (np.bincount).
+
+    Args:
+        days: Número do dia (desde 1970-01-01) de cada valor
+        values: Valores a somar, alinhados com ``days``
+        window: Janela de buckets
+
+    Returns:
+        Array com ``window.count`` totais; buckets sem vendas valem zero
+    """
+    first_day = window.start.value // (86_400 * 10**9)
+    if window.bucket == "month":
+        index = _month_number(days) - _month_number(np.array([first_day]))[0]
+    else:
+        index = (days - first_day) // _BUCKET_DAYS[window.bucket]
+    inside = (index >= 0) & (index < window.count)
+    totals = np.bincount(index[inside], weights=values[inside], minlength=window.count)
+    if np.issubdtype(values.dtype, np.integer):
+        return np.rint(totals).astype(values.dtype)
+    return totals
+
+
+def labels_for(window: Window, fmt: Optional[str] = None) -> List[str]:
+    fmt = fmt or _LABEL_FORMATS[window.bucket]
+    return [start.strftime(fmt) for start in window.bucket_starts()]
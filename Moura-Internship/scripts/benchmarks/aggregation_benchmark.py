@@ -0,0 +1,79 @@
+"""
+Benchmark dos motores de agregação (app/services/aggregation.py).
+
+Gera vendas sintéticas em tamanhos crescentes, mede a soma de receita por produto em
+cada motor disponível (mediana de R repetições, incluindo a conversão do DataFrame) e
+imprime o ponto de virada: o menor tamanho em que cada motor supera o pandas. Use o
+resultado para ajustar AGG_PANDAS_MAX_ROWS / AGG_COLUMNAR_MAX_MB na máquina de produção:
+
+    python scripts/benchmarks/aggregation_benchmark.py --sizes 10000 100000 1000000 5000000
+    python scripts/benchmarks/aggregation_benchmark.py --backends pandas arrow duckdb
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.services.aggregation import BACKENDS, available_backends  # noqa: E402
+from app.services.schema import apply_sales_schema  # noqa: E402
+
+PRODUCTS = [f"Produto {i}" for i in range(50)]
+REGIONS = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+
+
+def synthetic_sales(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "product": rng.choice(PRODUCTS, rows),
+        "region": rng.choice(REGIONS, rows),
+        "total": rng.integers(100, 50_000, rows) / 100,
+    })
+    return apply_sales_schema(df)
+
+
+def _time(backend: str, df: pd.DataFrame, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        BACKENDS[backend].sum_by(df, "product", "total")
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--backends", nargs="+", default=None)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    missing = [name for name in backends if name not in available_backends()]
+    if missing:
+        parser.error(f"backends indisponíveis: {', '.join(missing)}")
+
+    results = {}
+    print(f"{'linhas':>10} {'MB':>8} " + " ".join(f"{name:>10}" for name in backends))
+    for rows in args.sizes:
+        df = synthetic_sales(rows)
+        mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+        if "spark" in backends:
+            BACKENDS["spark"].sum_by(df.head(1000), "product", "total")  # sobe a sessão antes de medir
+        results[rows] = {name: _time(name, df, args.repeat) for name in backends}
+        print(f"{rows:>10} {mb:>8.1f} " + " ".join(f"{results[rows][name] * 1000:>8.1f}ms" for name in backends))
+
+    print("\nPonto de virada (menor tamanho em que o motor supera o pandas):")
+    for name in backends:
+        if name == "pandas":
+            continue
+        faster = [rows for rows in args.sizes if results[rows][name] < results[rows].get("pandas", float("inf"))]
+        print(f"  {name:>8}: {faster[0] if faster else 'não superou nos tamanhos testados'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Teste de carga dos endpoints async do dashboard.
+
+Dispara N requisições com C conexões simultâneas e imprime latências p50/p95/p99 por
+endpoint. Rode contra a API antes e depois de uma mudança para comparar, por exemplo:
+
+    uvicorn app.backend.main:app --workers 1
+    python scripts/benchmarks/load_test.py --url http://localhost:8000 -c 64 -n 2000
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+
+ENDPOINTS = [
+    "/api/sales?page=1&page_size=50",
+    "/api/summary",
+    "/api/charts/revenue?period=year",
+    "/api/charts/categories",
+]
+
+
+async def _worker(client: httpx.AsyncClient, path: str, queue: asyncio.Queue, latencies: list, errors: list) -> None:
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, concurrency: int, requests: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        for path in ENDPOINTS:
+            queue: asyncio.Queue = asyncio.Queue()
+            for _ in range(requests):
+                queue.put_nowait(None)
+            latencies: list = []
+            errors: list = []
+            started = time.perf_counter()
+            await asyncio.gather(*(_worker(client, path, queue, latencies, errors) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+            print(
+                f"{path:40s} {requests / elapsed:8.1f} req/s  "
+                f"p50={p50:7.1f}ms  p95={p95:7.1f}ms  p99={p99:7.1f}ms  erros={len(errors)}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="requisições por endpoint")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,12 @@ CREATE TABLE IF NOT EXISTS sales (
   payment_method TEXT
 );
 
+-- Índice para paginação por chave (ORDER BY date, order_id) nas listagens de vendas
+CREATE INDEX IF NOT EXISTS idx_sales_date_order_id ON sales (date, order_id);
+
+-- Índice para a atualização incremental do snapshot (linhas com updated_at recente)
+CREATE INDEX IF NOT EXISTS idx_sales_updated_at ON sales (updated_at);
+
 -- Função/Trigger para manter total = quantity * unit_price
 CREATE OR REPLACE FUNCTION set_total() RETURNS trigger AS $$
 BEGIN
@@ -37,6 +43,20 @@ CREATE TRIGGER trg_set_total
 BEFORE INSERT OR UPDATE ON sales
 FOR EACH ROW EXECUTE PROCEDURE set_total();
 
+-- Mantém updated_at atualizado em cada UPDATE (marca d'água da atualização incremental)
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at := CURRENT_TIMESTAMP;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_set_updated_at ON sales;
+
+CREATE TRIGGER trg_set_updated_at
+BEFORE UPDATE ON sales
+FOR EACH ROW EXECUTE PROCEDURE set_updated_at();
+
 -- Tabela agregada (exemplo)
 CREATE TABLE IF NOT EXISTS product_revenue (
   product TEXT PRIMARY KEY,
@@ -0,0 +1,79 @@
+import pytest
+
+
+def _sales():
+    import pandas as pd
+    from app.services import data
+
+    df = data.load_sales_df()
+    # Linha com produto nulo: nenhum motor deve retorná-la
+    extra = pd.DataFrame({"product": [None], "total": [123.0]})
+    return pd.concat([df[["product", "total"]].astype({"product": object}), extra], ignore_index=True)
+
+
+class TestAggregationBackends:
+    @pytest.mark.parametrize("backend", ["arrow", "duckdb", "spark"])
+    def test_backends_match_pandas(self, backend):
+        import pandas as pd
+        from app.services.aggregation import BACKENDS, sum_by
+        from app.services.schema import apply_sales_schema
+
+        if not BACKENDS[backend].available():
+            pytest.skip(f"{backend} não instalado")
+        for df in (_sales(), apply_sales_schema(_sales())):
+            expected = sum_by(df, backend="pandas")
+            result = sum_by(df, backend=backend)
+            assert list(result.columns) == ["product", "total_revenue"]
+            assert None not in result["product"].tolist()
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_pandas_matches_groupby(self):
+        from app.services.aggregation import sum_by
+
+        df = _sales()
+        result = sum_by(df, backend="pandas")
+        expected = df.groupby("product")["total"].sum()
+        assert result.set_index("product")["total_revenue"].to_dict() == pytest.approx(expected.to_dict())
+        assert result["product"].tolist() == sorted(expected.index)
+
+    def test_invalid_backend(self):
+        from app.services.aggregation import sum_by
+
+        with pytest.raises(ValueError):
+            sum_by(_sales(), backend="oracle")
+
+
+    def test_incomplete_backend_fails_on_instantiation(self):
+        from app.services.aggregation import AggregationBackend
+
+        class Incomplete(AggregationBackend):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+class TestPlanner:
+    def test_small_inputs_stay_in_pandas(self):
+        from app.services.aggregation import plan_backend
+
+        assert plan_backend(1_000, 10_000) == "pandas"
+
+    def test_large_inputs_leave_pandas(self, monkeypatch):
+        from app.services import aggregation
+
+        monkeypatch.setattr(aggregation, "PANDAS_MAX_ROWS", 100)
+        monkeypatch.setattr(aggregation, "COLUMNAR_MAX_BYTES", 1_000)
+        spark_available = aggregation.BACKENDS["spark"].available()
+        columnar = [name for name in aggregation._COLUMNAR if aggregation.BACKENDS[name].available()]
+        expected_mid = columnar[0] if columnar else "pandas"
+
+        assert aggregation.plan_backend(500, 500) == expected_mid
+        assert aggregation.plan_backend(500, 5_000) == ("spark" if spark_available else expected_mid)
+
+    def test_planned_backend_is_used(self, monkeypatch):
+        from app.services import aggregation
+
+        used = []
+        monkeypatch.setattr(aggregation, "plan_backend", lambda rows, nbytes: used.append(rows) or "pandas")
+        aggregation.sum_by(_sales())
+        assert used == [len(_sales())]
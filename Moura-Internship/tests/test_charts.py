@@ -0,0 +1,134 @@
+import pandas as pd
+
+
+class TestRenderCache:
+    def test_memory_lru_and_disk_persistence(self, tmp_path):
+        from app.services.cache import RenderCache
+
+        cache = RenderCache(max_entries=2, directory=str(tmp_path))
+        renders = []
+        for key in ["a", "b", "c"]:
+            cache.get_or_render(key, lambda key=key: renders.append(key) or key.encode())
+        assert cache.get_or_render("c", lambda: b"x") == b"c"
+        assert cache.stats()["entries"] == 2
+        # "a" saiu da memória, mas continua em disco
+        assert cache.get("a") == b"a"
+        assert cache.stats()["disk_hits"] == 1
+        # Outra instância (outro processo) reaproveita os arquivos
+        other = RenderCache(directory=str(tmp_path))
+        assert other.get_or_render("b", lambda: b"novo") == b"b"
+        assert renders == ["a", "b", "c"]
+
+    def test_disk_budget_evicts_oldest(self, tmp_path):
+        import os
+        from app.services.cache import RenderCache
+
+        cache = RenderCache(max_entries=1, directory=str(tmp_path), max_disk_bytes=250)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, bytes(100))
+            os.utime(tmp_path / f"{key}.png", (i, i))
+        assert cache.stats()["disk_bytes"] <= 250
+        assert not (tmp_path / "a.png").exists()
+        assert (tmp_path / "c.png").exists()
+
+
+class TestChartKeys:
+    def _df(self):
+        from app.services.data import load_sales_df
+        return load_sales_df()
+
+    def test_key_depends_only_on_aggregated_input(self):
+        from app.services.charts import prepare_chart
+
+        df = self._df()
+        key, revenue = prepare_chart("matplotlib-sales", df)
+        # Mesma receita por produto em outra ordem de linhas: mesma chave
+        shuffled = df.sample(frac=1, random_state=0)
+        assert prepare_chart("matplotlib-sales", shuffled)[0] == key
+        changed = df.copy()
+        changed["total"] = changed["total"] * 2
+        assert prepare_chart("matplotlib-sales", changed)[0] != key
+        assert prepare_chart("seaborn-sales", df)[0] != key
+
+    def test_seaborn_input_is_aggregated(self):
+        import pytest
+        from scipy import stats
+        from app.services.charts import seaborn_input
+
+        df = self._df()
+        agg = seaborn_input(df)
+        assert list(agg.columns) == ["product", "region", "mean", "ci"]
+        assert len(agg) == df.groupby(["product", "region"], observed=True).ngroups
+        for row in agg.itertuples():
+            totals = df[(df["product"] == row.product) & (df["region"] == row.region)]["total"]
+            assert row.mean == pytest.approx(totals.mean())
+            if len(totals) > 1:
+                low, _ = stats.t.interval(0.95, len(totals) - 1, loc=totals.mean(), scale=stats.sem(totals))
+                assert row.ci == pytest.approx(totals.mean() - low)
+            else:
+                assert row.ci == 0
+
+    def test_key_is_memoized_per_snapshot(self, monkeypatch):
+        from app.services import charts
+        from app.services.data import get_sales_snapshot
+        from app.services.snapshot import SalesSnapshot
+
+        snapshot = get_sales_snapshot()
+        key, data = charts.prepare_chart("seaborn-sales", snapshot.view(), snapshot=snapshot)
+        calls = []
+        monkeypatch.setitem(charts._CHARTS, "seaborn-sales", (lambda df: calls.append(df), charts.render_seaborn))
+        assert charts.prepare_chart("seaborn-sales", snapshot.view(), snapshot=snapshot) == (key, data)
+        assert calls == []
+        # Um snapshot novo (recarga) invalida a memorização
+        monkeypatch.setitem(charts._CHARTS, "seaborn-sales", (charts.seaborn_input, charts.render_seaborn))
+        reloaded = SalesSnapshot.from_frame(snapshot.frame)
+        assert charts.prepare_chart("seaborn-sales", reloaded.view(), snapshot=reloaded)[0] == key
+
+    def test_etag_poll_returns_304(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.backend.routers.extras import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        etag = client.get("/matplotlib-sales").headers["etag"]
+        response = client.get("/matplotlib-sales", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_render_is_cached(self):
+        from app.services.charts import prepare_chart, render_chart, get_render_stats
+
+        key, data = prepare_chart("matplotlib-sales", self._df())
+        before = get_render_stats()["renders"]
+        png = render_chart("matplotlib-sales", key, data)
+        assert png.startswith(b"\x89PNG")
+        assert render_chart("matplotlib-sales", key, data) == png
+        assert get_render_stats()["renders"] <= before + 1
+
+
+class TestRenderPool:
+    def test_pool_renders_same_chart_as_inline(self, monkeypatch):
+        from app.services import charts
+        from app.services.data import load_sales_df
+
+        _, revenue = charts.prepare_chart("matplotlib-sales", load_sales_df())
+        monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 2)
+        try:
+            png = charts._render("matplotlib-sales", revenue)
+        finally:
+            charts.shutdown_render_pool()
+        assert png.startswith(b"\x89PNG")
+        assert png == charts._render_worker("matplotlib-sales", revenue)
+
+    def test_full_queue_is_rejected(self, monkeypatch):
+        import threading
+        import pytest
+        from app.services import charts
+
+        monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 2)
+        monkeypatch.setattr(charts, "_SLOTS", threading.BoundedSemaphore(1))
+        charts._SLOTS.acquire()
+        with pytest.raises(charts.RenderQueueFull):
+            charts._render("matplotlib-sales", pd.Series([1.0], index=["a"]))
+        assert charts.get_render_stats()["rejected"] >= 1
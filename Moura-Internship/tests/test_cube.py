@@ -0,0 +1,134 @@
+from datetime import timedelta
+import pandas as pd
+import pytest
+
+
+def _raw():
+    # Referência com colunas de texto comuns (sem o schema categórico)
+    from app.services.data import load_sales_df
+    from app.services.schema import plain_dtypes
+    return plain_dtypes(load_sales_df(copy=True))
+
+
+def _between(df, start=None, end=None):
+    if start is not None:
+        df = df[df["date"] >= pd.to_datetime(start)]
+    if end is not None:
+        df = df[df["date"] <= pd.to_datetime(end) + timedelta(days=1)]
+    return df
+
+
+class TestCubeParity:
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"start_date": "2025-08-10", "end_date": "2025-08-31"},
+        {"product": "Bateria B"},
+        {"start_date": "2025-09-01", "product": "Bateria A"},
+        {"start_date": "2030-01-01"},
+    ])
+    def test_summary_matches_compute_summary(self, filters):
+        from app.services.data import load_sales_df, compute_summary, summarize_sales
+
+        expected = compute_summary(load_sales_df(copy=True, **filters))
+        result = summarize_sales(**filters)
+        assert result.keys() == expected.keys()
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert result[key] == pytest.approx(value)
+            else:
+                assert result[key] == value
+
+    @pytest.mark.parametrize("period", ["day", "week", "month", "year"])
+    def test_sales_by_period_matches_pandas(self, period):
+        from app.services.data import get_sales_by_period
+
+        df = _between(_raw(), "2025-08-05", "2025-09-10").copy()
+        df["period"] = df["date"].dt.to_period(period[0].upper())
+        expected = df.groupby("period").agg(
+            total_sales=("quantity", "sum"),
+            total_revenue=("total", "sum"),
+            avg_ticket=("total", "mean"),
+            order_count=("order_id", "count"),
+        ).reset_index()
+        expected["period"] = expected["period"].astype(str)
+
+        result = get_sales_by_period(period, start_date="2025-08-05", end_date="2025-09-10")
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    @pytest.mark.parametrize("by", ["revenue", "quantity"])
+    def test_top_products_matches_pandas(self, by):
+        from app.services.data import get_top_products
+
+        df = _between(_raw(), "2025-08-01", "2025-08-31")
+        expected = df.groupby("product").agg(
+            revenue=("total", "sum"),
+            quantity=("quantity", "sum"),
+            order_count=("order_id", "count"),
+            avg_price=("unit_price", "mean"),
+        ).reset_index().sort_values(by, ascending=False).head(5)
+
+        result = get_top_products(5, by=by, start_date="2025-08-01", end_date="2025-08-31")
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_averages_skip_missing_totals(self, tmp_path, monkeypatch):
+        from app.services import data
+
+        csv = tmp_path / "sales.csv"
+        csv.write_text(
+            "order_id,region,product,quantity,unit_price,date\n"
+            "1,Sul,Bateria A,1,10,2025-08-01\n"
+            "2,Sul,Bateria A,2,,2025-08-01\n"
+            "3,Norte,Bateria B,1,12,2025-08-02\n"
+            "4,Norte,Bateria B,1,11,2025-08-09\n"
+        )
+        monkeypatch.setenv("ETL_CSV_PATH", str(csv))
+        data.clear_sales_cache()
+
+        df = data.load_sales_df(copy=True)
+        assert df["total"].isna().sum() == 1
+        expected = data.compute_summary(df)
+        result = data.summarize_sales()
+        assert result["avg_ticket"] == pytest.approx(expected["avg_ticket"]) == 11.0
+        assert result["sales_count"] == expected["sales_count"] == 4
+
+        periods = data.get_sales_by_period("week").set_index("period")
+        weekly = df.groupby(df["date"].dt.to_period("W"))["total"].mean()
+        assert periods["avg_ticket"].tolist() == pytest.approx(weekly.tolist())
+        top = data.get_top_products(5).set_index("product")
+        assert top.loc["Bateria A", "avg_price"] == pytest.approx(10.0)
+
+    def test_category_totals_match_pandas(self):
+        from app.services.data import get_sales_cube
+
+        df = _between(_raw(), "2025-08-15")
+        expected = df.groupby("product")["total"].sum().sort_values(ascending=False).head(5)
+        cells = get_sales_cube().slice(pd.Timestamp("2025-08-15"))
+        result = cells.groupby("product")["total"].sum().sort_values(ascending=False).head(5)
+        pd.testing.assert_series_equal(result, expected)
+
+
+class TestCubeIncremental:
+    def test_add_matches_full_build(self):
+        from app.services.cube import SalesCube
+
+        df = _raw()
+        incremental = SalesCube.build(df.iloc[:30]).add(df.iloc[30:])
+        full = SalesCube.build(df)
+        pd.testing.assert_frame_equal(incremental.cells, full.cells, check_dtype=False)
+
+    def test_append_sales_updates_cube_and_snapshot(self):
+        from app.services.data import append_sales, get_sales_cube, summarize_sales
+
+        before = summarize_sales()
+        cube = get_sales_cube()
+        rows = pd.DataFrame([{
+            "order_id": 999, "region": "Sul", "product": "Bateria Z", "quantity": 3,
+            "unit_price": 100, "date": "2025-09-30",
+        }])
+        append_sales(rows)
+
+        after = summarize_sales()
+        assert get_sales_cube() is not cube
+        assert after["sales_count"] == before["sales_count"] + 1
+        assert after["total_revenue"] == pytest.approx(before["total_revenue"] + 300)
+        assert after["end_date"] == "2025-09-30"
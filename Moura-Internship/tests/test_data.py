@@ -0,0 +1,424 @@
+import pytest
+
+
+class TestSalesSnapshot:
+    def test_cache_hit_is_zero_copy(self):
+        import numpy as np
+        from app.services.data import load_sales_df, get_sales_snapshot
+
+        df = load_sales_df()
+        snapshot = get_sales_snapshot()
+        assert np.shares_memory(df["total"].to_numpy(), snapshot.frame["total"].to_numpy())
+        assert not snapshot.frame["total"].to_numpy().flags.writeable
+
+    def test_view_rejects_in_place_writes(self):
+        from app.services.data import load_sales_df
+
+        df = load_sales_df()
+        with pytest.raises(ValueError):
+            df.loc[df.index[0], "quantity"] = -1
+        assert load_sales_df()["quantity"].iloc[0] != -1
+
+    def test_new_columns_do_not_leak_into_snapshot(self):
+        from app.services.data import load_sales_df
+
+        df = load_sales_df()
+        df["extra"] = 1
+        df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+        fresh = load_sales_df()
+        assert "extra" not in fresh.columns
+        assert str(fresh["date"].dtype).startswith("datetime64")
+
+    def test_derived_total_keeps_snapshot_zero_copy(self, monkeypatch):
+        import numpy as np
+        from app.backend.routers import extras
+        from app.services.data import load_sales_df
+        from app.services.snapshot import SalesSnapshot
+
+        snapshot = SalesSnapshot.from_frame(load_sales_df().drop(columns=["total"]))
+        monkeypatch.setattr(extras, "load_sales_df", snapshot.view)
+        df = extras.get_sales_df()
+        assert (df["total"] == df["quantity"] * df["unit_price"]).all()
+        assert np.shares_memory(df["quantity"].to_numpy(), snapshot.frame["quantity"].to_numpy())
+        assert "total" not in snapshot.frame.columns
+
+    def test_copy_is_writable(self):
+        from app.services.data import load_sales_df
+
+        df = load_sales_df(copy=True)
+        df.loc[df.index[0], "quantity"] = -1
+        assert df["quantity"].iloc[0] == -1
+        assert load_sales_df()["quantity"].iloc[0] != -1
+
+
+class TestQueryCache:
+    def test_filtered_query_matches_source_and_hits_cache(self):
+        import pandas as pd
+        from app.services.data import load_sales_df, _read_sales_source, get_cache_stats
+        from app.services.schema import plain_dtypes
+
+        load_sales_df()  # snapshot base em memória
+        before = get_cache_stats()
+        df = load_sales_df(start_date="2025-08-05", end_date="2025-8-20", product="Bateria B")
+        expected = _read_sales_source(start_date="2025-08-05", end_date="2025-08-20", product="Bateria B")
+        # As categorias dependem das linhas lidas; os valores devem ser os mesmos
+        pd.testing.assert_frame_equal(plain_dtypes(df), plain_dtypes(expected))
+
+        load_sales_df(start_date="2025-8-5", end_date="2025-08-20", product=" Bateria B ")
+        stats = get_cache_stats()
+        assert stats["hits"] == before["hits"] + 1
+        assert stats["misses"] == before["misses"] + 1
+        assert stats["entries"] == 1
+
+    def test_lru_eviction_and_ttl(self):
+        from app.services.cache import QueryCache
+        from app.services.data import get_sales_snapshot
+
+        snapshot = get_sales_snapshot()
+        cache = QueryCache(max_entries=2, ttl_minutes=5)
+        for key in ("a", "b", "c"):
+            cache.put(key, snapshot)
+        assert cache.get("a") is None
+        assert cache.get("c") is snapshot
+        assert cache.stats()["evictions"] == 1
+
+        expired = QueryCache(ttl_minutes=0)
+        expired.put("a", snapshot)
+        assert expired.get("a") is None
+        assert expired.stats()["expirations"] == 1
+
+    def test_memory_budget(self):
+        from app.services.cache import QueryCache
+        from app.services.data import get_sales_snapshot
+
+        snapshot = get_sales_snapshot()
+        size = snapshot.nbytes
+        cache = QueryCache(max_bytes=size * 2 + 1)
+        for key in ("a", "b", "c"):
+            cache.put(key, snapshot)
+        assert len(cache) == 2
+        assert cache.stats()["bytes"] <= size * 2 + 1
+
+
+    def test_count_cache_is_bounded(self, monkeypatch):
+        from app.services import data
+        from app.services.cache import QueryCache
+
+        cache = QueryCache(max_entries=2, ttl_minutes=5)
+        monkeypatch.setattr(data, "_COUNT_CACHE", cache)
+        for day in range(1, 5):
+            data.remember_count(f"2025-08-0{day}", None, None, day)
+        assert len(cache) == 2
+        assert data.cached_count("2025-08-04", None, None) == 4
+        assert data.cached_count("2025-08-01", None, None) is None
+
+class TestDateIndex:
+    @pytest.mark.parametrize("start, end", [
+        (None, None),
+        ("2025-08-05", None),
+        (None, "2025-08-20"),
+        ("2025-08-05", "2025-08-20"),
+        ("2025-08-05 12:00", "2025-08-20 12:00"),
+        ("2030-01-01", None),
+        ("2025-08-20", "2025-08-05"),
+    ])
+    def test_between_matches_boolean_mask(self, start, end):
+        import pandas as pd
+        from app.services.snapshot import SalesSnapshot
+
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2025-08-20", "2025-08-01", None, "2025-08-05", "2025-08-05", "2025-09-01"]),
+            "order_id": [1, 2, 3, 4, 5, 6],
+        })
+        snapshot = SalesSnapshot.from_frame(df)
+        expected = df
+        if start is not None:
+            expected = expected[expected["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            expected = expected[expected["date"] <= pd.Timestamp(end)]
+        result = snapshot.between(
+            pd.Timestamp(start) if start else None, pd.Timestamp(end) if end else None
+        )
+        assert sorted(result["order_id"]) == sorted(expected["order_id"])
+
+    def test_snapshot_is_sorted_and_stable(self):
+        import pandas as pd
+        from app.services.snapshot import SalesSnapshot
+
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2025-08-02", "2025-08-01", "2025-08-02", "2025-08-01"]),
+            "order_id": [1, 2, 3, 4],
+        })
+        snapshot = SalesSnapshot.from_frame(df)
+        assert snapshot.frame["order_id"].tolist() == [2, 4, 1, 3]
+        assert snapshot.between(pd.Timestamp("2025-08-02"))["order_id"].tolist() == [1, 3]
+
+    def test_get_sales_data_matches_mask(self):
+        from datetime import timedelta
+        import pandas as pd
+        from app.services.data import get_sales_data, load_sales_df
+
+        df = load_sales_df(copy=True)
+        mask = (df["date"] >= pd.Timestamp("2025-08-10")) & (
+            df["date"] <= pd.Timestamp("2025-08-25") + timedelta(days=1)
+        )
+        result, total = get_sales_data(start_date="2025-08-10", end_date="2025-08-25", sort_by="order_id")
+        assert total == int(mask.sum())
+        assert result["order_id"].tolist() == sorted(df.loc[mask, "order_id"], reverse=True)
+
+
+    def test_filtered_load_after_warm_snapshot(self):
+        import pandas as pd
+        from app.services.data import load_sales_df
+
+        full = load_sales_df()  # snapshot em memória: o filtro recorta os arrays somente leitura
+        df = load_sales_df(start_date="2025-08-10", end_date="2025-08-25")
+        mask = (full["date"] >= pd.Timestamp("2025-08-10")) & (full["date"] <= pd.Timestamp("2025-08-25"))
+        assert sorted(df["order_id"]) == sorted(full.loc[mask, "order_id"])
+        with pytest.raises(ValueError):
+            df.loc[df.index[0], "quantity"] = 0
+
+class TestSalesPagination:
+    @pytest.mark.parametrize("sort_by, sort_order", [("order_id", "asc"), ("date", "desc"), ("total", "asc")])
+    def test_cursor_pages_match_offset_pages(self, sort_by, sort_order):
+        from app.services.data import fetch_sales_page
+
+        seen = []
+        cursor = None
+        while True:
+            page, total, cursor = fetch_sales_page(sort_by=sort_by, sort_order=sort_order, limit=7, cursor=cursor)
+            seen.extend(page["order_id"].tolist())
+            if cursor is None:
+                break
+
+        by_offset = []
+        for offset in range(0, total, 7):
+            page, _, _ = fetch_sales_page(sort_by=sort_by, sort_order=sort_order, limit=7, offset=offset)
+            by_offset.extend(page["order_id"].tolist())
+
+        assert seen == by_offset
+        assert len(seen) == total
+
+    def test_cursor_must_match_sort_column(self):
+        from app.services.data import fetch_sales_page
+
+        _, _, cursor = fetch_sales_page(sort_by="date", limit=5)
+        with pytest.raises(ValueError):
+            fetch_sales_page(sort_by="order_id", limit=5, cursor=cursor)
+        with pytest.raises(ValueError):
+            fetch_sales_page(limit=5, cursor="not-a-cursor")
+
+
+@pytest.fixture
+def sqlite_source(monkeypatch):
+    """Tabela sales num SQLite em memória, lida pelo caminho ETL_SOURCE=postgres."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+    from app.services import data
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    df = data._read_sales_source()
+    df["updated_at"] = "2025-09-01 00:00:00"
+    df.to_sql("sales", engine, index=False)
+    monkeypatch.setattr(data, "engine", engine)
+    monkeypatch.setenv("ETL_SOURCE", "postgres")
+    data.clear_sales_cache()
+
+    def execute(sql, **params):
+        with engine.begin() as conn:
+            conn.execute(text(sql), params)
+
+    return execute
+
+
+class TestIncrementalRefresh:
+    def _expire(self, monkeypatch):
+        from app.services import data
+        monkeypatch.setattr(data, "CACHE_TTL_MINUTES", 0)
+        monkeypatch.setattr(data, "CACHE_MAX_STALE_MINUTES", 0)
+
+    def test_upserts_changed_and_new_rows(self, sqlite_source, monkeypatch):
+        from app.services import data
+
+        before = data.summarize_sales()
+        first = data.get_sales_snapshot()
+        monkeypatch.setattr(data, "_read_sales_source", lambda *a, **k: pytest.fail("releitura completa"))
+        self._expire(monkeypatch)
+
+        sqlite_source("UPDATE sales SET quantity = quantity + 1, total = total + unit_price, "
+                      "updated_at = '2025-09-02 00:00:00' WHERE order_id = 1")
+        sqlite_source("INSERT INTO sales (order_id, region, product, quantity, unit_price, total, date, updated_at) "
+                      "VALUES (9001, 'Sul', 'Bateria Z', 2, 100, 200, '2025-09-30 00:00:00.000000', '2025-09-02 00:00:00')")
+        refreshed = data.get_sales_snapshot()
+
+        assert refreshed is not first
+        assert len(refreshed) == len(first) + 1
+        row = refreshed.frame.set_index("order_id").loc[1]
+        assert row["quantity"] == first.frame.set_index("order_id").loc[1, "quantity"] + 1
+        after = data.summarize_sales()
+        assert after["sales_count"] == before["sales_count"] + 1
+        assert after["end_date"] == "2025-09-30"
+
+    def test_no_changes_keeps_frame_and_cube(self, sqlite_source, monkeypatch):
+        from app.services import data
+
+        first = data.get_sales_snapshot()
+        cube = data.get_sales_cube()
+        self._expire(monkeypatch)
+        # Reler as linhas do último instante conhecido não muda o conteúdo
+        refreshed = data.get_sales_snapshot()
+        assert refreshed is not first
+        assert refreshed.frame is first.frame
+        assert data.get_sales_cube() is cube
+
+    def test_reconcile_detects_deletions(self, sqlite_source, monkeypatch):
+        from app.services import data
+
+        first = data.get_sales_snapshot()
+        self._expire(monkeypatch)
+        monkeypatch.setattr(data, "RECONCILE_EVERY", 1)
+        sqlite_source("DELETE FROM sales WHERE order_id IN (2, 3)")
+        refreshed = data.get_sales_snapshot()
+        assert len(refreshed) == len(first) - 2
+        assert not refreshed.frame["order_id"].isin([2, 3]).any()
+
+
+class TestStaleWhileRevalidate:
+    def _age(self, snapshot, minutes):
+        from dataclasses import replace
+        from datetime import datetime, timedelta
+        from app.services import data
+
+        data._SNAPSHOT = replace(snapshot, loaded_at=datetime.now() - timedelta(minutes=minutes))
+        return data._SNAPSHOT
+
+    def test_stale_snapshot_is_served_while_refreshing(self, monkeypatch):
+        import threading
+        from app.services import data
+
+        aged = self._age(data.get_sales_snapshot(), data.CACHE_TTL_MINUTES + 1)
+        release = threading.Event()
+        original = data._read_sales_source
+        monkeypatch.setattr(data, "_read_sales_source", lambda *a, **k: release.wait(5) and original(*a, **k))
+
+        assert data.get_sales_snapshot() is aged  # não espera pela recarga
+        assert data.get_cache_stats()["refresh_in_progress"]
+        release.set()
+        data.wait_for_refresh(5)
+        fresh = data.get_sales_snapshot()
+        assert fresh is not aged
+        assert fresh.age().total_seconds() < 60
+        stats = data.get_cache_stats()
+        assert stats["snapshot_staleness_seconds"] == 0
+        assert stats["last_refresh_seconds"] is not None
+
+    def test_concurrent_readers_share_one_reload(self, monkeypatch):
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services import data
+
+        self._age(data.get_sales_snapshot(), data.CACHE_TTL_MINUTES + data.CACHE_MAX_STALE_MINUTES + 1)
+        calls = []
+        original = data._read_sales_source
+
+        def slow_source(*args, **kwargs):
+            calls.append(1)
+            time.sleep(0.2)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(data, "_read_sales_source", slow_source)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            snapshots = list(pool.map(lambda _: data.get_sales_snapshot(), range(8)))
+        assert len(calls) == 1
+        assert all(s is snapshots[0] for s in snapshots)
+
+    def test_failed_refresh_backs_off(self, monkeypatch):
+        from app.services import data
+
+        aged = self._age(data.get_sales_snapshot(), data.CACHE_TTL_MINUTES + 1)
+        calls = []
+
+        def broken_source(*args, **kwargs):
+            calls.append(1)
+            raise ConnectionError("fonte fora do ar")
+
+        monkeypatch.setattr(data, "_read_sales_source", broken_source)
+        for _ in range(5):
+            assert data.get_sales_snapshot() is aged
+            data.wait_for_refresh(5)
+        assert len(calls) == 1
+        assert data.get_cache_stats()["refresh_errors"] >= 1
+
+        # Passado o intervalo, a próxima leitura volta a tentar
+        monkeypatch.setattr(data, "REFRESH_RETRY_SECONDS", 0)
+        assert data.get_sales_snapshot() is aged
+        data.wait_for_refresh(5)
+        assert len(calls) == 2
+
+    def test_fresh_snapshot_does_not_refresh(self):
+        from app.services import data
+
+        snapshot = data.get_sales_snapshot()
+        assert data.get_sales_snapshot() is snapshot
+        assert not data.get_cache_stats()["refresh_in_progress"]
+
+
+class TestSalesSchema:
+    def test_declared_dtypes_and_memory_report(self):
+        from app.services.data import get_sales_snapshot, get_memory_report
+
+        frame = get_sales_snapshot().frame
+        assert frame["product"].dtype == "category"
+        assert frame["region"].dtype == "category"
+        assert frame["quantity"].dtype == "int32"
+        assert frame["order_id"].dtype == "int32"
+        assert frame["notes"].dtype == object
+        # Totais inteiros do CSV continuam inteiros (mesmo payload de /api/sales)
+        assert frame["total"].dtype == "int64"
+        report = get_memory_report()
+        assert report["rows"] == len(frame)
+        assert report["bytes_after"] < report["bytes_before"]
+        assert report["columns"]["product"]["dtype_before"] == "object"
+
+    def test_decimal_money_becomes_float(self):
+        from decimal import Decimal
+        import pandas as pd
+        from app.services.schema import apply_sales_schema
+
+        df = apply_sales_schema(pd.DataFrame({"unit_price": [Decimal("10.50"), None], "total": [2, 3]}))
+        assert df["unit_price"].dtype == "float64"
+        assert df["unit_price"].iloc[0] == 10.5
+        assert df["total"].dtype == "int64"
+
+    def test_categorical_snapshot_is_read_only(self):
+        from app.services.data import load_sales_df
+
+        df = load_sales_df()
+        with pytest.raises((ValueError, TypeError)):
+            df.loc[df.index[0], "product"] = "Bateria B"
+
+    def test_filters_and_groupby_match_object_columns(self):
+        import pandas as pd
+        from app.services.data import load_sales_df, compute_summary
+        from app.services.schema import plain_dtypes
+
+        typed = load_sales_df(product="Bateria A")
+        plain = plain_dtypes(load_sales_df(copy=True))
+        pd.testing.assert_frame_equal(
+            plain_dtypes(typed).reset_index(drop=True),
+            plain[plain["product"] == "Bateria A"].reset_index(drop=True),
+        )
+        assert load_sales_df(product="Inexistente").empty
+        assert compute_summary(load_sales_df(copy=True)) == compute_summary(plain)
+
+    def test_appended_rows_keep_schema(self):
+        from app.services.data import append_sales, get_sales_snapshot
+        import pandas as pd
+
+        append_sales(pd.DataFrame([{
+            "order_id": 999, "region": "Sul", "product": "Bateria Z", "quantity": 3,
+            "unit_price": 100, "date": "2025-09-30",
+        }]))
+        frame = get_sales_snapshot().frame
+        assert frame["product"].dtype == "category"
+        assert "Bateria Z" in frame["product"].cat.categories
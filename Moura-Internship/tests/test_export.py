@@ -0,0 +1,57 @@
+import io
+import pandas as pd
+
+
+def _plain():
+    from app.services.data import load_sales_df
+    from app.services.schema import plain_dtypes
+    return plain_dtypes(load_sales_df(copy=True)).reset_index(drop=True)
+
+
+class TestStreamingExport:
+    def test_xlsx_matches_snapshot(self):
+        from app.services.export import iter_sales_batches, iter_xlsx
+
+        content = b"".join(iter_xlsx(iter_sales_batches(batch_size=7), chunk_size=1024))
+        result = pd.read_excel(io.BytesIO(content))
+        expected = _plain()
+        assert list(result.columns) == list(expected.columns)
+        assert len(result) == len(expected)
+        pd.testing.assert_series_equal(result["order_id"], expected["order_id"], check_dtype=False)
+        pd.testing.assert_series_equal(result["total"], expected["total"], check_dtype=False)
+        assert (pd.to_datetime(result["date"]) == expected["date"]).all()
+        assert result["product"].tolist() == expected["product"].tolist()
+
+    def test_csv_is_streamed_batch_by_batch(self):
+        from app.services.export import iter_csv, iter_sales_batches
+
+        consumed = []
+
+        def tracked():
+            for batch in iter_sales_batches(batch_size=10):
+                consumed.append(len(batch))
+                yield batch
+
+        stream = iter_csv(tracked())
+        first = next(stream)
+        assert first.startswith(b"order_id,")
+        assert consumed == [10]  # primeiro bloco sai antes de ler o resto
+        content = first + b"".join(stream)
+        result = pd.read_csv(io.BytesIO(content))
+        assert len(result) == len(_plain())
+
+    def test_gold_parquet_to_csv_by_row_group(self, tmp_path):
+        from app.services.export import iter_parquet_batches, write_csv
+
+        expected = _plain()
+        parquet_path = tmp_path / "sales.parquet"
+        expected.to_parquet(parquet_path, index=False, row_group_size=8)
+        batches = list(iter_parquet_batches(str(parquet_path), batch_size=8))
+        assert max(len(b) for b in batches) == 8
+
+        csv_path = tmp_path / "sales_gold.csv"
+        rows = write_csv(iter_parquet_batches(str(parquet_path), batch_size=8), str(csv_path))
+        assert rows == len(expected)
+        result = pd.read_csv(csv_path)
+        assert result["order_id"].tolist() == expected["order_id"].tolist()
+        assert result["total"].sum() == expected["total"].sum()
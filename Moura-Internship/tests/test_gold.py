@@ -0,0 +1,182 @@
+import pytest
+
+
+def _transformed():
+    from app.services import data
+    from app.services.schema import plain_dtypes
+
+    return plain_dtypes(data._read_sales_source())
+
+
+class TestGoldDataset:
+    @pytest.mark.parametrize("by_product", [False, True])
+    def test_roundtrip_keeps_rows_and_column_order(self, tmp_path, by_product):
+        from app.services.gold import read_gold, write_gold
+
+        df = _transformed()
+        path = write_gold(df, str(tmp_path / "sales.parquet"), by_product=by_product)
+        months = sorted(p.name for p in (tmp_path / "sales.parquet").glob("year=*/month=*"))
+        assert months and all(len(name) == len("month=08") for name in months)
+
+        result = read_gold(path)
+        assert list(result.columns) == list(df.columns)
+        assert sorted(result["order_id"]) == sorted(df["order_id"])
+        assert result["total"].sum() == df["total"].sum()
+
+    def test_replaces_single_file_layout(self, tmp_path):
+        from app.services.gold import write_gold
+
+        path = tmp_path / "sales.parquet"
+        _transformed().to_parquet(path, index=False)
+        write_gold(_transformed(), str(path))
+        assert path.is_dir()
+
+    def test_refuses_to_overwrite_foreign_directory(self, tmp_path):
+        from app.services.gold import write_gold
+
+        (tmp_path / "outro.txt").write_text("x")
+        with pytest.raises(ValueError):
+            write_gold(_transformed(), str(tmp_path))
+
+    @pytest.mark.parametrize("by_product", [False, True])
+    def test_filters_match_in_memory_filter(self, tmp_path, by_product):
+        import pandas as pd
+        from app.services.gold import read_gold, write_gold
+
+        df = _transformed()
+        path = write_gold(df, str(tmp_path / "gold"), by_product=by_product, row_group_rows=4)
+        start, end = pd.Timestamp("2025-08-20"), pd.Timestamp("2025-09-05")
+        product = df["product"].iloc[0]
+
+        result = read_gold(path, start=start, end=end, product=product)
+        expected = df[(df["date"] >= start) & (df["date"] <= end) & (df["product"] == product)]
+        assert sorted(result["order_id"]) == sorted(expected["order_id"])
+
+    def test_pruning_skips_partitions_and_row_groups(self, tmp_path):
+        import pandas as pd
+        import pyarrow.dataset as ds
+        from app.services.gold import gold_filter, open_gold, write_gold
+
+        df = _transformed()
+        path = write_gold(df, str(tmp_path / "gold"), row_group_rows=4)
+        dataset = open_gold(path)
+        start = pd.Timestamp("2025-09-10")
+        fragments = list(dataset.get_fragments(filter=gold_filter(dataset, start=start)))
+        assert 0 < len(fragments) < len(list(dataset.get_fragments()))
+
+        # Dentro dos arquivos restantes, as estatísticas de 'date' descartam row groups
+        by_date = ds.field("date") >= start
+        row_groups = sum(len(f.split_by_row_group(by_date)) for f in fragments)
+        total_row_groups = sum(f.metadata.num_row_groups for f in fragments)
+        assert row_groups < total_row_groups
+
+
+class TestGoldStreaming:
+    def test_batches_match_single_write(self, tmp_path):
+        from app.services.gold import read_gold, write_gold_batches
+
+        df = _transformed()
+        seen = []
+        batches = (df.iloc[i:i + 7] for i in range(0, len(df), 7))
+        stats = write_gold_batches(batches, str(tmp_path / "gold"), row_group_rows=8, progress=seen.append)
+
+        assert stats["rows"] == len(df)
+        assert stats["batches"] == len(seen) == -(-len(df) // 7)
+        assert [s["rows"] for s in seen] == sorted(s["rows"] for s in seen)
+        result = read_gold(stats["dest"])
+        assert list(result.columns) == list(df.columns)
+        assert sorted(result["order_id"]) == sorted(df["order_id"])
+
+    def test_later_batches_follow_first_schema(self, tmp_path):
+        import pandas as pd
+        from app.services.gold import read_gold, write_gold_batches
+
+        first = pd.DataFrame({"order_id": [1], "date": ["2025-08-01"], "quantity": [2]})
+        second = pd.DataFrame({"order_id": [2], "date": ["2025-09-01"], "quantity": [None]})
+        stats = write_gold_batches([first, second], str(tmp_path / "gold"))
+        result = read_gold(stats["dest"]).sort_values("order_id")
+        assert str(result["quantity"].dtype) == "float64"  # int64 com nulo volta como float
+        assert result["quantity"].isna().tolist() == [False, True]
+
+    def test_text_column_null_in_first_batch(self, tmp_path):
+        import pandas as pd
+        from app.services.gold import read_gold, write_gold, write_gold_batches
+
+        csv = tmp_path / "sales.csv"
+        csv.write_text(
+            "order_id,product,quantity,unit_price,date,notes\n"
+            "1,Bateria A,1,10,2025-08-01,\n"
+            "2,Bateria A,2,10,2025-08-02,\n"
+            "3,Bateria B,3,10.5,2025-09-01,x\n"
+            "4,Bateria B,4,10,2025-09-02,\n"
+        )
+        stats = write_gold_batches(pd.read_csv(csv, chunksize=2), str(tmp_path / "gold"))
+        streamed = read_gold(stats["dest"]).sort_values("order_id", ignore_index=True)
+        assert streamed["notes"].tolist() == [None, None, "x", None]
+        assert str(streamed["unit_price"].dtype) == "float64"
+
+        full = read_gold(write_gold(pd.read_csv(csv), str(tmp_path / "full"))).sort_values("order_id", ignore_index=True)
+        pd.testing.assert_frame_equal(streamed, full)
+
+    def test_previous_dataset_stays_readable_during_rewrite(self, tmp_path):
+        from app.services.gold import read_gold, write_gold, write_gold_batches
+
+        df = _transformed()
+        path = write_gold(df.iloc[:5], str(tmp_path / "gold"))
+        seen = []
+
+        def batches():
+            yield df.iloc[:10]
+            # O writer já consumiu um lote: o dataset antigo continua inteiro no destino
+            seen.append(sorted(read_gold(path)["order_id"]))
+            yield df.iloc[10:]
+
+        write_gold_batches(batches(), path)
+        assert seen == [sorted(df["order_id"].iloc[:5])]
+        assert sorted(read_gold(path)["order_id"]) == sorted(df["order_id"])
+        assert [p.name for p in tmp_path.iterdir()] == ["gold"]  # sem temporários
+
+    def test_empty_source(self, tmp_path):
+        from app.services.gold import write_gold_batches
+
+        stats = write_gold_batches(iter([]), str(tmp_path / "gold"))
+        assert stats["rows"] == 0
+        assert (tmp_path / "gold").is_dir()
+
+
+class TestGoldSource:
+    def test_load_sales_df_reads_gold_with_filters(self, tmp_path, monkeypatch):
+        from app.services import data
+        from app.services.gold import write_gold
+        from app.services.schema import plain_dtypes
+
+        expected = data.load_sales_df(start_date="2025-08-10", product="Bateria A")
+        path = write_gold(_transformed(), str(tmp_path / "gold"))
+        monkeypatch.setenv("ETL_SOURCE", "gold")
+        monkeypatch.setenv("ETL_GOLD_PARQUET", path)
+        data.clear_sales_cache()
+
+        result = data.load_sales_df(start_date="2025-08-10", product="Bateria A")
+        assert data._SNAPSHOT is None  # servido sem carregar a tabela inteira
+        assert result["order_id"].tolist() == expected["order_id"].tolist()
+        # Valores monetários são float64 no gold (tipo declarado); o resto segue a fonte
+        expected_dtypes = plain_dtypes(expected).dtypes.to_dict()
+        expected_dtypes.update(unit_price="float64", total="float64")
+        assert plain_dtypes(result).dtypes.to_dict() == expected_dtypes
+        assert result["total"].tolist() == expected["total"].astype("float64").tolist()
+
+    def test_export_batches_from_partitioned_dataset(self, tmp_path):
+        from app.services.export import iter_parquet_batches, write_csv
+        from app.services.gold import write_gold
+        import pandas as pd
+
+        df = _transformed()
+        path = write_gold(df, str(tmp_path / "gold"), row_group_rows=8)
+        batches = list(iter_parquet_batches(path, batch_size=8))
+        assert max(len(b) for b in batches) <= 8
+        assert list(batches[0].columns) == list(df.columns)
+
+        rows = write_csv(iter_parquet_batches(path), str(tmp_path / "gold.csv"))
+        result = pd.read_csv(tmp_path / "gold.csv", parse_dates=["date"])
+        assert rows == len(df)
+        assert result["date"].is_monotonic_increasing  # partições em ordem cronológica
@@ -0,0 +1,65 @@
+import pytest
+
+
+def _client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.backend.routers.ml import router
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+class TestBatchPredict:
+    def test_rows_and_columns_match_single_predictions(self):
+        from app.services import data
+
+        client = _client()
+        scenarios = [[10, 200.0], [1, 50.5], [75, 480.0]]
+        expected = [data.predict(q, p) for q, p in scenarios]
+
+        by_rows = client.post("/ml/predict/batch", json={"rows": scenarios}).json()
+        by_columns = client.post("/ml/predict/batch", json={
+            "quantity": [q for q, _ in scenarios], "unit_price": [p for _, p in scenarios],
+        }).json()
+        assert by_rows["count"] == 3
+        assert by_rows["y_pred"] == pytest.approx(expected)
+        assert by_columns == by_rows
+        single = client.post("/ml/predict", json={"quantity": 10, "unit_price": 200.0}).json()
+        assert single["y_pred"] == pytest.approx(expected[0])
+
+    def test_streams_large_batches_in_chunks(self):
+        import json
+        import numpy as np
+        from app.backend.routers import ml
+        from app.services import data
+
+        chunks = list(ml._iter_predictions(np.arange(25, dtype=float), chunk=10))
+        assert len(chunks) == 2 + 3 + 2  # cabeçalho, 3 blocos, 2 separadores, fim
+        assert json.loads(b"".join(chunks)) == {"count": 25, "y_pred": list(map(float, range(25)))}
+
+        n = 20_000
+        quantity = np.arange(n) % 100
+        body = _client().post("/ml/predict/batch", json={
+            "quantity": quantity.tolist(), "unit_price": [100.0] * n,
+        }).json()
+        expected = data.predict_batch(np.column_stack([quantity, np.full(n, 100.0)]))
+        assert body["y_pred"] == pytest.approx(expected.tolist())
+
+    @pytest.mark.parametrize("payload", [
+        {},
+        {"rows": [[1, 2]], "quantity": [1], "unit_price": [2]},
+        {"quantity": [1, 2], "unit_price": [2]},
+        {"rows": [[1, 2, 3]]},
+    ])
+    def test_rejects_malformed_payloads(self, payload):
+        assert _client().post("/ml/predict/batch", json=payload).status_code == 422
+
+    def test_rejects_negative_values(self):
+        response = _client().post("/ml/predict/batch", json={"rows": [[1, 2], [-1, 2]]})
+        assert response.status_code == 400
+
+    def test_empty_batch(self):
+        body = _client().post("/ml/predict/batch", json={"rows": []}).json()
+        assert body == {"count": 0, "y_pred": []}
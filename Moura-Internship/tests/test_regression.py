@@ -0,0 +1,161 @@
+import pytest
+
+
+def _sales():
+    from app.services import data
+    from app.services.schema import plain_dtypes
+
+    return plain_dtypes(data.load_sales_df())
+
+
+class TestRegressionStats:
+    def test_matches_statsmodels(self):
+        import numpy as np
+        import statsmodels.api as sm
+        from app.services.regression import RegressionStats
+
+        df = _sales()
+        X = sm.add_constant(df[["quantity", "unit_price"]].astype(float), prepend=True)
+        expected = sm.OLS(df["total"].astype(float), X).fit()
+        fit = RegressionStats.from_frame(df, ["quantity", "unit_price"], "total").fit()
+
+        assert fit.params == pytest.approx(expected.params.to_dict(), rel=1e-9)
+        assert fit.std_errors == pytest.approx(expected.bse.to_dict(), rel=1e-9)
+        assert fit.r2 == pytest.approx(expected.rsquared, rel=1e-12)
+        np.testing.assert_allclose(fit.predict(df[["quantity", "unit_price"]]), expected.fittedvalues, rtol=1e-9)
+
+    def test_matches_sklearn_single_feature(self):
+        from sklearn.linear_model import LinearRegression
+        from app.services.regression import RegressionStats
+
+        df = _sales()
+        model = LinearRegression().fit(df[["quantity"]], df["total"])
+        fit = RegressionStats.from_frame(df, ["quantity"], "total").fit()
+        assert fit.coef[0] == pytest.approx(model.coef_[0], rel=1e-9)
+        assert fit.intercept == pytest.approx(model.intercept_, rel=1e-9)
+        assert fit.r2 == pytest.approx(model.score(df[["quantity"]], df["total"]), rel=1e-9)
+
+    def test_incremental_add_equals_full_pass(self):
+        import numpy as np
+        from app.services.regression import RegressionStats
+
+        df = _sales()
+        features = ["quantity", "unit_price"]
+        stats = RegressionStats(features, "total")
+        for start in range(0, len(df), 7):
+            stats = stats.add(df.iloc[start:start + 7])
+        full = RegressionStats.from_frame(df, features, "total")
+        assert stats.n == full.n
+        np.testing.assert_allclose(stats.mean, full.mean, rtol=1e-12)
+        np.testing.assert_allclose(stats.comoment, full.comoment, rtol=1e-9)
+        assert stats.fit().params == pytest.approx(full.fit().params, rel=1e-9)
+
+    def test_nulls_are_skipped_and_empty_fails(self):
+        import pandas as pd
+        from app.services.regression import RegressionStats
+
+        df = pd.DataFrame({"x": [1.0, 2.0, None, 4.0], "y": [2.0, 4.0, 5.0, 8.0]})
+        fit = RegressionStats.from_frame(df, ["x"], "y").fit()
+        assert fit.n == 3
+        assert fit.coef[0] == pytest.approx(2.0)
+        with pytest.raises(ValueError):
+            RegressionStats(["x"], "y").fit()
+
+
+class TestSnapshotRegression:
+    def test_entry_points_share_cached_stats(self):
+        from app.services import data
+
+        stats = data.get_regression_stats()
+        assert data.get_regression_stats() is stats
+        ols = data.compute_ols()
+        model = data.train_model()
+        assert ols["params"]["quantity"] == pytest.approx(model["coef"][0])
+        assert ols["r2"] == pytest.approx(model["r2"])
+        assert ols == data.compute_ols(_sales())
+
+    def test_append_updates_stats_incrementally(self, monkeypatch):
+        import pandas as pd
+        from app.services import data
+        from app.services.regression import RegressionStats
+
+        monkeypatch.setattr(data, "_MODEL", None)
+        data.get_regression_stats()
+        rows = pd.DataFrame({
+            "order_id": [9001, 9002], "region": ["Sul", "Norte"], "product": ["Bateria A", "Bateria B"],
+            "quantity": [3, 40], "unit_price": [250.0, 90.0], "date": ["2025-09-30", "2025-09-30"],
+        })
+        data.append_sales(rows)
+        assert data._REGRESSION[0] is data._SNAPSHOT  # atualizadas sem recalcular do zero
+
+        expected = RegressionStats.from_frame(_sales(), data.OLS_FEATURES, "total").fit()
+        assert data.compute_ols()["params"] == pytest.approx(expected.params, rel=1e-9)
+        assert data.predict(10, 200.0) == pytest.approx(float(expected.predict([[10, 200.0]])[0]))
+
+
+    def test_linear_regression_endpoint_loads_once(self, monkeypatch):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.backend.routers import extras
+        from app.services import data
+
+        def no_reload(*args, **kwargs):
+            raise AssertionError("load_sales_df chamado de novo")
+
+        monkeypatch.setattr(extras, "load_sales_df", no_reload)
+        app = FastAPI()
+        app.include_router(extras.router)
+        body = TestClient(app).get("/ml/linear-regression").json()
+        expected = data.get_regression_stats(("quantity",), "total").fit()
+        assert body["coef"] == pytest.approx(float(expected.coef[0]))
+        assert body["score"] == pytest.approx(expected.r2)
+
+class TestPearson:
+    def test_matches_scipy_and_merges_partitions(self):
+        from scipy.stats import pearsonr
+        from app.services import data
+        from app.services.regression import RegressionStats
+
+        df = _sales()
+        expected = pearsonr(df["quantity"], df["unit_price"])
+        result = data.compute_pearson()
+        assert result["pearson_r"] == pytest.approx(expected.statistic, rel=1e-12)
+        assert result["p_value"] == pytest.approx(expected.pvalue, rel=1e-9)
+
+        parts = [RegressionStats.from_frame(df.iloc[i::3], ["quantity"], "unit_price") for i in range(3)]
+        merged = parts[0].merge(parts[1]).merge(parts[2])
+        assert merged.pearson() == pytest.approx((expected.statistic, expected.pvalue), rel=1e-9)
+
+    @pytest.mark.parametrize("by", ["product", "region", "category"])
+    def test_grouped_matches_scipy_per_group(self, by):
+        import numpy as np
+        from scipy.stats import pearsonr
+        from app.services import data
+
+        df = _sales()
+        groups = {g["group"]: g for g in data.compute_pearson_by(by)}
+        assert set(groups) == set(df[by].dropna().unique())
+        for name, sub in df.groupby(by):
+            group = groups[name]
+            assert group["n"] == len(sub)
+            if len(sub) < 2 or sub["quantity"].nunique() == 1 or sub["unit_price"].nunique() == 1:
+                assert group["pearson_r"] is None and group["p_value"] is None
+                continue
+            expected = pearsonr(sub["quantity"], sub["unit_price"])
+            assert group["pearson_r"] == pytest.approx(expected.statistic, rel=1e-9)
+            assert group["p_value"] == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-12)
+            assert not np.isnan(group["pearson_r"])
+
+    def test_endpoint_grouped_mode(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.backend.routers.stats import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        body = client.get("/stats/pearson", params={"by": "region"}).json()
+        assert body["by"] == "region"
+        assert len(body["groups"]) == _sales()["region"].nunique()
+        assert client.get("/stats/pearson").json()["groups"] is None
+        assert client.get("/stats/pearson", params={"by": "customer_id"}).status_code == 400
@@ -0,0 +1,51 @@
+import json
+import pandas as pd
+
+
+def _pydantic_response(page, rows, next_cursor=None):
+    from app.backend.models import SalesRecord, SalesResponse
+    from app.backend.serializers import _records_validated
+
+    preview = [SalesRecord(**r) for r in _records_validated(page)]
+    return SalesResponse(rows=rows, preview=preview, next_cursor=next_cursor).model_dump(mode="json")
+
+
+class TestSalesSerializer:
+    def test_fast_path_matches_pydantic(self):
+        from app.backend.serializers import sales_response_bytes, _records_fast
+        from app.services.data import fetch_sales_page
+
+        page, rows, cursor = fetch_sales_page(limit=20)
+        assert _records_fast(page) is not None
+        assert json.loads(sales_response_bytes(page, rows, cursor)) == _pydantic_response(page, rows, cursor)
+
+    def test_nullable_and_timestamp_columns(self):
+        from app.backend.serializers import sales_response_bytes, _records_fast
+
+        page = pd.DataFrame({
+            "order_id": [1, 2], "region": ["Sul", "Norte"], "product": ["A", "B"],
+            "quantity": [1, 2], "unit_price": [10, 20.5], "total": [10.0, 41.0],
+            "date": pd.to_datetime(["2025-08-01", "2025-08-02"]),
+            "customer_id": [101.0, None], "notes": ["ok", None],
+            "created_at": pd.to_datetime(["2025-08-01 10:30:00.123456", None]),
+        })
+        body = json.loads(sales_response_bytes(page, 2))
+        assert _records_fast(page) is not None
+        assert body["preview"][0]["date"] == "2025-08-01T00:00:00"
+        assert body["preview"][0]["created_at"] == "2025-08-01T10:30:00.123456"
+        assert body["preview"][1]["created_at"] is None
+        assert body["preview"][1]["customer_id"] is None
+        assert body["preview"][0]["unit_price"] == 10.0
+        assert list(body["preview"][0]) == list(_pydantic_response(page.iloc[:1], 1)["preview"][0])
+
+    def test_invalid_batch_falls_back_to_validation(self):
+        import pytest
+        from pydantic import ValidationError
+        from app.backend.serializers import sales_response_bytes
+
+        page = pd.DataFrame({
+            "order_id": [1], "region": ["Sul"], "product": ["A"], "quantity": [-1],
+            "unit_price": [1.0], "total": [1.0], "date": pd.to_datetime(["2025-08-01"]),
+        })
+        with pytest.raises(ValidationError):
+            sales_response_bytes(page, 1)
@@ -0,0 +1,33 @@
+import pytest
+
+
+class TestSparkSessionManager:
+    def test_session_is_reused_and_released_when_idle(self):
+        pytest.importorskip("pyspark")
+        import time
+        from app.services.spark import SparkSessionManager
+
+        manager = SparkSessionManager(app_name="moura-test", master="local[1]", idle_timeout=1)
+        try:
+            with manager.use() as first:
+                assert first.conf.get("spark.sql.execution.arrow.pyspark.enabled") == "true"
+            with manager.use() as second:
+                assert second is first
+            assert manager.stats()["starts"] == 1
+            assert manager.stats()["requests"] == 2
+
+            time.sleep(2.5)
+            assert not manager.stats()["running"]
+            with manager.use():
+                pass
+            assert manager.stats()["starts"] == 2
+        finally:
+            manager.stop()
+
+    def test_stats_without_session(self):
+        from app.services.spark import SparkSessionManager
+
+        stats = SparkSessionManager().stats()
+        assert stats["running"] is False
+        assert stats["starts"] == 0
+        assert stats["arrow_enabled"] is True
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+
+NOW = datetime(2025, 9, 15, 14, 30)
+
+
+def _legacy_revenue(df, period, product=None, now=NOW):
+    """Laço original de /api/charts/revenue, usado como referência."""
+    df = df.copy()
+    if product:
+        df = df[df['product'] == product]
+    df['date'] = pd.to_datetime(df['date'])
+    labels, data = [], []
+    if period == 'week':
+        for i in range(6, -1, -1):
+            date = now - timedelta(days=i)
+            labels.append(date.strftime('%a'))
+            data.append(df[df['date'].dt.date == date.date()]['total'].sum())
+    elif period == 'month':
+        for i in range(29, -1, -1):
+            date = now - timedelta(days=i)
+            labels.append(date.strftime('%d/%m') if i % 5 == 0 else '')
+            data.append(df[df['date'].dt.date == date.date()]['total'].sum())
+    else:
+        for i in range(11, -1, -1):
+            date = now - pd.DateOffset(months=i)
+            month_data = df[(df['date'].dt.year == date.year) & (df['date'].dt.month == date.month)]
+            labels.append(date.strftime('%b %Y'))
+            data.append(month_data['total'].sum())
+    return {'labels': labels, 'data': data}
+
+
+class TestRevenueSeries:
+    @pytest.mark.parametrize("period", ["week", "month", "year"])
+    @pytest.mark.parametrize("product", [None, "Bateria A"])
+    def test_matches_legacy_loop(self, period, product):
+        from app.services.data import get_revenue_series, load_sales_df
+
+        expected = _legacy_revenue(load_sales_df(copy=True), period, product)
+        result = get_revenue_series(period, product, now=NOW)
+        assert result['labels'] == expected['labels']
+        assert result['data'] == pytest.approx(expected['data'])
+
+    def test_does_not_mutate_snapshot(self):
+        from app.services.data import get_revenue_series, get_sales_snapshot
+
+        before = get_sales_snapshot().frame['date'].dtype
+        get_revenue_series('year', now=NOW)
+        assert get_sales_snapshot().frame['date'].dtype == before
+
+    def test_arbitrary_period(self):
+        from app.services.data import get_revenue_series, load_sales_df
+
+        df = load_sales_df(copy=True)
+        result = get_revenue_series('6w', now=NOW)
+        assert len(result['data']) == 6
+        start = pd.Timestamp(NOW).normalize() - timedelta(days=41)
+        dates = pd.to_datetime(df['date'])
+        expected = df[(dates >= start) & (dates <= pd.Timestamp(NOW))]['total'].sum()
+        assert sum(result['data']) == pytest.approx(expected)
+
+    def test_custom_window_by_week(self):
+        from app.services.data import get_revenue_series, load_sales_df
+
+        df = load_sales_df(copy=True)
+        result = get_revenue_series(start_date="2025-08-01", end_date="2025-08-28", bucket="week")
+        assert result['labels'] == ['01/08', '08/08', '15/08', '22/08']
+        dates = pd.to_datetime(df['date'])
+        expected = df[(dates >= "2025-08-01") & (dates <= "2025-08-28")]['total'].sum()
+        assert sum(result['data']) == pytest.approx(expected)
+
+    def test_invalid_window(self):
+        from app.services.data import get_revenue_series
+
+        with pytest.raises(ValueError):
+            get_revenue_series(start_date="2025-09-01", end_date="2025-08-01")
+        with pytest.raises(ValueError):
+            get_revenue_series(start_date="2025-09-01", bucket="hour")